@@ -0,0 +1,4 @@
+"""
+Benchmarks do TOOLS Calculator com dados sintéticos, sem rede e sem
+credenciais (o cálculo vem de nucleo, que não lê configuração na importação).
+"""
@@ -0,0 +1,91 @@
+"""
+Busca global aproximada (IndiceBusca): tempo por consulta e acerto em
+consultas com erros de digitação, sobre nomes de obras sintéticos.
+
+Uso:
+    python -m benchmarks.bench_busca [--obras 10000] [--consultas 500]
+
+Cada consulta é derivada do nome de uma obra (sigla ou palavras do nome com
+uma letra trocada, ou com a última palavra incompleta, como durante a
+digitação); conta-se quantas vezes a obra de origem aparece entre os
+BUSCA_RESULTADOS_MAX primeiros resultados.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+PALAVRAS = ["Residencial", "Edifício", "Condomínio", "Torre", "Jardim", "Parque", "Vila", "Solar",
+            "Horizonte", "Aurora", "Ipê", "Jacarandá", "Mirante", "Praça", "Atlântico", "Bosque",
+            "Alameda", "Montreal", "Veneza", "Lisboa", "Brisa", "Cerejeiras", "Paineiras", "Itaim"]
+
+def gerar_nomes(n_obras, seed=0):
+    """Nomes no formato do board: 'SIGLA - Nome da obra'"""
+    rnd = random.Random(seed)
+    return [
+        f"{''.join(rnd.choice('ABCDEFGHJKLMNPRSTV') for _ in range(3))}{i:04d} - "
+        + " ".join(rnd.sample(PALAVRAS, rnd.randint(2, 4)))
+        for i in range(n_obras)
+    ]
+
+def _com_erro(palavra, rnd):
+    """Troca uma letra da palavra (erro de digitação)"""
+    i = rnd.randrange(len(palavra))
+    return palavra[:i] + rnd.choice("abcdefghijklmnopqrstuvwxyz") + palavra[i + 1:]
+
+def gerar_consultas(nomes, n_consultas, seed=0):
+    """Pares (posição da obra de origem, consulta)"""
+    rnd = random.Random(seed)
+    consultas = []
+    for _ in range(n_consultas):
+        posicao = rnd.randrange(len(nomes))
+        sigla, nome = nomes[posicao].split(" - ", 1)
+        palavras = nome.split()
+        tipo = rnd.random()
+        if tipo < 0.3:
+            consulta = sigla.lower()
+        elif tipo < 0.7:
+            consulta = " ".join(_com_erro(p, rnd) if len(p) > 6 else p for p in palavras)
+        else:
+            consulta = " ".join(palavras[:-1] + [palavras[-1][:rnd.randint(2, len(palavras[-1]))]])
+        consultas.append((posicao, consulta))
+    return consultas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=10000)
+    parser.add_argument("--consultas", type=int, default=500)
+    args = parser.parse_args()
+
+    from nucleo.busca import IndiceBusca
+    from main_interface import BUSCA_RESULTADOS_MAX
+
+    nomes = gerar_nomes(args.obras)
+    inicio = time.perf_counter()
+    indice = IndiceBusca(nomes)
+    t_construcao = time.perf_counter() - inicio
+
+    tempos, acertos = [], 0
+    for posicao, consulta in gerar_consultas(nomes, args.consultas):
+        inicio = time.perf_counter()
+        resultados = indice.buscar(consulta, BUSCA_RESULTADOS_MAX)
+        tempos.append(time.perf_counter() - inicio)
+        # Nomes com as mesmas palavras empatam: basta um nome igual ao de origem
+        acertos += any(nomes[p] == nomes[posicao] or nomes[p].split(" - ", 1)[1] == nomes[posicao].split(" - ", 1)[1]
+                       for p, _ in resultados)
+
+    tempos.sort()
+    print(json.dumps({
+        "obras": args.obras,
+        "consultas": len(tempos),
+        "construcao_ms": round(t_construcao * 1000, 1),
+        "mediana_ms": round(statistics.median(tempos) * 1000, 3),
+        "p95_ms": round(tempos[int(len(tempos) * 0.95)] * 1000, 3),
+        "max_ms": round(tempos[-1] * 1000, 3),
+        "acerto_top": round(acertos / len(tempos), 3),
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Pico de RSS do carregamento de EAPs: lista completa (legado) x streaming compacto.
+
+Uso:
+    python -m benchmarks.bench_eap_loader [--itens 50000] [--itens-por-doc 50]
+
+Cada modo roda em um subprocesso próprio para que o ru_maxrss reflita apenas
+aquele carregamento.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.dados_sinteticos import (
+    gerar_projetos, ColecaoEapsSintetica, ColecaoProjetosSintetica
+)
+
+def _rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _carregar_legado(eaps_collection, projetos_dados):
+    """Reproduz o carregamento anterior: list(find({})) + cópia filtrada de cada documento"""
+    from nucleo.fontes import item_eap_permitido
+    eaps_dados_raw = list(eaps_collection.find({}))
+    eaps_dados = []
+    for eap in eaps_dados_raw:
+        eap_filtrado = eap.copy()
+        eap_filtrado['itens'] = [item for item in eap.get('itens', [])
+                               if item_eap_permitido(item.get('codEAP', ''), item.get('nivel'))]
+        eaps_dados.append(eap_filtrado)
+    return eaps_dados
+
+def _carregar_streaming(eaps_collection, projetos_dados):
+    from nucleo.fontes import _stream_eaps_compactas, EAP_PROJECTION, EAP_BATCH_SIZE
+    cursor = eaps_collection.find({}, EAP_PROJECTION).batch_size(EAP_BATCH_SIZE)
+    return _stream_eaps_compactas(cursor, projetos_dados)
+
+def _executar_modo(modo, n_itens, itens_por_doc):
+    from nucleo.fontes import carregar_projetos
+    n_docs = max(1, n_itens // itens_por_doc)
+    projetos = gerar_projetos(max(1, n_docs // 2))
+    projetos_dados = carregar_projetos(ColecaoProjetosSintetica(projetos))
+    eaps_collection = ColecaoEapsSintetica(projetos, n_docs, itens_por_doc)
+
+    rss_inicial = _rss_kb()
+    inicio = time.perf_counter()
+    carregar = _carregar_legado if modo == "legado" else _carregar_streaming
+    eaps_dados = carregar(eaps_collection, projetos_dados)
+    duracao = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "modo": modo,
+        "documentos": len(eaps_dados),
+        "itens": n_docs * itens_por_doc,
+        "segundos": round(duracao, 3),
+        "pico_rss_mb": round((_rss_kb() - rss_inicial) / 1024, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--itens", type=int, default=50000)
+    parser.add_argument("--itens-por-doc", type=int, default=50)
+    parser.add_argument("--modo", choices=["legado", "streaming"])
+    args = parser.parse_args()
+
+    if args.modo:
+        _executar_modo(args.modo, args.itens, args.itens_por_doc)
+        return
+
+    for modo in ("legado", "streaming"):
+        subprocess.run([
+            sys.executable, "-m", "benchmarks.bench_eap_loader", "--modo", modo,
+            "--itens", str(args.itens), "--itens-por-doc", str(args.itens_por_doc)
+        ], check=True)
+
+if __name__ == "__main__":
+    main()
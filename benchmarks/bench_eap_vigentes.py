@@ -0,0 +1,62 @@
+"""
+Seleção da EAP vigente de cada projeto (carregar_eaps) com projeto_id
+gravado ora como ObjectId, ora como texto, no mongomock ou em um mongod.
+
+Uso:
+    python -m benchmarks.bench_eap_vigentes [--projetos 200] [--revisoes 4] [--mongo-uri mongodb://...]
+
+Confere que a EAP vigente de cada sigla é a de dataBase mais recente entre
+todas as revisões do projeto, qualquer que seja o tipo do projeto_id.
+"""
+
+import argparse
+import json
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projetos", type=int, default=200)
+    parser.add_argument("--revisoes", type=int, default=4)
+    parser.add_argument("--itens-por-eap", type=int, default=50)
+    parser.add_argument("--mongo-uri", help="mongod local (padrão: mongomock)")
+    args = parser.parse_args()
+
+    from benchmarks.dados_sinteticos import popular_colecoes
+    from nucleo.fontes import carregar_eaps
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        cliente = MongoClient(args.mongo_uri)
+    else:
+        import mongomock
+        cliente = mongomock.MongoClient()
+    cliente.drop_database("bench_vigentes")
+    banco = cliente["bench_vigentes"]
+    projetos = popular_colecoes(banco, args.projetos, args.itens_por_eap, args.revisoes, ids_mistos=True)
+
+    # Esperado: maior (dataBase, _id) entre as revisões de cada projeto
+    esperado = {}
+    siglas = {str(p["_id"]): p["sigla"] for p in projetos}
+    for eap in banco.eaps.find({}, {"projeto_id": 1, "dataBase": 1}):
+        sigla = siglas[str(eap["projeto_id"])]
+        esperado[sigla] = max(esperado.get(sigla, ("", "")), (eap["dataBase"], str(eap["_id"])))
+
+    inicio = time.perf_counter()
+    eaps_dados, _, _ = carregar_eaps(banco.eaps, banco.projetos)
+    duracao = time.perf_counter() - inicio
+    if args.mongo_uri:
+        cliente.drop_database("bench_vigentes")
+
+    obtido = {doc["sigla"]: doc["dataBase"] for doc in eaps_dados}
+    divergencias = sorted(s for s in esperado if obtido.get(s) != esperado[s][0])
+    print(json.dumps({
+        "projetos": args.projetos,
+        "revisoes": args.revisoes,
+        "eaps_vigentes": len(eaps_dados),
+        "carregar_ms": round(duracao * 1000, 1),
+        "divergencias": divergencias,
+    }))
+    if divergencias:
+        raise SystemExit("EAP vigente diferente da revisão mais recente do projeto")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Estatísticas por código da matriz EAP: estatisticas_linhas (uma ordenação
+NumPy) x reduções do pandas, uma por estatística.
+
+Uso:
+    python -m benchmarks.bench_estatisticas_eap [--obras 5000] [--codigos 42] [--repeticoes 5]
+
+Confere também que os dois caminhos concordam em todas as estatísticas.
+"""
+
+import argparse
+import json
+import time
+
+def _matriz_sintetica(n_codigos, n_obras, seed=0):
+    """Matriz código x obra com ~30% de células vazias e alguns valores extremos"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    valores = rng.lognormal(mean=5, sigma=0.6, size=(n_codigos, n_obras))
+    valores[rng.random(valores.shape) < 0.3] = np.nan
+    extremos = rng.random(valores.shape) < 0.01
+    valores[extremos] *= 20
+    return valores
+
+def _estatisticas_pandas(valores):
+    import pandas as pd
+    df = pd.DataFrame(valores)
+    return pd.DataFrame({
+        "Média": df.mean(axis=1),
+        "Mediana": df.median(axis=1),
+        "P25": df.quantile(0.25, axis=1),
+        "P75": df.quantile(0.75, axis=1),
+        "Desvio padrão": df.std(axis=1),
+        "Mínimo": df.min(axis=1),
+        "Máximo": df.max(axis=1),
+        "Nº obras": df.count(axis=1).astype(float),
+    })
+
+def _melhor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=5000)
+    parser.add_argument("--codigos", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    import numpy as np
+    from nucleo.calculos import estatisticas_linhas, outliers_linhas
+
+    valores = _matriz_sintetica(args.codigos, args.obras)
+
+    t_pandas, ref = _melhor_tempo(lambda: _estatisticas_pandas(valores), args.repeticoes)
+    t_numpy, estat = _melhor_tempo(lambda: estatisticas_linhas(valores), args.repeticoes)
+    t_iqr, mascara_iqr = _melhor_tempo(lambda: outliers_linhas(valores, estat, "iqr"), args.repeticoes)
+    t_z, mascara_z = _melhor_tempo(lambda: outliers_linhas(valores, estat, "zscore"), args.repeticoes)
+
+    divergentes = [
+        nome for nome in ref.columns
+        if not np.allclose(estat[nome].to_numpy(), ref[nome].to_numpy(), rtol=1e-9, equal_nan=True)
+    ]
+    print(json.dumps({
+        "obras": args.obras,
+        "codigos": args.codigos,
+        "pandas_ms": round(t_pandas * 1000, 2),
+        "numpy_ms": round(t_numpy * 1000, 2),
+        "outliers_iqr_ms": round(t_iqr * 1000, 2),
+        "outliers_zscore_ms": round(t_z * 1000, 2),
+        "celulas_outlier_iqr": int(mascara_iqr.sum()),
+        "celulas_outlier_zscore": int(mascara_z.sum()),
+        "estatisticas_divergentes": divergentes,
+    }))
+    if divergentes:
+        raise SystemExit("estatisticas_linhas diverge do pandas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Exportação Excel da matriz EAP: custo por rerun com o workbook gerado a
+cada execução (openpyxl, como antes) x botão com geração adiada (só o token
+de versão por rerun), e a geração em si (openpyxl x xlsxwriter
+constant_memory).
+
+Uso:
+    python -m benchmarks.bench_excel_export [--obras 1000] [--codigos 200] [--repeticoes 3]
+
+Confere que o arquivo do xlsxwriter, relido pelo openpyxl, tem os mesmos
+valores numéricos e textos de matriz_para_excel.
+"""
+
+import argparse
+import io
+import json
+import math
+import time
+import tracemalloc
+
+def _melhor_tempo(funcao, repeticoes):
+    melhor, resultado = None, None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultado
+
+def _pico_memoria_mb(funcao):
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(pico / 2 ** 20, 1)
+
+def _excel_openpyxl(matriz):
+    """Exportação anterior, refeita a cada rerun"""
+    from nucleo.matriz import matriz_para_excel
+    buffer = io.BytesIO()
+    matriz_para_excel(matriz).to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+def _divergencias(matriz, dados):
+    """Células do arquivo gerado que diferem de matriz_para_excel"""
+    import openpyxl
+    from nucleo.matriz import matriz_para_excel
+    esperado = matriz_para_excel(matriz)
+    planilha = openpyxl.load_workbook(io.BytesIO(dados), read_only=True).active
+    linhas = list(planilha.iter_rows(values_only=True))
+    divergencias = []
+    if list(linhas[0]) != [str(c) for c in esperado.columns]:
+        divergencias.append("cabeçalho")
+    for i, (lida, valores) in enumerate(zip(linhas[1:], esperado.itertuples(index=False, name=None))):
+        for j, (obtido, valor) in enumerate(zip(lida, valores)):
+            vazio = valor is None or valor == "" or (not isinstance(valor, str) and math.isnan(valor))
+            if vazio:
+                ok = obtido is None
+            elif isinstance(valor, str):
+                ok = obtido == valor
+            else:
+                ok = isinstance(obtido, (int, float)) and math.isclose(obtido, valor, rel_tol=1e-12)
+            if not ok:
+                divergencias.append((i + 1, j))
+    if len(linhas) - 1 != len(esperado):
+        divergencias.append("nº de linhas")
+    return divergencias
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=1000)
+    parser.add_argument("--codigos", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    from benchmarks.dados_sinteticos import gerar_eaps_compactas, gerar_monday_df, gerar_incc
+    from nucleo.fontes import versao_conteudo
+    from nucleo.matriz import process_eap_matrix, com_estatisticas, versao_matriz
+    from main_interface import excel_matrizes
+
+    eaps = gerar_eaps_compactas(args.obras, args.codigos)
+    matriz = process_eap_matrix(
+        eaps, [doc["sigla"] for doc in eaps], gerar_monday_df(args.obras), gerar_incc()
+    )
+    matriz = com_estatisticas(matriz, ["Média", "Mediana", "Nº obras"])
+    abas = [("Sheet1", matriz)]
+
+    # Por rerun: antes o workbook inteiro; agora só o token usado como chave
+    t_rerun_antes, _ = _melhor_tempo(lambda: _excel_openpyxl(matriz), args.repeticoes)
+    t_rerun_agora, _ = _melhor_tempo(
+        lambda: versao_conteudo(["Sheet1"], [versao_matriz(matriz)], {}), args.repeticoes)
+    # No clique: geração (sem cache) e acerto do cache
+    t_xlsxwriter, dados = _melhor_tempo(lambda: excel_matrizes.__wrapped__("v", abas, {}), args.repeticoes)
+    excel_matrizes("v", abas, {})
+    t_cache, _ = _melhor_tempo(lambda: excel_matrizes("v", abas, {}), args.repeticoes)
+
+    divergencias = _divergencias(matriz, dados)
+    print(json.dumps({
+        "obras": args.obras,
+        "codigos": len(matriz["valores"]),
+        "rerun_com_export_ms": round(t_rerun_antes * 1000, 1),
+        "rerun_export_adiado_ms": round(t_rerun_agora * 1000, 2),
+        "geracao_openpyxl_ms": round(t_rerun_antes * 1000, 1),
+        "geracao_xlsxwriter_ms": round(t_xlsxwriter * 1000, 1),
+        "download_em_cache_ms": round(t_cache * 1000, 2),
+        "pico_openpyxl_mb": _pico_memoria_mb(lambda: _excel_openpyxl(matriz)),
+        "pico_xlsxwriter_mb": _pico_memoria_mb(lambda: excel_matrizes.__wrapped__("v", abas, {})),
+        "divergencias": divergencias[:10],
+    }))
+    if divergencias:
+        raise SystemExit("Excel do xlsxwriter diverge de matriz_para_excel")
+
+if __name__ == "__main__":
+    main()
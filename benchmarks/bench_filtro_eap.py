@@ -0,0 +1,83 @@
+"""
+Micro-benchmark do filtro de itens da EAP: lógica antiga (split por item) x
+verificador compilado de EAPFilterConfig.
+
+Uso:
+    python -m benchmarks.bench_filtro_eap [--codigos 1000000]
+
+Confere também que os dois filtros concordam em todos os códigos gerados.
+"""
+
+import argparse
+import json
+import random
+import time
+
+def _filtro_legado(codEAP):
+    """Filtro fixo 00.001-00.042 como era feito em get_eap_data"""
+    if not codEAP:
+        return True
+    codigo_str = str(codEAP).strip()
+    if '.' in codigo_str:
+        parts = codigo_str.split('.')
+        if len(parts) >= 2:
+            if parts[0] == '00' and len(parts[1]) == 3 and parts[1].isdigit():
+                return 1 <= int(parts[1]) <= 42
+    return False
+
+def gerar_codigos(n, seed=0):
+    """Códigos realistas (muito repetidos) misturados a formatos fora do filtro"""
+    rnd = random.Random(seed)
+    formatos = [
+        lambda: f"00.{rnd.randint(0, 60):03d}",
+        lambda: f"00.{rnd.randint(1, 42):03d}.{rnd.randint(1, 30):03d}",
+        lambda: f"{rnd.randint(0, 20):02d}.{rnd.randint(0, 99):02d}",
+        lambda: f" 00.{rnd.randint(1, 42):03d} ",
+        lambda: f"00.{rnd.randint(1, 42)}",
+        lambda: "",
+        lambda: f"00{rnd.randint(1, 42):03d}",
+    ]
+    pesos = [40, 40, 10, 2, 3, 2, 3]
+    return [rnd.choices(formatos, pesos)[0]() for _ in range(n)]
+
+def _cronometrar(funcao, codigos):
+    inicio = time.perf_counter()
+    resultado = [funcao(c) for c in codigos]
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--codigos", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    from nucleo.config import EAPFilterConfig
+    from nucleo.fontes import compilar_filtro_eap
+
+    codigos = gerar_codigos(args.codigos)
+
+    t_legado, r_legado = _cronometrar(_filtro_legado, codigos)
+
+    inicio = time.perf_counter()
+    permitido = compilar_filtro_eap(EAPFilterConfig.REGRAS, EAPFilterConfig.MANTER_SEM_CODIGO)
+    t_compilacao = time.perf_counter() - inicio
+    t_compilado, r_compilado = _cronometrar(permitido, codigos)
+
+    # Sem memorização: todos os códigos passam pelas regex
+    permitido_frio = compilar_filtro_eap(EAPFilterConfig.REGRAS, EAPFilterConfig.MANTER_SEM_CODIGO).__wrapped__
+    t_frio, r_frio = _cronometrar(permitido_frio, codigos)
+
+    divergencias = sum(a != b for a, b in zip(r_legado, r_compilado)) + sum(a != b for a, b in zip(r_legado, r_frio))
+    print(json.dumps({
+        "codigos": len(codigos),
+        "unicos": len(set(codigos)),
+        "legado_s": round(t_legado, 3),
+        "compilacao_ms": round(t_compilacao * 1000, 3),
+        "compilado_memorizado_s": round(t_compilado, 3),
+        "compilado_sem_memoria_s": round(t_frio, 3),
+        "divergencias": divergencias,
+    }))
+    if divergencias:
+        raise SystemExit("Filtro compilado diverge do filtro legado")
+
+if __name__ == "__main__":
+    main()
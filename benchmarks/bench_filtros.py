@@ -0,0 +1,219 @@
+"""
+Filtros da interface: apply_filters vetorizado x implementação anterior
+(lambdas por linha e conjuntos de índices), em boards sintéticos grandes.
+
+Uso:
+    python -m benchmarks.bench_filtros [--obras 10000] [--casos 20] [--repeticoes 3]
+
+Confere que os dois caminhos retornam as mesmas linhas nos modos E e OU.
+Mede também as listas de opções e apply_filters com versão dos dados, em
+cache (_cache_filtros): a primeira passada pelos casos calcula, as demais
+são acertos do LRU.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.dados_sinteticos import gerar_monday_df
+from nucleo.calculos import clean_and_format
+
+def _apply_filters_legado(df_eaps, filters, siglas_eaps):
+    """apply_filters anterior: lambdas por linha e interseção/união de conjuntos de índices"""
+    filtered_df = df_eaps.copy()
+
+    # Aplicar filtros básicos que sempre se aplicam (independente do modo)
+    if 'Area_Numeric' in filtered_df.columns and filters.get('area_range'):
+        filtered_df = filtered_df[
+            (filtered_df['Area_Numeric'] >= filters['area_range'][0]) & 
+            (filtered_df['Area_Numeric'] <= filters['area_range'][1])
+        ]
+
+    if filters.get('local'):
+        filtered_df = filtered_df[filtered_df['Local'].str.contains(
+            filters['local'], case=False, na=False)]
+
+    if filters.get('modo') == "Qualquer critério (OU/União)":
+        # No modo OR, aplicar filtro de obras primeiro
+        if filters.get('obras') and len(filters['obras']) > 0 and 'Obras' in filtered_df.columns:
+            filtered_df = filtered_df[filtered_df['Obras'].apply(
+                lambda x: clean_and_format(x, tipo="sigla") in filters['obras'])]
+
+        indices_finais = set()
+
+        # Filtro de construtora por substring
+        if filters.get('construtora') and 'Construtora' in filtered_df.columns:
+            mask = filtered_df['Construtora'].astype(str).apply(
+                lambda val: any(str(f).strip().lower() in val.strip().lower() 
+                              for f in filters['construtora'])
+            )
+            indices_finais.update(filtered_df[mask].index)
+
+        # Filtro de arquitetura por substring
+        if filters.get('arquitetura') and 'Arquitetura' in filtered_df.columns:
+            mask = filtered_df['Arquitetura'].astype(str).apply(
+                lambda val: any(str(f).strip().lower() in val.strip().lower() 
+                              for f in filters['arquitetura'])
+            )
+            indices_finais.update(filtered_df[mask].index)
+
+        # Se não há filtros aplicados, retorna todas as obras
+        if not indices_finais:
+            tem_filtros = ((filters.get('construtora') and len(filters['construtora']) > 0) or
+                          (filters.get('arquitetura') and len(filters['arquitetura']) > 0))
+            
+            if tem_filtros:
+                filtered_df = filtered_df.iloc[0:0]  # Retorna vazio se tem filtros mas sem resultado
+        else:
+            filtered_df = filtered_df.loc[list(indices_finais)]
+
+    else:
+        # Modo AND - INTERSEÇÃO REAL: só mostra registros que atendem TODOS os campos preenchidos
+        
+        # Se pelo menos um campo de filtro está preenchido, começar com conjunto vazio e fazer interseção
+        campos_preenchidos = []
+        if filters.get('obras') and len(filters['obras']) > 0:
+            campos_preenchidos.append('obras')
+        if filters.get('construtora') and len(filters['construtora']) > 0:
+            campos_preenchidos.append('construtora')
+        if filters.get('arquitetura') and len(filters['arquitetura']) > 0:
+            campos_preenchidos.append('arquitetura')
+        
+        if campos_preenchidos:
+            # Para modo AND verdadeiro, cada registro deve atender TODOS os campos selecionados
+            indices_and = None
+            
+            # Filtro de obras
+            if 'obras' in campos_preenchidos and 'Obras' in filtered_df.columns:
+                mask_obras = filtered_df['Obras'].apply(
+                    lambda x: clean_and_format(x, tipo="sigla") in filters['obras'])
+                indices_obras = set(filtered_df[mask_obras].index)
+                indices_and = indices_obras if indices_and is None else indices_and.intersection(indices_obras)
+            
+            # Filtro de construtora 
+            if 'construtora' in campos_preenchidos and 'Construtora' in filtered_df.columns:
+                mask_const = filtered_df['Construtora'].astype(str).apply(
+                    lambda val: any(str(f).strip().lower() in val.strip().lower() 
+                                  for f in filters['construtora'])
+                )
+                indices_const = set(filtered_df[mask_const].index)
+                indices_and = indices_const if indices_and is None else indices_and.intersection(indices_const)
+            
+            # Filtro de arquitetura
+            if 'arquitetura' in campos_preenchidos and 'Arquitetura' in filtered_df.columns:
+                mask_arq = filtered_df['Arquitetura'].astype(str).apply(
+                    lambda val: any(str(f).strip().lower() in val.strip().lower() 
+                                  for f in filters['arquitetura'])
+                )
+                indices_arq = set(filtered_df[mask_arq].index)
+                indices_and = indices_arq if indices_and is None else indices_and.intersection(indices_arq)
+            
+            # Aplicar resultado da interseção
+            if indices_and is not None:
+                filtered_df = filtered_df.loc[list(indices_and)] if indices_and else filtered_df.iloc[0:0]
+
+    return filtered_df, True
+
+def gerar_board(n_obras, seed=0):
+    """Board sintético já com as colunas derivadas de _process_monday_dataframe"""
+    from nucleo.fontes import _convert_area, _normalizar_colunas_filtro
+    df = gerar_monday_df(n_obras, seed)
+    df["Area_Numeric"] = df["Area"].apply(_convert_area)
+    return _normalizar_colunas_filtro(df)
+
+def gerar_casos(df, n_casos, seed=0):
+    """Combinações aleatórias de filtros nos dois modos"""
+    rnd = random.Random(seed)
+    siglas = df["Sigla"].tolist()
+    construtoras = sorted(df["Construtora"].unique())
+    arquiteturas = sorted(df["Arquitetura"].unique())
+    locais = sorted(df["Local"].unique())
+    casos = []
+    for i in range(n_casos):
+        casos.append({
+            "modo": "Qualquer critério (OU/União)" if i % 2 else "Todos os critérios (E/Interseção)",
+            "area_range": (0, rnd.randint(2000, 20000)) if rnd.random() < 0.5 else None,
+            "local": rnd.choice(locais) if rnd.random() < 0.3 else None,
+            # Como em create_multiselect_filter: sem escolha, todas as obras
+            "obras": rnd.sample(siglas, rnd.randint(1, len(siglas))) if rnd.random() < 0.5 else siglas,
+            "construtora": rnd.sample(construtoras, rnd.randint(0, 2)),
+            "arquitetura": rnd.sample(arquiteturas, rnd.randint(0, 2)),
+        })
+    return casos
+
+def _cronometrar(funcao, df, casos, repeticoes):
+    melhor, resultados = None, None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = [funcao(df, caso, None)[0] for caso in casos]
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultados
+
+def _cronometrar_cache(df, casos, repeticoes):
+    """apply_filters com versão: primeira passada (calcula) e melhor passada seguinte (acertos)"""
+    from main_interface import apply_filters, _cache_filtros
+    _cache_filtros().limpar()
+    versao = "bench"
+    inicio = time.perf_counter()
+    resultados = [apply_filters(df, caso, None, None, versao)[0] for caso in casos]
+    t_frio = time.perf_counter() - inicio
+    t_quente, _ = _cronometrar(lambda d, c, s: apply_filters(d, c, s, None, versao), df, casos, repeticoes)
+    return t_frio, t_quente, resultados
+
+def _cronometrar_opcoes(df, repeticoes):
+    """Listas de opções de render_filters: recalculadas x em cache por versão"""
+    from main_interface import opcoes_filtros
+    opcoes_filtros("bench", df)
+    tempos = {}
+    for nome, funcao in (("sem_cache", lambda: opcoes_filtros.__wrapped__(None, df)),
+                         ("cache", lambda: opcoes_filtros("bench", df))):
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            duracao = time.perf_counter() - inicio
+            melhor = duracao if melhor is None else min(melhor, duracao)
+        tempos[nome] = melhor
+    return tempos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=10000)
+    parser.add_argument("--casos", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    from main_interface import apply_filters
+
+    df = gerar_board(args.obras)
+    casos = gerar_casos(df, args.casos)
+
+    t_legado, r_legado = _cronometrar(_apply_filters_legado, df, casos, args.repeticoes)
+    t_novo, r_novo = _cronometrar(apply_filters, df, casos, args.repeticoes)
+    t_frio, t_quente, r_cache = _cronometrar_cache(df, casos, args.repeticoes)
+    t_opcoes = _cronometrar_opcoes(df, args.repeticoes)
+
+    # A implementação anterior devolvia as linhas na ordem de um set; compara o conjunto
+    divergencias = [
+        i for i, (a, b) in enumerate(zip(r_legado, r_novo))
+        if not a.sort_index().equals(b.sort_index())
+    ] + [i for i, (a, b) in enumerate(zip(r_novo, r_cache)) if not a.equals(b)]
+    print(json.dumps({
+        "obras": args.obras,
+        "casos": len(casos),
+        "linhas_retornadas": sum(len(r) for r in r_novo),
+        "legado_ms_por_caso": round(t_legado / len(casos) * 1000, 2),
+        "vetorizado_ms_por_caso": round(t_novo / len(casos) * 1000, 2),
+        "cache_primeira_ms_por_caso": round(t_frio / len(casos) * 1000, 2),
+        "cache_acerto_ms_por_caso": round(t_quente / len(casos) * 1000, 2),
+        "opcoes_sem_cache_ms": round(t_opcoes["sem_cache"] * 1000, 2),
+        "opcoes_cache_ms": round(t_opcoes["cache"] * 1000, 2),
+        "divergencias": divergencias,
+    }))
+    if divergencias:
+        raise SystemExit("apply_filters diverge da implementação anterior")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Importação do núcleo de cálculo (nucleo) e da interface Streamlit: tempo
+em um processo novo, que é o que paga cada script, worker, teste e cada
+início a frio da aplicação.
+
+Uso:
+    python -m benchmarks.bench_importacao [--repeticoes 5] [--orcamento-nucleo-ms 500] [--orcamento-interface-ms 1000]
+
+Falha (código de saída 1) quando a mediana passa do orçamento ou quando um
+módulo carregado só por uma funcionalidade aparece na importação: o núcleo
+não traz streamlit, pymongo, requests, bs4 nem xlsxwriter, e a interface
+só importa o driver do MongoDB, o cliente HTTP, o coletor do INCC, o Excel e
+o botão de cópia quando eles são usados. Com -X importtime lista também o
+tempo de importação de cada módulo do próprio projeto (código executado na
+importação).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos padrão (mediana, ms): cerca do dobro do medido em uma máquina de 1 CPU
+ORCAMENTO_NUCLEO_MS = 500
+ORCAMENTO_INTERFACE_MS = 1000
+
+ALVOS = {
+    "nucleo": ("import nucleo.config, nucleo.fontes, nucleo.matriz, nucleo.busca, nucleo.filtros",
+               ("streamlit", "pymongo", "requests", "bs4", "xlsxwriter")),
+    "main_interface": ("import main_interface",
+                       ("pymongo", "bson", "requests", "bs4", "xlsxwriter", "openpyxl", "st_copy")),
+}
+
+# Módulos do projeto cujo tempo próprio de importação é listado
+MODULOS_PROJETO = ("nucleo", "config_utils", "data_services", "main_interface", "relatorio_eap")
+
+def _medir(codigo, proibidos, ambiente):
+    """
+    Tempo (s) de ``codigo`` em um interpretador novo, os ``proibidos`` que
+    ele carregou e o tempo próprio (ms) de cada módulo do projeto segundo
+    -X importtime
+    """
+    script = (
+        "import sys, time\n"
+        "inicio = time.perf_counter()\n"
+        f"{codigo}\n"
+        "duracao = time.perf_counter() - inicio\n"
+        f"print(duracao, ','.join(m for m in {proibidos!r} if m in sys.modules))\n"
+    )
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True,
+    )
+    saida = processo.stdout.split()
+    proprio = {}
+    for linha in processo.stderr.splitlines():
+        # "import time: <próprio us> | <acumulado us> | <módulo>"
+        partes = linha.split("|")
+        if not linha.startswith("import time:") or len(partes) != 3:
+            continue
+        modulo = partes[2].strip()
+        if modulo.split(".")[0] in MODULOS_PROJETO:
+            proprio[modulo] = int(partes[0].split(":")[1]) / 1000
+    return float(saida[0]), saida[1].split(",") if len(saida) > 1 else [], proprio
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--orcamento-nucleo-ms", type=float, default=ORCAMENTO_NUCLEO_MS)
+    parser.add_argument("--orcamento-interface-ms", type=float, default=ORCAMENTO_INTERFACE_MS)
+    args = parser.parse_args()
+    orcamentos = {"nucleo": args.orcamento_nucleo_ms, "main_interface": args.orcamento_interface_ms}
+
+    # Sem credenciais: nenhum dos dois deve precisar delas para ser importado
+    ambiente = {k: v for k, v in os.environ.items() if k not in ("MONGO_URI", "MONDAY_API_KEY")}
+
+    resultados, falhas = {}, []
+    for nome, (codigo, proibidos) in ALVOS.items():
+        # A primeira execução compila os .pyc e aquece o cache de disco
+        _medir(codigo, proibidos, ambiente)
+        medicoes = [_medir(codigo, proibidos, ambiente) for _ in range(args.repeticoes)]
+        mediana = statistics.median(duracao for duracao, _, _ in medicoes) * 1000
+        carregados = medicoes[-1][1]
+        proprio = medicoes[-1][2]
+        resultados[nome] = {
+            "mediana_ms": round(mediana, 1),
+            "orcamento_ms": orcamentos[nome],
+            "modulos_fora_de_hora": carregados,
+            "projeto_proprio_ms": {m: round(t, 1) for m, t in sorted(proprio.items(), key=lambda mt: -mt[1])[:8]},
+        }
+        if mediana > orcamentos[nome]:
+            falhas.append(f"{nome}: {mediana:.0f} ms > orçamento de {orcamentos[nome]:.0f} ms")
+        if carregados:
+            falhas.append(f"{nome}: importou {', '.join(carregados)}")
+
+    resultados["falhas"] = falhas
+    print(json.dumps(resultados, ensure_ascii=False))
+    if falhas:
+        raise SystemExit("Inicialização fora do orçamento: " + "; ".join(falhas))
+
+if __name__ == "__main__":
+    main()
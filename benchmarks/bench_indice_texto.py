@@ -0,0 +1,95 @@
+"""
+Busca por substring nos campos de texto do Monday: IndiceTrigramas x
+varredura linear da coluna normalizada, em boards sintéticos grandes.
+
+Uso:
+    python -m benchmarks.bench_indice_texto [--obras 200000] [--consultas 200]
+
+Confere que os dois caminhos devolvem as mesmas linhas para todas as
+consultas, inclusive as que diferem só em acentos ("SÃO" x "sao").
+"""
+
+import argparse
+import json
+import random
+import time
+
+RUAS = ["Rua das Flores", "Avenida Paulista", "Rua São Bento", "Alameda Santos", "Rua Augusta",
+        "Avenida Brigadeiro Faria Lima", "Rua Oscar Freire", "Praça da Sé", "Rua Conceição", "Travessa do Comércio"]
+CIDADES = ["São Paulo", "Campinas", "Santos", "Rio de Janeiro", "Belo Horizonte", "Curitiba",
+           "Florianópolis", "Goiânia", "Ribeirão Preto", "São José dos Campos"]
+EMPRESAS = ["Construtora", "Engenharia", "Incorporadora", "Empreendimentos", "Obras"]
+NOMES = ["Alfa", "Beta", "Gama", "Delta", "Ômega", "Sigma", "Atlântico", "Horizonte", "Paraná", "Itaú"]
+
+def gerar_textos(n_obras, seed=0):
+    """Colunas de texto com muitos valores distintos (endereços) e repetidos (empresas)"""
+    rnd = random.Random(seed)
+    locais = [f"{rnd.choice(RUAS)}, {rnd.randint(1, 3000)} - {rnd.choice(CIDADES)}" for _ in range(n_obras)]
+    construtoras = [f"{rnd.choice(EMPRESAS)} {rnd.choice(NOMES)} {rnd.randint(1, 400)}" for _ in range(n_obras)]
+    return {"Local": locais, "Construtora": construtoras}
+
+def gerar_consultas(textos, n_consultas, seed=0):
+    """Substrings dos próprios valores, variações de caixa e acento, consultas curtas e ausentes"""
+    rnd = random.Random(seed)
+    fixas = ["SÃO", "sao", "SAO PAULO", "são josé", "goiania", "OMEGA", "Ômega 12", "pr", "xyzw"]
+    consultas = []
+    for _ in range(max(0, n_consultas - len(fixas))):
+        valor = rnd.choice(textos)
+        inicio = rnd.randint(0, max(0, len(valor) - 3))
+        trecho = valor[inicio:inicio + rnd.randint(3, 12)]
+        consultas.append(trecho.upper() if rnd.random() < 0.3 else trecho)
+    return fixas + consultas
+
+def _melhor_tempo(funcao, repeticoes):
+    melhor, resultado = None, None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultado
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=200000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+    from nucleo.fontes import _normalizar_colunas_filtro, normalizar_texto_busca
+    from nucleo.filtros import indices_filtro, mascara_substring
+
+    colunas = gerar_textos(args.obras)
+    df = _normalizar_colunas_filtro(pd.DataFrame({"Obras": [f"OB{i:06d} - Obra" for i in range(args.obras)], **colunas}))
+
+    t_construcao, indices = _melhor_tempo(lambda: indices_filtro(df), args.repeticoes)
+    resultado = {"obras": args.obras, "indices_construcao_ms": round(t_construcao * 1000, 1)}
+    divergencias = []
+    for campo, textos in colunas.items():
+        consultas = gerar_consultas(textos, args.consultas)
+        # Varredura linear: a coluna normalizada como texto comum, linha a linha
+        linear = df[f"{campo}_Norm"].astype(object)
+
+        t_linear, r_linear = _melhor_tempo(lambda: [
+            linear.str.contains(normalizar_texto_busca(c), regex=False).to_numpy() for c in consultas
+        ], args.repeticoes)
+        t_indice, r_indice = _melhor_tempo(lambda: [
+            mascara_substring(df, campo, [c], indices[campo]) for c in consultas
+        ], args.repeticoes)
+
+        divergencias += [(campo, c) for c, a, b in zip(consultas, r_linear, r_indice) if not (a == b).all()]
+        resultado[campo] = {
+            "valores_distintos": len(indices[campo]),
+            "linear_ms_por_consulta": round(t_linear / len(consultas) * 1000, 3),
+            "indice_ms_por_consulta": round(t_indice / len(consultas) * 1000, 3),
+            "linhas_sao": int(r_indice[0].sum()),
+        }
+
+    resultado["divergencias"] = divergencias
+    print(json.dumps(resultado, ensure_ascii=False))
+    if divergencias:
+        raise SystemExit("IndiceTrigramas diverge da varredura linear")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Matriz EAP: conferência com as saídas registradas (golden) e tempo de
+process_eap_matrix em escala.
+
+Uso:
+    python -m benchmarks.bench_matriz_eap [--obras 200] [--codigos 42] [--repeticoes 5]
+
+As saídas em fixtures/matriz_eap_golden.json foram registradas com a
+implementação anterior (laços por documento, código e obra), exceto as dos
+casos com ``nota``: neles a versão vetorizada muda a saída de propósito e a
+nota descreve o que a implementação anterior fazia. Esses casos podem trazer
+EAPs e linhas do Monday próprias (``eaps_adicionais``, ``monday_adicional``),
+somadas às comuns.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.dados_sinteticos import gerar_eaps_compactas, gerar_monday_df, gerar_incc
+
+FIXTURE_GOLDEN = os.path.join(os.path.dirname(__file__), "fixtures", "matriz_eap_golden.json")
+
+def conferir_golden(process_eap_matrix):
+    """
+    Compara a saída atual, depois da formatação de exibição, com cada caso
+    registrado; retorna a lista de divergências
+    """
+    import pandas as pd
+    from nucleo.matriz import formatar_matriz_exibicao, simular_area
+    with open(FIXTURE_GOLDEN, encoding="utf-8") as f:
+        golden = json.load(f)
+    def _eaps(docs):
+        return [{**doc, "itens": [tuple(item) for item in doc["itens"]]} for doc in docs]
+    eaps = _eaps(golden["eaps"])
+    monday_df = pd.DataFrame(golden["monday"])
+    incc_df = pd.DataFrame({"data": pd.to_datetime(golden["incc"]["data"]), "indice": golden["incc"]["indice"]})
+
+    divergencias = []
+    for caso in golden["casos"]:
+        eaps_caso = eaps + _eaps(caso.get("eaps_adicionais", []))
+        monday_caso = monday_df
+        if "monday_adicional" in caso:
+            monday_caso = pd.concat([monday_df, pd.DataFrame(caso["monday_adicional"])], ignore_index=True)
+        matriz = process_eap_matrix(eaps_caso, caso["selected_obras"], monday_caso, incc_df)
+        matriz = simular_area(matriz, caso["area_simulada_val"])
+        obtido = formatar_matriz_exibicao(matriz).to_dict("records")
+        if obtido != caso["matriz_final"]:
+            divergencias.append(caso["selected_obras"])
+    return divergencias
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=200)
+    parser.add_argument("--codigos", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    # O núcleo, sem o st.cache_data da interface, para medir o cálculo
+    from nucleo.matriz import process_eap_matrix as calcular, formatar_matriz_exibicao, simular_area, simular_areas
+
+    divergencias = conferir_golden(calcular)
+
+    eaps = gerar_eaps_compactas(args.obras, args.codigos)
+    monday_df = gerar_monday_df(args.obras)
+    incc_df = gerar_incc()
+    selecionadas = [doc["sigla"] for doc in eaps]
+
+    tempos, tempos_formatacao = [], []
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        matriz = calcular(eaps, selecionadas, monday_df, incc_df)
+        tempos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        formatar_matriz_exibicao(matriz)
+        tempos_formatacao.append(time.perf_counter() - inicio)
+
+    # Cache por coluna: com versões das fontes, trocar uma obra da seleção só
+    # calcula a coluna nova (as demais vêm do cache de _cache_colunas_eap)
+    versoes = ("bench-eaps", "bench-monday", "bench-incc", "bench-data")
+    inicio = time.perf_counter()
+    calcular(eaps, selecionadas[:-1], monday_df, incc_df, versoes_fontes=versoes)
+    t_cache_frio = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    calcular(eaps, selecionadas, monday_df, incc_df, versoes_fontes=versoes)
+    t_troca = time.perf_counter() - inicio
+
+    # Simulação de área: reescalonamento da matriz unitária já calculada
+    inicio = time.perf_counter()
+    simular_area(matriz, 250.0)
+    t_simulacao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    simular_areas(matriz, [300.0, 500.0, 800.0, 1200.0])
+    t_cenarios = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "obras": args.obras,
+        "codigos": args.codigos,
+        "linhas": len(matriz["valores"]),
+        "melhor_ms": round(min(tempos) * 1000, 2),
+        "mediana_ms": round(sorted(tempos)[len(tempos) // 2] * 1000, 2),
+        "formatacao_ms": round(min(tempos_formatacao) * 1000, 2),
+        "colunas_cache_frio_ms": round(t_cache_frio * 1000, 2),
+        "troca_uma_obra_ms": round(t_troca * 1000, 2),
+        "simular_area_ms": round(t_simulacao * 1000, 2),
+        "simular_4_areas_ms": round(t_cenarios * 1000, 2),
+        "golden_divergencias": divergencias,
+    }))
+    if divergencias:
+        raise SystemExit("process_eap_matrix diverge das saídas registradas")
+
+if __name__ == "__main__":
+    main()
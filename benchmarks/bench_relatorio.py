@@ -0,0 +1,62 @@
+"""
+Relatório completo em segundo plano (GeradorRelatorios): tempo em que a
+thread da página fica ocupada ao pedir o relatório, tempo até o arquivo
+ficar pronto e novo pedido do mesmo relatório (arquivo já em disco).
+
+Uso:
+    python -m benchmarks.bench_relatorio [--obras 500] [--codigos 42]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=500)
+    parser.add_argument("--codigos", type=int, default=42)
+    args = parser.parse_args()
+
+    from benchmarks.dados_sinteticos import gerar_eaps_compactas, gerar_monday_df, gerar_incc
+    from nucleo.matriz import process_eap_matrix, base_eaps, abas_relatorio, versao_matriz
+    from relatorio_eap import GeradorRelatorios
+
+    eaps = gerar_eaps_compactas(args.obras, args.codigos)
+    monday_df = gerar_monday_df(args.obras)
+    incc_df = gerar_incc()
+    matriz = process_eap_matrix(eaps, [doc["sigla"] for doc in eaps], monday_df, incc_df)
+    base = base_eaps(eaps)
+    chave = versao_matriz(matriz)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerador = GeradorRelatorios(diretorio)
+        progresso = []
+        inicio = time.perf_counter()
+        trabalho = gerador.solicitar(chave, lambda: abas_relatorio(matriz, base, monday_df, incc_df, {}))
+        t_pedido = time.perf_counter() - inicio
+        while not trabalho.concluido and trabalho.erro is None:
+            progresso.append(round(trabalho.progresso, 2))
+            time.sleep(0.05)
+        t_pronto = time.perf_counter() - inicio
+
+        # Outro processo (gerador novo) pedindo o mesmo relatório: servido do disco
+        inicio = time.perf_counter()
+        repetido = GeradorRelatorios(diretorio).solicitar(chave, lambda: [])
+        t_repetido = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "obras": args.obras,
+        "codigos": args.codigos,
+        "pedido_ms": round(t_pedido * 1000, 2),
+        "pronto_s": round(t_pronto, 2),
+        "leituras_de_progresso": len(set(progresso)),
+        "repetido_ms": round(t_repetido * 1000, 2),
+        "repetido_concluido": repetido.concluido,
+        "erro": trabalho.erro,
+    }))
+    if trabalho.erro or not repetido.concluido:
+        raise SystemExit("Relatório não foi gerado")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Relatórios em lote (relatorios_lote.py): relatórios por segundo com um
+processo e com vários, a partir de uma fixture gravada (sem rede).
+
+Uso:
+    python -m benchmarks.bench_relatorios_lote [--obras 2000] [--construtoras 60] [--locais 40] [--processos 4]
+
+Confere a matriz de alguns grupos contra process_eap_matrix com as mesmas obras.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=2000)
+    parser.add_argument("--codigos", type=int, default=42)
+    parser.add_argument("--construtoras", type=int, default=60)
+    parser.add_argument("--locais", type=int, default=40)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--formatos", nargs="+", default=["xlsx", "csv"])
+    args = parser.parse_args()
+
+    import numpy as np
+    from benchmarks.dados_sinteticos import gerar_eaps_compactas, gerar_monday_df, gerar_incc
+    from nucleo.matriz import process_eap_matrix
+    import relatorios_lote
+
+    rnd = random.Random(0)
+    eaps = gerar_eaps_compactas(args.obras, args.codigos)
+    monday_df = gerar_monday_df(args.obras)
+    monday_df["Construtora"] = [f"Construtora {rnd.randrange(args.construtoras)}" for _ in range(args.obras)]
+    monday_df["Local"] = [f"Cidade {rnd.randrange(args.locais)}" for _ in range(args.obras)]
+
+    resultados = {"obras": args.obras, "codigos": args.codigos}
+    with tempfile.TemporaryDirectory() as diretorio:
+        fixture = os.path.join(diretorio, "fontes.json")
+        relatorios_lote.gravar_fixture(fixture, eaps, monday_df, gerar_incc())
+        eaps, monday_df, incc_df = relatorios_lote.carregar_fixture(fixture)
+
+        for processos in sorted({1, args.processos}):
+            resumo = relatorios_lote.gerar_relatorios(
+                eaps, monday_df, incc_df, os.path.join(diretorio, f"saida_{processos}"),
+                formatos=args.formatos, processos=processos,
+            )
+            resultados[f"relatorios_por_s_{processos}p"] = resumo["relatorios_por_s"]
+            resultados["relatorios"] = resumo["relatorios"]
+
+        # Com processos=1 o estado do processo de trabalho ficou neste processo
+        divergencias = []
+        for campo, grupo, _, siglas in relatorios_lote.planejar_relatorios(eaps, monday_df, ["Construtora", "Local"])[::25]:
+            obtido = relatorios_lote.matriz_grupo(siglas)["valores"]
+            esperado = process_eap_matrix(eaps, siglas, monday_df, incc_df)["valores"]
+            if not (obtido.index.equals(esperado.index) and np.allclose(obtido, esperado, equal_nan=True)):
+                divergencias.append(grupo)
+
+    resultados["divergencias"] = divergencias
+    print(json.dumps(resultados, ensure_ascii=False))
+    if divergencias:
+        raise SystemExit("Matriz em lote diverge de process_eap_matrix")
+
+if __name__ == "__main__":
+    main()
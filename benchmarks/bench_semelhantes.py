@@ -0,0 +1,97 @@
+"""
+Obras semelhantes (IndiceSimilaridade): construção do índice e tempo por
+consulta em boards sintéticos grandes.
+
+Uso:
+    python -m benchmarks.bench_semelhantes [--obras 10000] [--codigos 42] [--consultas 200]
+
+Confere os vizinhos de algumas obras contra um cálculo direto, obra a obra,
+da mesma distância.
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+
+def gerar_dados(n_obras, n_codigos, seed=0):
+    """Board sintético (área, local, arquitetura, construtora) e perfis de custo por código"""
+    import numpy as np
+    from benchmarks.dados_sinteticos import gerar_monday_df
+    from nucleo.fontes import _convert_area, _normalizar_colunas_filtro, COLUNAS_FILTRO_TEXTO
+    board = gerar_monday_df(n_obras, seed)
+    board["Area_Numeric"] = board["Area"].apply(_convert_area)
+    board = _normalizar_colunas_filtro(board)
+    rng = np.random.default_rng(seed)
+    perfis = rng.lognormal(mean=5, sigma=0.5, size=(n_obras, n_codigos))
+    perfis[rng.random(perfis.shape) < 0.2] = np.nan
+    categorias = {c: board[f"{c}_Norm"].astype(object).to_numpy() for c in COLUNAS_FILTRO_TEXTO}
+    return board["Sigla"].astype(str).tolist(), board["Area_Numeric"].to_numpy(dtype=float), categorias, perfis
+
+def _distancia_direta(i, j, areas, categorias, perfis, pesos):
+    """Mesma distância de IndiceSimilaridade, calculada com laços sobre uma única obra"""
+    import numpy as np
+    log_areas = np.log(areas)
+    area = (log_areas[i] - log_areas[j]) / np.std(log_areas)
+    total = pesos["Area"] * area ** 2
+    log_perfis = np.log1p(perfis)
+    n_codigos = perfis.shape[1]
+    for c in range(n_codigos):
+        coluna = log_perfis[:, c]
+        mediana = np.nanmedian(coluna)
+        preenchida = np.where(np.isnan(coluna), mediana, coluna)
+        desvio = preenchida.std() or 1.0
+        total += pesos["EAP"] * ((preenchida[i] - preenchida[j]) / desvio) ** 2 / n_codigos
+    for campo, valores in categorias.items():
+        if valores[i] == "" or valores[i] != valores[j]:
+            total += pesos[campo]
+    return math.sqrt(total)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--obras", type=int, default=10000)
+    parser.add_argument("--codigos", type=int, default=42)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    from nucleo.busca import IndiceSimilaridade, PESOS_SIMILARIDADE
+
+    siglas, areas, categorias, perfis = gerar_dados(args.obras, args.codigos)
+    inicio = time.perf_counter()
+    indice = IndiceSimilaridade(siglas, areas, categorias, perfis)
+    t_construcao = time.perf_counter() - inicio
+
+    rnd = random.Random(0)
+    referencias = [rnd.choice(siglas) for _ in range(args.consultas)]
+    tempos = []
+    for sigla in referencias:
+        inicio = time.perf_counter()
+        indice.vizinhos(sigla, args.k)
+        tempos.append(time.perf_counter() - inicio)
+
+    divergencias = []
+    for sigla in referencias[:3]:
+        i = siglas.index(sigla)
+        for vizinho, distancia in indice.vizinhos(sigla, args.k):
+            direta = _distancia_direta(i, siglas.index(vizinho), areas, categorias, perfis, PESOS_SIMILARIDADE)
+            if not math.isclose(distancia, direta, rel_tol=1e-6, abs_tol=1e-9):
+                divergencias.append((sigla, vizinho, distancia, direta))
+
+    tempos.sort()
+    print(json.dumps({
+        "obras": args.obras,
+        "codigos": args.codigos,
+        "construcao_ms": round(t_construcao * 1000, 1),
+        "mediana_ms": round(statistics.median(tempos) * 1000, 3),
+        "p95_ms": round(tempos[int(len(tempos) * 0.95)] * 1000, 3),
+        "max_ms": round(tempos[-1] * 1000, 3),
+        "divergencias": divergencias,
+    }))
+    if divergencias:
+        raise SystemExit("IndiceSimilaridade diverge do cálculo direto")
+
+if __name__ == "__main__":
+    main()
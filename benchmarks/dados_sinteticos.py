@@ -0,0 +1,170 @@
+"""
+Geradores de dados sintéticos para os benchmarks (EAPs, projetos, board do
+Monday e série INCC)
+"""
+
+import random
+from bson import ObjectId
+
+def gerar_projetos(n_projetos, seed=0):
+    """Gera documentos da coleção de projetos com siglas únicas"""
+    rnd = random.Random(seed)
+    return [
+        {"_id": ObjectId(), "sigla": f"OB{i:04d}", "nome": f"Obra {i} {rnd.choice(['Residencial', 'Comercial'])}"}
+        for i in range(n_projetos)
+    ]
+
+def gerar_itens_eap(n_itens, rnd):
+    """Gera itens de uma EAP: códigos 00.001-00.042 (nível 1), subníveis e códigos fora do filtro"""
+    itens = []
+    for i in range(n_itens):
+        grupo = i % 42 + 1
+        tipo = rnd.random()
+        if i < 42 or tipo < 0.4:
+            cod, nivel = f"00.{grupo:03d}", 1
+        elif tipo < 0.8:
+            cod, nivel = f"00.{grupo:03d}.{rnd.randint(1, 30):03d}", 2
+        else:
+            cod, nivel = f"{rnd.randint(1, 20):02d}.{rnd.randint(1, 99):02d}", 1
+        itens.append({
+            "codEAP": cod,
+            "descricao": f"Item {cod} descrição do serviço",
+            "nivel": nivel,
+            "preco": f"{rnd.uniform(10, 5000):.2f}".replace(".", ","),
+            "unidade": "m²",
+            "quantidade": rnd.uniform(1, 1000),
+            "observacao": "x" * rnd.randint(20, 200),
+        })
+    return itens
+
+def gerar_eap(projeto, n_itens, rnd):
+    """Gera um documento de EAP para o projeto"""
+    return {
+        "_id": ObjectId(),
+        "projeto_id": projeto["_id"],
+        "dataBase": f"20{rnd.randint(18, 24)}-{rnd.randint(1, 12):02d}-01T00:00:00",
+        "itens": gerar_itens_eap(n_itens, rnd),
+        "historico": [{"usuario": "sintetico", "acao": "import"} for _ in range(10)],
+    }
+
+def _aplicar_projecao(doc, projecao):
+    """Aplica uma projeção simples ({campo: 1, "itens.campo": 1}) como o servidor faria"""
+    if not projecao:
+        return doc
+    campos = {k for k in projecao if "." not in k}
+    campos_itens = {k.split(".", 1)[1] for k in projecao if k.startswith("itens.")}
+    saida = {k: v for k, v in doc.items() if k in campos or k == "_id"}
+    if campos_itens:
+        saida["itens"] = [{k: v for k, v in item.items() if k in campos_itens} for item in doc.get("itens", [])]
+    return saida
+
+class CursorSintetico:
+    """Cursor que gera os documentos sob demanda, como um cursor real do MongoDB"""
+
+    def __init__(self, colecao, projecao=None):
+        self._colecao = colecao
+        self._projecao = projecao
+
+    def batch_size(self, n):
+        return self
+
+    def __iter__(self):
+        rnd = random.Random(self._colecao.seed)
+        for i in range(self._colecao.n_docs):
+            projeto = self._colecao.projetos[i % len(self._colecao.projetos)]
+            yield _aplicar_projecao(gerar_eap(projeto, self._colecao.itens_por_doc, rnd), self._projecao)
+
+class ColecaoEapsSintetica:
+    """Coleção de EAPs gerada de forma determinística e nunca mantida em memória"""
+
+    def __init__(self, projetos, n_docs, itens_por_doc, seed=0):
+        self.projetos = projetos
+        self.n_docs = n_docs
+        self.itens_por_doc = itens_por_doc
+        self.seed = seed
+
+    def find(self, filtro=None, projecao=None):
+        return CursorSintetico(self, projecao)
+
+class ColecaoProjetosSintetica:
+    """Coleção de projetos em memória"""
+
+    def __init__(self, projetos):
+        self.projetos = projetos
+
+    def find(self, filtro=None, projecao=None):
+        return iter(_aplicar_projecao(p, projecao) for p in self.projetos)
+
+def gerar_eaps_compactas(n_obras, n_codigos=42, seed=0):
+    """EAPs já na forma compacta de get_eap_data: uma por obra, n_codigos de nível 1"""
+    rnd = random.Random(seed)
+    eaps = []
+    for i in range(n_obras):
+        itens = []
+        for c in range(1, n_codigos + 1):
+            cod = f"00.{c:03d}"
+            if rnd.random() < 0.9:
+                preco = f"{rnd.uniform(5, 9000):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+                itens.append((cod, f"Item {cod} Serviço {c}", 1, preco))
+        eaps.append({
+            "projeto_id": None,
+            "sigla": f"OB{i:04d}",
+            "dataBase": f"20{rnd.randint(18, 24)}-{rnd.randint(1, 12):02d}-01",
+            "itens": itens,
+        })
+    return eaps
+
+def popular_colecoes(banco, n_projetos, itens_por_eap, revisoes=2, seed=0, ids_mistos=False):
+    """
+    Grava ``n_projetos`` projetos e ``revisoes`` EAPs por projeto nas coleções
+    ``projetos`` e ``eaps`` de ``banco`` (um mongod local ou o mongomock).
+    Com ``ids_mistos``, as revisões ímpares gravam projeto_id como texto.
+    """
+    rnd = random.Random(seed)
+    projetos = gerar_projetos(n_projetos, seed)
+    banco.projetos.insert_many(projetos)
+    for revisao in range(revisoes):
+        eaps = [gerar_eap(projeto, itens_por_eap, rnd) for projeto in projetos]
+        if ids_mistos and revisao % 2:
+            for eap in eaps:
+                eap["projeto_id"] = str(eap["projeto_id"])
+        banco.eaps.insert_many(eaps)
+    return projetos
+
+def gerar_board_monday(n_obras, seed=0):
+    """Board do Monday como chega da API (antes de _process_monday_dataframe), com n_obras"""
+    import pandas as pd
+    rnd = random.Random(seed)
+    inicios = [f"20{rnd.randint(18, 24)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" for _ in range(n_obras)]
+    return pd.DataFrame({
+        "id": [str(1000000 + i) for i in range(n_obras)],
+        "name": [f"OB{i:04d} - Obra {i}" for i in range(n_obras)],
+        "Status": [rnd.choice(["Em andamento", "Concluída", ""]) for _ in range(n_obras)],
+        "Construtora": [rnd.choice(["Alfa", "Beta Engenharia", "Gama", "Delta Construções"]) for _ in range(n_obras)],
+        "Área (m²)": [f"{rnd.randint(80, 20000):,}".replace(",", ".") if rnd.random() < 0.95 else "" for _ in range(n_obras)],
+        "Local da obra": [rnd.choice(["São Paulo", "Campinas", "Santos", "Rio de Janeiro"]) for _ in range(n_obras)],
+        "Arquitetura": [rnd.choice(["Estúdio A", "Arq B", "Projeto C"]) for _ in range(n_obras)],
+        "Timeline": [f"{inicio} - 20{rnd.randint(25, 28)}-06-30" for inicio in inicios],
+    })
+
+def gerar_monday_df(n_obras, seed=0):
+    """Board do Monday já mapeado (como _process_monday_dataframe) com n_obras"""
+    import pandas as pd
+    rnd = random.Random(seed)
+    return pd.DataFrame({
+        "Obras": [f"OB{i:04d} - Obra {i}" for i in range(n_obras)],
+        "Construtora": [rnd.choice(["Alfa", "Beta Engenharia", "Gama", "Delta Construções"]) for _ in range(n_obras)],
+        "Area": [f"{rnd.randint(80, 20000):,}".replace(",", ".") for _ in range(n_obras)],
+        "Local": [rnd.choice(["São Paulo", "Campinas", "Santos", "Rio de Janeiro"]) for _ in range(n_obras)],
+        "Arquitetura": [rnd.choice(["Estúdio A", "Arq B", "Projeto C"]) for _ in range(n_obras)],
+    })
+
+def gerar_incc(inicio="2015-01-01", meses=120, seed=0):
+    """Série mensal do INCC com crescimento aleatório"""
+    import pandas as pd
+    rnd = random.Random(seed)
+    indice, valores = 600.0, []
+    for _ in range(meses):
+        indice *= 1 + rnd.uniform(0, 0.01)
+        valores.append(round(indice, 3))
+    return pd.DataFrame({"data": pd.date_range(inicio, periods=meses, freq="MS"), "indice": valores})
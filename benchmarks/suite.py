@@ -0,0 +1,211 @@
+"""
+Suíte de benchmarks com dados sintéticos: carregadores, filtros e motor da
+matriz em várias escalas, com resultados em JSON comparáveis entre commits.
+
+Uso:
+    python -m benchmarks.suite [--escalas pequena media grande] [--repeticoes 5] [--saida resultados.json]
+    python -m benchmarks.suite --comparar antes.json              # roda e compara com antes.json
+    python -m benchmarks.suite --comparar antes.json depois.json  # só compara os dois arquivos
+
+Casos (mesmas funções usadas pela aplicação, sem o cache do Streamlit):
+- fontes.process_monday: _process_monday_dataframe sobre o board como vem da API
+- fontes.carregar_eaps: carregamento das EAPs vigentes de get_eap_data, em um
+  mongod local (--mongo-uri) ou no mongomock (MongoDB em memória)
+- filtros.apply_filters_e / _ou: nucleo.filtros.aplicar_filtros com combinações
+  de filtros nos modos "Todos os critérios" e "Qualquer critério", com os
+  índices de trigramas
+- matriz.process_eap_matrix: matriz com todas as obras selecionadas
+- calculos.calcular_valor_m2: uma chamada por obra
+
+Sem --saida o JSON vai para benchmarks/resultados/<commit>.json. A
+comparação lista a razão depois/antes das medianas e termina com código 1
+quando algum caso fica mais lento que --tolerancia; compare resultados da
+mesma máquina, de preferência sem outra carga rodando.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTADOS_DIR = os.path.join(RAIZ, "benchmarks", "resultados")
+
+# obras: board e matriz; projetos x itens_por_eap x revisoes: coleção de EAPs
+ESCALAS = {
+    "pequena": {"obras": 100, "projetos": 50, "itens_por_eap": 50, "revisoes": 2},
+    "media": {"obras": 1000, "projetos": 200, "itens_por_eap": 100, "revisoes": 2},
+    "grande": {"obras": 10000, "projetos": 1000, "itens_por_eap": 100, "revisoes": 2},
+}
+
+# Combinações de filtros por modo em cada medição de aplicar_filtros
+CASOS_FILTRO = 10
+
+def _cronometrar(funcao, repeticoes):
+    """Mediana e melhor tempo (ms) de ``funcao`` em ``repeticoes`` execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {"mediana_ms": round(statistics.median(tempos) * 1000, 3), "melhor_ms": round(min(tempos) * 1000, 3)}
+
+def _caso_process_monday(escala, repeticoes, args):
+    from benchmarks.dados_sinteticos import gerar_board_monday
+    from nucleo.fontes import _process_monday_dataframe
+    board = gerar_board_monday(escala["obras"])
+    medicao = _cronometrar(lambda: _process_monday_dataframe(board), repeticoes)
+    return {"fontes.process_monday": {**medicao, "obras": escala["obras"]}}
+
+def _banco_mongo(args):
+    """Banco vazio para o caso carregar_eaps: um mongod de --mongo-uri ou o mongomock"""
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        cliente = MongoClient(args.mongo_uri)
+        cliente.drop_database("bench_suite")
+        return cliente["bench_suite"], "mongod"
+    try:
+        import mongomock
+    except ImportError:
+        return None, None
+    return mongomock.MongoClient()["bench_suite"], "mongomock"
+
+def _caso_carregar_eaps(escala, repeticoes, args):
+    from benchmarks.dados_sinteticos import popular_colecoes
+    from nucleo.fontes import carregar_eaps
+    banco, servidor = _banco_mongo(args)
+    if banco is None:
+        return {"fontes.carregar_eaps": {"indisponivel": "instale mongomock (pip install mongomock) ou use --mongo-uri"}}
+    popular_colecoes(banco, escala["projetos"], escala["itens_por_eap"], escala["revisoes"])
+    resultado = {}
+    def carregar():
+        eaps_dados, _, _ = carregar_eaps(banco.eaps, banco.projetos)
+        resultado["eaps"] = len(eaps_dados)
+    medicao = _cronometrar(carregar, repeticoes)
+    if args.mongo_uri:
+        banco.client.drop_database("bench_suite")
+    itens = escala["projetos"] * escala["itens_por_eap"] * escala["revisoes"]
+    return {"fontes.carregar_eaps": {**medicao, "servidor": servidor, "eaps": resultado["eaps"], "itens": itens}}
+
+def _casos_filtros(escala, repeticoes, args):
+    from benchmarks.bench_filtros import gerar_board, gerar_casos
+    from nucleo.filtros import aplicar_filtros, indices_filtro
+    df = gerar_board(escala["obras"])
+    indices = indices_filtro(df)
+    casos = gerar_casos(df, 2 * CASOS_FILTRO)
+    resultados = {}
+    for nome, modo in (("filtros.apply_filters_e", "Todos"), ("filtros.apply_filters_ou", "Qualquer")):
+        do_modo = [caso for caso in casos if caso["modo"].startswith(modo)]
+        medicao = _cronometrar(lambda: [aplicar_filtros(df, caso, indices) for caso in do_modo], repeticoes)
+        resultados[nome] = {**medicao, "obras": escala["obras"], "combinacoes": len(do_modo)}
+    return resultados
+
+def _caso_matriz(escala, repeticoes, args):
+    from benchmarks.dados_sinteticos import gerar_eaps_compactas, gerar_monday_df, gerar_incc
+    from nucleo.matriz import process_eap_matrix
+    eaps = gerar_eaps_compactas(escala["obras"])
+    monday_df, incc_df = gerar_monday_df(escala["obras"]), gerar_incc()
+    siglas = [doc["sigla"] for doc in eaps]
+    medicao = _cronometrar(lambda: process_eap_matrix(eaps, siglas, monday_df, incc_df), repeticoes)
+    return {"matriz.process_eap_matrix": {**medicao, "obras": escala["obras"]}}
+
+def _caso_valor_m2(escala, repeticoes, args):
+    import random
+    from benchmarks.dados_sinteticos import gerar_incc
+    from nucleo.calculos import calcular_valor_m2
+    rnd = random.Random(0)
+    incc_df = gerar_incc()
+    obras = [(rnd.uniform(1e5, 1e7), rnd.uniform(80, 20000), f"20{rnd.randint(15, 24)}-{rnd.randint(1, 12):02d}-01")
+             for _ in range(escala["obras"])]
+    medicao = _cronometrar(lambda: [calcular_valor_m2(c, a, d, incc_df) for c, a, d in obras], repeticoes)
+    return {"calculos.calcular_valor_m2": {**medicao, "chamadas": escala["obras"]}}
+
+# Cada função recebe (escala, repetições, args) e retorna {nome do caso: medição};
+# casos que usam os mesmos dados (os dois modos de filtro) saem da mesma função
+CASOS = (_caso_process_monday, _caso_carregar_eaps, _casos_filtros, _caso_matriz, _caso_valor_m2)
+
+def _git(*argumentos):
+    try:
+        return subprocess.run(["git", *argumentos], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(escalas, repeticoes, args):
+    """Mede todos os casos nas escalas pedidas; retorna o documento gravado em JSON"""
+    resultados = {}
+    for nome_escala in escalas:
+        escala = ESCALAS[nome_escala]
+        for caso in CASOS:
+            print(f"⏱️ {caso.__name__} ({nome_escala})", file=sys.stderr)
+            for nome, medicao in caso(escala, repeticoes, args).items():
+                resultados.setdefault(nome, {})[nome_escala] = medicao
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "alteracoes_locais": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeticoes": repeticoes,
+        "escalas": {nome: ESCALAS[nome] for nome in escalas},
+        "resultados": resultados,
+    }
+
+def comparar(antes, depois, tolerancia):
+    """Linhas (caso, escala, antes, depois, razão) dos casos presentes nos dois e as regressões"""
+    linhas, regressoes = [], []
+    for caso, por_escala in depois["resultados"].items():
+        for escala, medicao in por_escala.items():
+            anterior = antes["resultados"].get(caso, {}).get(escala, {})
+            if "mediana_ms" not in medicao or "mediana_ms" not in anterior:
+                continue
+            razao = medicao["mediana_ms"] / anterior["mediana_ms"] if anterior["mediana_ms"] else float("inf")
+            linhas.append((caso, escala, anterior["mediana_ms"], medicao["mediana_ms"], razao))
+            if razao > tolerancia:
+                regressoes.append(f"{caso} ({escala})")
+    return linhas, regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--escalas", nargs="+", choices=list(ESCALAS), default=["pequena", "media"])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="Arquivo JSON dos resultados (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--mongo-uri", help="mongod local para fontes.carregar_eaps (padrão: mongomock)")
+    parser.add_argument("--comparar", nargs="+", metavar="JSON", help="Resultados anteriores (ou antes e depois)")
+    parser.add_argument("--tolerancia", type=float, default=1.25, help="Razão depois/antes acima da qual o caso regrediu")
+    args = parser.parse_args()
+
+    if args.comparar and len(args.comparar) > 2:
+        parser.error("--comparar aceita um ou dois arquivos")
+    if args.comparar and len(args.comparar) == 2:
+        with open(args.comparar[1], encoding="utf-8") as f:
+            depois = json.load(f)
+    else:
+        depois = executar(args.escalas, args.repeticoes, args)
+        saida = args.saida or os.path.join(RESULTADOS_DIR, f"{depois['commit'] or 'sem_commit'}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, "w", encoding="utf-8") as f:
+            json.dump(depois, f, ensure_ascii=False, indent=2)
+        print(f"✅ Resultados gravados em {saida}")
+
+    if not args.comparar:
+        return
+    with open(args.comparar[0], encoding="utf-8") as f:
+        antes = json.load(f)
+    if (antes.get("plataforma"), antes.get("cpus")) != (depois.get("plataforma"), depois.get("cpus")):
+        print("⚠️ Resultados de máquinas diferentes: as razões medem também a diferença entre elas")
+    linhas, regressoes = comparar(antes, depois, args.tolerancia)
+    print(f"{'caso':<34} {'escala':<8} {'antes ms':>12} {'depois ms':>12} {'razão':>7}")
+    for caso, escala, t_antes, t_depois, razao in linhas:
+        marca = " ⚠️" if razao > args.tolerancia else ""
+        print(f"{caso:<34} {escala:<8} {t_antes:>12.3f} {t_depois:>12.3f} {razao:>7.2f}{marca}")
+    if regressoes:
+        raise SystemExit(f"Mais lentos que {args.tolerancia}x: {', '.join(regressoes)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,150 +1,83 @@
 """
 Módulo de configurações e utilitários para o sistema TOOLS Calculator
+
+Adaptador Streamlit do núcleo (pacote ``nucleo``): credenciais de st.secrets,
+coleções do MongoDB e configuração da página. Os cálculos ficam em
+nucleo.calculos; os usados pela interface V2 (main_interface V2.py e
+data_services_V2.py, mantidas e compatíveis com estes adaptadores)
+continuam disponíveis por aqui.
 """
 
 import streamlit as st
-import pandas as pd
-import json
-import re
-import os
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-from typing import Tuple, Optional
-from pymongo import MongoClient
+from nucleo.config import Configuracao, ErroConfiguracao, MONDAY_API_URL, colecao_mongo
+from nucleo.calculos import clean_and_format, format_indice_incc, format_area_total, calcular_valor_m2
+
+__all__ = [
+    "configuracao", "APIConfig", "get_projetos_collection", "get_eaps_collection",
+    "get_eap_matriz_collection", "get_eap_matriz_estado_collection", "setup_page", "render_header",
+    # Reexportados de nucleo.calculos para main_interface V2.py e data_services_V2.py
+    "clean_and_format", "format_indice_incc", "format_area_total", "calcular_valor_m2",
+]
 
-# Configuração segura de credenciais
-def get_credentials():
+# Configuração segura de credenciais, lida no primeiro uso (nunca na importação)
+@st.cache_resource(show_spinner=False)
+def configuracao():
     """
-    Obtém credenciais de forma segura usando abordagem híbrida:
+    Obtém a configuração do núcleo de forma segura usando abordagem híbrida:
     1. Tenta st.secrets (Streamlit Cloud)
     2. Tenta variáveis de ambiente (.env ou sistema)
-    3. Fallback para valores padrão (apenas para desenvolvimento)
+    3. Sem credenciais, avisa na página e interrompe a execução
     """
     try:
         # Tentativa 1: Streamlit Secrets (recomendado para Streamlit Cloud)
-        mongo_uri = st.secrets["MONGO_URI"]
-        api_key = st.secrets["monday"]["API_KEY"]
-        board_id = st.secrets["monday"]["BOARD_ID"]
-        return mongo_uri, api_key, board_id
+        return Configuracao(
+            mongo_uri=st.secrets["MONGO_URI"],
+            monday_api_key=st.secrets["monday"]["API_KEY"],
+            monday_board_id=st.secrets["monday"]["BOARD_ID"],
+        )
     except (KeyError, AttributeError, FileNotFoundError):
         pass
     
     try:
         # Tentativa 2: Variáveis de ambiente
-        mongo_uri = os.getenv("MONGO_URI")
-        api_key = os.getenv("MONDAY_API_KEY")
-        board_id = int(os.getenv("MONDAY_BOARD_ID", "926240878"))
-        
-        if mongo_uri and api_key:
-            return mongo_uri, api_key, board_id
-    except (ValueError, TypeError):
+        config = Configuracao.do_ambiente()
+        if config.mongo_uri and config.monday_api_key:
+            return config
+    except ErroConfiguracao:
         pass
     
     # Fallback: Avisar que credenciais não foram encontradas
     st.error("🚨 Credenciais não encontradas! Configure st.secrets ou variáveis de ambiente.")
     st.stop()
 
-# Obter credenciais seguras
-MONGO_URI, API_KEY_VALUE, BOARD_ID_VALUE = get_credentials()
+class _APIConfigMeta(type):
+    # API_KEY e BOARD_ID resolvidos no acesso, não na importação do módulo
+    def __getattr__(cls, nome):
+        if nome == "API_KEY":
+            return configuracao().monday_api_key
+        if nome == "BOARD_ID":
+            return configuracao().monday_board_id
+        raise AttributeError(nome)
 
-class APIConfig:
+class APIConfig(metaclass=_APIConfigMeta):
     """Configurações da API do Monday.com"""
-    API_KEY = API_KEY_VALUE
-    BASE_URL = 'https://api.monday.com/v2'
-    BOARD_ID = BOARD_ID_VALUE
-
-@st.cache_resource
-def get_mongo_client():
-    """Retorna cliente MongoDB com cache"""
-    return MongoClient(MONGO_URI)
+    BASE_URL = MONDAY_API_URL
 
 def get_projetos_collection():
     """Retorna coleção de projetos"""
-    return get_mongo_client()['ToolsConnect']['projetos']
+    return colecao_mongo(configuracao(), 'projetos')
 
 def get_eaps_collection():
     """Retorna coleção de EAPs"""
-    return get_mongo_client()['ToolsConnect']['eaps']
+    return colecao_mongo(configuracao(), 'eaps')
 
-def clean_and_format(val, tipo="str"):
-    """Função utilitária para limpeza e formatação de dados"""
-    if pd.isna(val) or val is None or str(val).strip().lower() in ["nan", "none", ""]:
-        return ""
-    
-    s = str(val).strip()
-    
-    if tipo == "sigla":
-        for sep in ["-", " "]:
-            if sep in s:
-                return s.split(sep)[0].strip()
-        return s
-    
-    if tipo == "reais":
-        try:
-            s = s.replace(" ", "")
-            if s.count(",") == 1 and s.count(".") >= 1:
-                s = s.replace(".", "").replace(",", ".")
-            elif s.count(",") == 1:
-                s = s.replace(",", ".")
-            val_float = float(s)
-            return f"R$ {val_float:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except:
-            return s
-    
-    if tipo == "area":
-        try:
-            s = s.replace(" ", "")
-            if "," in s and "." in s:
-                s = s.replace(".", "").replace(",", ".")
-            elif "," in s:
-                s = s.replace(",", ".")
-            return str(int(round(float(s))))
-        except:
-            return s
-    
-    if tipo == "json" and s.startswith("{") and s.endswith("}"):
-        try:
-            return json.dumps(eval(s), ensure_ascii=False)
-        except:
-            return s
-    
-    return s
+def get_eap_matriz_collection():
+    """Retorna coleção materializada da matriz EAP (uma linha por sigla e código)"""
+    return colecao_mongo(configuracao(), 'eap_matriz')
 
-def format_indice_incc(val, val_str=None):
-    """Formata índice INCC"""
-    if val is None:
-        return '—'
-    try:
-        val_num = float(val.replace('.', '').replace(',', '.')) if isinstance(val, str) else float(val)
-        return f"{round(val_num, 2):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except:
-        return str(val)
-
-def format_area_total(val):
-    """Formata área total"""
-    if val is None or not isinstance(val, (int, float)):
-        return '—'
-    return f"{int(round(val)):,}".replace(",", ".")
-
-def calcular_valor_m2(custo, area, data_base, incc_df):
-    """Calcula valor por m² ajustado pelo INCC"""
-    if not area or area == 0:
-        return None
-    
-    hoje = pd.to_datetime(datetime.now().date())
-    data_base_dt = pd.to_datetime(data_base).date() if data_base else None
-    
-    if not data_base_dt or data_base_dt == hoje.date():
-        return custo / area if data_base_dt else None
-    
-    data_retro = data_base_dt - relativedelta(months=2)
-    incc_sorted = incc_df.sort_values('data')
-    incc_retro = incc_sorted[incc_sorted['data'] <= pd.to_datetime(data_retro)]
-    
-    inccb = float(incc_retro.iloc[-1]['indice']) if not incc_retro.empty else float(incc_sorted.iloc[0]['indice'])
-    incca = float(incc_sorted.iloc[-1]['indice'])
-    
-    return (custo * incca) / (inccb * area)
+def get_eap_matriz_estado_collection():
+    """Retorna coleção de controle da materialização (hash de cada EAP processada)"""
+    return colecao_mongo(configuracao(), 'eap_matriz_estado')
 
 def setup_page():
     """Configuração da página Streamlit"""
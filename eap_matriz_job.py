@@ -0,0 +1,248 @@
+"""
+Job de materialização da matriz EAP
+
+Percorre as EAPs vigentes do MongoDB (a mais recente de cada projeto) e grava na coleção ``eap_matriz`` uma linha por
+(sigla, código, descrição) de nível 1, com o preço já convertido para número e a data base
+da obra. Apenas as siglas cujas EAPs mudaram (hash do conteúdo compacto) são
+recalculadas. A aplicação lê somente as linhas das obras selecionadas.
+
+Cada rodada começa por um resumo sem itens (``_id``, ``dataBase``,
+``updatedAt`` e tamanho da lista de itens de cada EAP vigente, mais a sigla do
+projeto); os itens só são transferidos das EAPs novas ou de marcador alterado
+e das demais EAPs das siglas que mudaram. Nova revisão de uma obra é um novo
+documento e sempre é detectada; uma edição dos itens no próprio documento que
+não altere esses campos só é vista com ``--completo``, que lê e compara o hash
+de todas as EAPs.
+
+Cada linha guarda também ``descricao_codigo``, a descrição vencedora do código
+no conjunto completo (a última vista, com as EAPs em ordem de sigla, como em
+_base_matriz_eap): a matriz de poucas obras aplica a mesma regra da matriz
+de todas. Ela é calculada no servidor sobre as linhas gravadas, pela maior
+sigla e maior ``ordem``. Linhas gravadas sem esses campos fazem o job
+recalcular todas as siglas na rodada seguinte.
+
+Roda sem Streamlit: as credenciais vêm do ambiente (MONGO_URI; ver
+nucleo.config.Configuracao.do_ambiente).
+
+Uso:
+    python eap_matriz_job.py                 # execução única
+    python eap_matriz_job.py --intervalo 600 # em loop, a cada 10 minutos
+    python eap_matriz_job.py --completo      # relê todas as EAPs
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import time
+from pymongo import ReplaceOne
+from nucleo.calculos import parse_valor_numerico
+from nucleo.config import Configuracao, ErroConfiguracao, colecao_mongo
+from nucleo.fontes import (
+    carregar_projetos, garantir_indices_eaps, iterar_eaps_vigentes, resumo_eaps_vigentes, versao_conteudo
+)
+
+def _hash_eap(eap_compacta):
+    """Hash estável do conteúdo compacto da EAP (inclui sigla e data base)"""
+    conteudo = json.dumps(
+        [eap_compacta["sigla"], eap_compacta["dataBase"], eap_compacta["itens"]],
+        default=str, ensure_ascii=False
+    )
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+def _linhas_matriz_sigla(sigla, eaps_sigla):
+    """
+    Monta as linhas materializadas de uma sigla a partir das suas EAPs.
+
+    Normalmente há uma única EAP vigente por sigla; se projetos diferentes
+    compartilharem a sigla, a última EAP percorrida prevalece, como na matriz.
+    Um código repetido com descrições diferentes gera uma linha por descrição
+    (o último preço de cada uma): qual delas entra na matriz depende da
+    descrição vencedora no conjunto completo, que muda sem esta sigla mudar.
+    ``ordem`` é a posição da última ocorrência na sigla, usada para decidir
+    essa descrição no servidor.
+    """
+    linhas = {}
+    data_base = ""
+    ordem = 0
+    for eap in eaps_sigla:
+        data_base = eap["dataBase"]
+        for codigo, descricao, nivel, preco in eap["itens"]:
+            if nivel != 1:
+                continue
+            ordem += 1
+            linhas[(codigo, descricao)] = {
+                "_id": f"{sigla}|{codigo}|{descricao}",
+                "sigla": sigla,
+                "codigo": codigo,
+                "descricao": descricao,
+                "preco": parse_valor_numerico(preco),
+                "projeto_id": eap["projeto_id"],
+                "ordem": ordem,
+                "descricao_codigo": None,
+            }
+
+    for linha in linhas.values():
+        linha["dataBase"] = data_base
+    return list(linhas.values())
+
+def _marcador_eap(resumo):
+    """Marcador de atualização de uma EAP, obtido sem transferir os itens"""
+    return versao_conteudo(resumo["sigla"], resumo["dataBase"], resumo["updatedAt"], resumo["total_itens"])
+
+def _ler_eaps(eaps_collection, projetos_dados, ids):
+    """Lê (forma compacta) apenas as EAPs de ``ids``"""
+    if not ids:
+        return {}
+    return dict(iterar_eaps_vigentes(eaps_collection, projetos_dados, ids))
+
+def materializar_eap_matriz(eaps_collection, projetos_collection, matriz_collection, estado_collection, completo=False):
+    """
+    Atualiza a coleção materializada recalculando apenas as siglas alteradas.
+
+    Com ``completo``, todas as EAPs vigentes são lidas e comparadas pelo hash,
+    mesmo as de marcador inalterado.
+    """
+    projetos_dados = carregar_projetos(projetos_collection)
+    estado_anterior = {e["_id"]: e for e in estado_collection.find({})}
+
+    garantir_indices_eaps(eaps_collection)
+    resumos = {r["_id"]: r for r in resumo_eaps_vigentes(eaps_collection, projetos_dados)}
+    marcadores = {eap_id: _marcador_eap(r) for eap_id, r in resumos.items()}
+
+    formato_anterior = matriz_collection.find_one(
+        {"$or": [{"descricao_codigo": {"$exists": False}}, {"ordem": {"$exists": False}}]}, {"_id": 1}
+    )
+    if completo or formato_anterior:
+        a_ler = list(resumos)
+    else:
+        a_ler = [
+            eap_id for eap_id in resumos
+            if estado_anterior.get(eap_id, {}).get("marcador") != marcadores[eap_id]
+        ]
+    lidas = _ler_eaps(eaps_collection, projetos_dados, a_ler)
+
+    estado_atual = {}
+    alteradas = set()
+    siglas_alteradas = set()
+    for eap_id, eap_compacta in lidas.items():
+        sigla = eap_compacta["sigla"]
+        hash_eap = _hash_eap(eap_compacta)
+        estado_atual[eap_id] = {"_id": eap_id, "hash": hash_eap, "marcador": marcadores[eap_id], "sigla": sigla}
+
+        anterior = estado_anterior.get(eap_id)
+        if not anterior or anterior["hash"] != hash_eap:
+            alteradas.add(eap_id)
+            siglas_alteradas.add(sigla)
+            if anterior:
+                # A sigla do projeto pode ter mudado: limpa as linhas antigas
+                siglas_alteradas.add(anterior["sigla"])
+
+    removidas = [eap_id for eap_id in estado_anterior if eap_id not in resumos]
+    siglas_alteradas.update(estado_anterior[eap_id]["sigla"] for eap_id in removidas)
+    if formato_anterior:
+        # Linhas do formato anterior (sem descricao_codigo ou ordem): todas
+        # são regravadas, e o estado de todas as EAPs é regravado para mudar
+        # a versão lida pela aplicação
+        siglas_alteradas.update(r["sigla"] for r in resumos.values())
+        siglas_alteradas.update(matriz_collection.distinct("sigla"))
+
+    # Uma sigla alterada é recalculada com todas as suas EAPs, inclusive as
+    # que não mudaram (normalmente não há outras)
+    lidas.update(_ler_eaps(eaps_collection, projetos_dados, [
+        eap_id for eap_id, r in resumos.items()
+        if r["sigla"] in siglas_alteradas and eap_id not in lidas
+    ]))
+    eaps_por_sigla = {}
+    for eap_id, resumo in resumos.items():
+        if resumo["sigla"] in siglas_alteradas:
+            eaps_por_sigla.setdefault(resumo["sigla"], []).append(lidas[eap_id])
+
+    total_linhas = 0
+    for sigla in siglas_alteradas:
+        linhas = _linhas_matriz_sigla(sigla, eaps_por_sigla.get(sigla, []))
+        matriz_collection.delete_many({"sigla": sigla})
+        if linhas:
+            matriz_collection.insert_many(linhas)
+        total_linhas += len(linhas)
+
+    codigos_atualizados = 0
+    if siglas_alteradas:
+        # Descrição vencedora de cada código, calculada no servidor: a da maior
+        # sigla e, dentro dela, a da última ocorrência. Uma EAP alterada pode
+        # mudá-la também nas linhas das siglas que não mudaram
+        vencedoras = matriz_collection.aggregate([
+            {"$sort": {"codigo": 1, "sigla": -1, "ordem": -1}},
+            {"$group": {
+                "_id": "$codigo",
+                "descricao": {"$first": "$descricao"},
+                "atuais": {"$addToSet": "$descricao_codigo"},
+            }},
+        ])
+        for g in vencedoras:
+            if set(g["atuais"]) == {g["descricao"]}:
+                continue
+            matriz_collection.update_many(
+                {"codigo": g["_id"], "descricao_codigo": {"$ne": g["descricao"]}},
+                {"$set": {"descricao_codigo": g["descricao"]}},
+            )
+            # Linhas recém-gravadas ainda não têm descrição (None)
+            if set(g["atuais"]) - {None, g["descricao"]}:
+                codigos_atualizados += 1
+
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    operacoes = []
+    for eap_id, estado in estado_atual.items():
+        anterior = estado_anterior.get(eap_id, {})
+        if eap_id in alteradas or formato_anterior:
+            atualizado_em = agora
+        elif anterior.get("marcador") != estado["marcador"]:
+            # Só o marcador mudou: a versão publicada continua a mesma
+            atualizado_em = anterior.get("atualizado_em", agora)
+        else:
+            continue
+        operacoes.append(ReplaceOne({"_id": eap_id}, {**estado, "atualizado_em": atualizado_em}, upsert=True))
+    if operacoes:
+        estado_collection.bulk_write(operacoes)
+    if removidas:
+        estado_collection.delete_many({"_id": {"$in": removidas}})
+
+    matriz_collection.create_index([("sigla", 1), ("codigo", 1)])
+    matriz_collection.create_index("codigo")
+
+    return {
+        "eaps": len(resumos),
+        "eaps_lidas": len(lidas),
+        "eaps_alteradas": len(alteradas),
+        "eaps_removidas": len(removidas),
+        "siglas_recalculadas": len(siglas_alteradas),
+        "codigos_com_nova_descricao": codigos_atualizados,
+        "linhas_gravadas": total_linhas,
+    }
+
+def executar_job(config, completo=False):
+    """Executa uma rodada de materialização nas coleções de ``config``"""
+    resumo = materializar_eap_matriz(
+        colecao_mongo(config, 'eaps'), colecao_mongo(config, 'projetos'),
+        colecao_mongo(config, 'eap_matriz'), colecao_mongo(config, 'eap_matriz_estado'),
+        completo=completo
+    )
+    print(f"✅ Matriz EAP materializada: {resumo}")
+    return resumo
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materializa a matriz EAP por obra")
+    parser.add_argument("--intervalo", type=int, default=0,
+                        help="Segundos entre execuções (0 = executa uma vez)")
+    parser.add_argument("--completo", action="store_true",
+                        help="Lê e compara todas as EAPs, ignorando os marcadores de atualização")
+    args = parser.parse_args()
+
+    try:
+        config = Configuracao.do_ambiente().exigir("mongo_uri")
+    except ErroConfiguracao as e:
+        raise SystemExit(f"{e} (defina MONGO_URI no ambiente)")
+    executar_job(config, completo=args.completo)
+    while args.intervalo > 0:
+        time.sleep(args.intervalo)
+        executar_job(config)
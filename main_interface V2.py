@@ -230,14 +230,12 @@ def process_eap_matrix(_eaps_dados, _projetos_dados, selected_obras, _monday_df,
         projeto_info = get_projeto_info_by_id(projeto_id, _projetos_dados)
         sigla_obra = projeto_info["sigla"] or projeto_info["nome"]
         
+        # Itens compactos (codigo, descricao, nivel, preco); o preço já é o
+        # preco_m2 quando o item o tem
         itens = doc.get("itens", [])
-        itens_nivel_1 = [item for item in itens if item.get("nivel") == 1]
+        itens_nivel_1 = [item for item in itens if item[2] == 1]
         
-        for item in itens_nivel_1:
-            codigo = item.get("codEAP", "")
-            descricao = item.get("descricao", "")
-            preco_m2 = item.get("preco_m2", "") if "preco_m2" in item else item.get("preco", "")
-            
+        for codigo, descricao, _, preco_m2 in itens_nivel_1:
             codigos.add(codigo)
             descricoes[codigo] = descricao
             
@@ -322,11 +320,11 @@ def process_eap_matrix(_eaps_dados, _projetos_dados, selected_obras, _monday_df,
 def render_eap_section(selected_obras, area_simulada_val=None):
     """Renderiza a seção principal EAP"""
     try:
-        eaps_dados, projetos_dados = get_eap_data(filter_version=9)
-        incc_df_eap = load_incc_data()
+        eaps_dados, projetos_dados, _ = get_eap_data(filter_version=9)
+        incc_df_eap, _ = load_incc_data()
         
         if eaps_dados:
-            board_name, monday_df = get_monday_data()
+            board_name, monday_df, _ = get_monday_data()
             matriz_final = process_eap_matrix(
                 eaps_dados, projetos_dados, selected_obras, monday_df, incc_df_eap, area_simulada_val
             )
@@ -464,7 +462,7 @@ def main():
     siglas_eaps = []
     
     try:
-        board_name, df = get_monday_data()
+        board_name, df, _ = get_monday_data()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         df = None
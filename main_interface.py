@@ -4,17 +4,33 @@ Módulo principal da interface do usuário - TOOLS Calculator
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
-import re
-from config_utils import (
-    setup_page, render_header, clean_and_format, 
-    calcular_valor_m2, format_indice_incc, format_area_total
+from datetime import datetime
+from config_utils import setup_page, render_header
+from nucleo.config import EAPFilterConfig
+from nucleo.calculos import format_area_total, parse_areas_simuladas, ESTATISTICAS_EAP
+from nucleo.fontes import COLUNAS_FILTRO_TEXTO, normalizar_texto_busca, versao_conteudo
+from nucleo import matriz as motor
+from nucleo.busca import IndiceBusca, IndiceSimilaridade
+from nucleo.cache import CacheLRU
+from nucleo.filtros import indices_filtro, chave_filtros, mascara_filtros, aplicar_filtros
+from nucleo.matriz import (
+    coluna_sigla, base_eaps, CAMPOS_AGRUPAMENTO, simular_area, simular_areas,
+    com_estatisticas, formatar_matriz_exibicao, matriz_para_excel, versao_matriz, abas_relatorio
 )
+from relatorio_eap import GeradorRelatorios, escrever_workbook
 from data_services import (
-    get_monday_data, get_eap_data, load_incc_data,
-    get_projeto_info_by_id, get_siglas_eaps
+    get_monday_data, get_eap_data, get_eap_matriz_data, get_eap_subitens, load_incc_data, get_siglas_eaps
 )
 
+
+# Resultados exibidos por tipo (obras, itens da EAP) na busca global
+BUSCA_RESULTADOS_MAX = 8
+
+# Combinações de filtros mantidas em _cache_filtros (as menos usadas saem primeiro)
+FILTROS_CACHE_MAX = 256
+
 def create_multiselect_filter(label, options_base, key):
     """Cria filtro multiselect com comportamento customizado"""
     if key not in st.session_state:
@@ -28,7 +44,26 @@ def create_multiselect_filter(label, options_base, key):
     
     return options_base if key == "obras" and not st.session_state[key] else st.session_state[key]
 
-def render_filters(df_eaps, siglas_eaps):
+@st.cache_data(ttl=86400, show_spinner=False)
+def opcoes_filtros(versao_filtros, _df_eaps):
+    """
+    Opções ordenadas dos filtros de obras, construtora, arquitetura e local.
+    
+    O board fica fora da chave; ``versao_filtros`` (ver versao_dados_filtros)
+    muda junto com ele, então as listas só são refeitas quando os dados mudam.
+    """
+    return {
+        'obras': sorted(coluna_sigla(_df_eaps).unique().tolist()),
+        'construtora': sorted([x for x in _df_eaps['Construtora'].dropna().astype(str).str.strip().unique().tolist() if x]),
+        'arquitetura': sorted(_df_eaps['Arquitetura'].dropna().astype(str).str.strip().unique().tolist()),
+        'local': sorted(_df_eaps['Local'].dropna().astype(str).str.strip().unique().tolist()),
+    }
+
+def versao_dados_filtros(versao_monday, siglas_eaps):
+    """Token de versão do board já restrito às obras com EAP, ou None sem versão do Monday"""
+    return versao_conteudo(versao_monday, sorted(siglas_eaps)) if versao_monday else None
+
+def render_filters(df_eaps, siglas_eaps, versao_filtros=None):
     """Renderiza os filtros principais da interface"""
     st.markdown('<div class="filters-section">', unsafe_allow_html=True)
     
@@ -41,11 +76,12 @@ def render_filters(df_eaps, siglas_eaps):
         horizontal=True, key="modo_filtro"
     )
     
-    # Preparação das opções
-    obras_opcoes = sorted(df_eaps['Obras'].apply(lambda x: clean_and_format(x, tipo="sigla")).unique().tolist())
-    construtora_opcoes = sorted([x for x in df_eaps['Construtora'].dropna().astype(str).str.strip().unique().tolist() if x])
-    arquitetura_opcoes = sorted(df_eaps['Arquitetura'].dropna().astype(str).str.strip().unique().tolist())
-    locais_opcoes = sorted(df_eaps['Local'].dropna().astype(str).str.strip().unique().tolist())
+    # Preparação das opções (em cache por versão dos dados)
+    opcoes = opcoes_filtros(versao_filtros, df_eaps) if versao_filtros else opcoes_filtros.__wrapped__(None, df_eaps)
+    obras_opcoes = opcoes['obras']
+    construtora_opcoes = opcoes['construtora']
+    arquitetura_opcoes = opcoes['arquitetura']
+    locais_opcoes = opcoes['local']
     
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
@@ -84,16 +120,22 @@ def render_filters(df_eaps, siglas_eaps):
     with col6:
         st.markdown('<div class="filter-label">Simular valores para área (m²):</div>', unsafe_allow_html=True)
         area_simulada = st.text_input(
-            "Área para simulação", value="", placeholder="Digite uma área para simulação (opcional)",
+            "Área para simulação", value="", placeholder="Ex.: 500 ou 300; 500; 800 ou 300-1.200/300",
             key="area_simulada", label_visibility="collapsed"
         )
         
+        # Uma área reescala a matriz; várias geram um cenário por área
         area_simulada_val = None
+        areas_simuladas = []
         if area_simulada:
             try:
-                area_simulada_val = float(str(area_simulada).replace('.', '').replace(',', '.'))
-            except:
-                st.warning("Área simulada inválida. Use apenas números.")
+                areas = parse_areas_simuladas(area_simulada)
+                if len(areas) == 1:
+                    area_simulada_val = areas[0]
+                else:
+                    areas_simuladas = areas
+            except ValueError:
+                st.warning("Área simulada inválida. Use números, listas com ';' ou faixas como 300-1.200/300.")
             
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -104,310 +146,433 @@ def render_filters(df_eaps, siglas_eaps):
         'obras': obras_filter,
         'construtora': construtora_filter,
         'arquitetura': arquitetura_filter,
-        'area_simulada_val': area_simulada_val
+        'area_simulada_val': area_simulada_val,
+        'areas_simuladas': areas_simuladas
     }
 
-def apply_filters(df_eaps, filters, siglas_eaps):
-    """Aplica os filtros no DataFrame"""
-    filtered_df = df_eaps.copy()
-
-    # Aplicar filtros básicos que sempre se aplicam (independente do modo)
-    if 'Area_Numeric' in filtered_df.columns and filters.get('area_range'):
-        filtered_df = filtered_df[
-            (filtered_df['Area_Numeric'] >= filters['area_range'][0]) & 
-            (filtered_df['Area_Numeric'] <= filters['area_range'][1])
-        ]
-
-    if filters.get('local'):
-        filtered_df = filtered_df[filtered_df['Local'].str.contains(
-            filters['local'], case=False, na=False)]
-
-    if filters.get('modo') == "Qualquer critério (OU/União)":
-        # No modo OR, aplicar filtro de obras primeiro
-        if filters.get('obras') and len(filters['obras']) > 0 and 'Obras' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df['Obras'].apply(
-                lambda x: clean_and_format(x, tipo="sigla") in filters['obras'])]
-
-        indices_finais = set()
-
-        # Filtro de construtora por substring
-        if filters.get('construtora') and 'Construtora' in filtered_df.columns:
-            mask = filtered_df['Construtora'].astype(str).apply(
-                lambda val: any(str(f).strip().lower() in val.strip().lower() 
-                              for f in filters['construtora'])
-            )
-            indices_finais.update(filtered_df[mask].index)
+@st.cache_resource(max_entries=4, show_spinner=False)
+def indice_busca_obras(versao_filtros, _df_eaps):
+    """IndiceBusca sobre o nome (com a sigla) das obras com EAP, uma vez por versão dos dados"""
+    nomes = _df_eaps['Obras'].fillna('').astype(str).tolist()
+    return IndiceBusca(nomes), coluna_sigla(_df_eaps).astype(str).tolist(), nomes
 
-        # Filtro de arquitetura por substring
-        if filters.get('arquitetura') and 'Arquitetura' in filtered_df.columns:
-            mask = filtered_df['Arquitetura'].astype(str).apply(
-                lambda val: any(str(f).strip().lower() in val.strip().lower() 
-                              for f in filters['arquitetura'])
-            )
-            indices_finais.update(filtered_df[mask].index)
+@st.cache_resource(max_entries=16, show_spinner=False)
+def indice_busca_itens(codigos, descricoes):
+    """IndiceBusca sobre código e descrição limpa dos itens da matriz EAP"""
+    return IndiceBusca([d if str(d).startswith(str(c)) else f"{c} {d}" for c, d in zip(codigos, descricoes)])
 
-        # Se não há filtros aplicados, retorna todas as obras
-        if not indices_finais:
-            tem_filtros = ((filters.get('construtora') and len(filters['construtora']) > 0) or
-                          (filters.get('arquitetura') and len(filters['arquitetura']) > 0))
-            
-            if tem_filtros:
-                filtered_df = filtered_df.iloc[0:0]  # Retorna vazio se tem filtros mas sem resultado
-        else:
-            filtered_df = filtered_df.loc[list(indices_finais)]
+def _adicionar_obra_filtro(sigla):
+    obras = st.session_state.get("obras", [])
+    if sigla not in obras:
+        st.session_state["obras"] = obras + [sigla]
 
-    else:
-        # Modo AND - INTERSEÇÃO REAL: só mostra registros que atendem TODOS os campos preenchidos
-        
-        # Se pelo menos um campo de filtro está preenchido, começar com conjunto vazio e fazer interseção
-        campos_preenchidos = []
-        if filters.get('obras') and len(filters['obras']) > 0:
-            campos_preenchidos.append('obras')
-        if filters.get('construtora') and len(filters['construtora']) > 0:
-            campos_preenchidos.append('construtora')
-        if filters.get('arquitetura') and len(filters['arquitetura']) > 0:
-            campos_preenchidos.append('arquitetura')
-        
-        if campos_preenchidos:
-            # Para modo AND verdadeiro, cada registro deve atender TODOS os campos selecionados
-            indices_and = None
-            
-            # Filtro de obras
-            if 'obras' in campos_preenchidos and 'Obras' in filtered_df.columns:
-                mask_obras = filtered_df['Obras'].apply(
-                    lambda x: clean_and_format(x, tipo="sigla") in filters['obras'])
-                indices_obras = set(filtered_df[mask_obras].index)
-                indices_and = indices_obras if indices_and is None else indices_and.intersection(indices_obras)
-            
-            # Filtro de construtora 
-            if 'construtora' in campos_preenchidos and 'Construtora' in filtered_df.columns:
-                mask_const = filtered_df['Construtora'].astype(str).apply(
-                    lambda val: any(str(f).strip().lower() in val.strip().lower() 
-                                  for f in filters['construtora'])
-                )
-                indices_const = set(filtered_df[mask_const].index)
-                indices_and = indices_const if indices_and is None else indices_and.intersection(indices_const)
-            
-            # Filtro de arquitetura
-            if 'arquitetura' in campos_preenchidos and 'Arquitetura' in filtered_df.columns:
-                mask_arq = filtered_df['Arquitetura'].astype(str).apply(
-                    lambda val: any(str(f).strip().lower() in val.strip().lower() 
-                                  for f in filters['arquitetura'])
-                )
-                indices_arq = set(filtered_df[mask_arq].index)
-                indices_and = indices_arq if indices_and is None else indices_and.intersection(indices_arq)
-            
-            # Aplicar resultado da interseção
-            if indices_and is not None:
-                filtered_df = filtered_df.loc[list(indices_and)] if indices_and else filtered_df.iloc[0:0]
-
-    return filtered_df, True
-
-@st.cache_data(ttl=180, show_spinner=True)
-def process_eap_matrix(_eaps_dados, _projetos_dados, selected_obras, _monday_df, _incc_df_eap, area_simulada_val=None):
-    """Processa a matriz EAP com cálculos INCC"""
-    siglas_obras_eap = set()
-    data_ref_dict = {}
-    area_m2_dict_monday = {}
+def render_busca_global(df_eaps, versao_filtros):
+    """
+    Caixa de busca global, tolerante a erros de digitação. As obras
+    encontradas (nome ou sigla) aparecem aqui e entram no filtro OBRAS com
+    um clique; os itens da EAP são listados por render_eap_section.
+    """
+    consulta = st.text_input(
+        "Buscar", value="", placeholder="Buscar obra, sigla ou item da EAP",
+        key="busca_global", label_visibility="collapsed"
+    )
+    if not consulta.strip() or 'Obras' not in df_eaps.columns:
+        return consulta
     
-    # Processa dados dos projetos
-    for doc in _eaps_dados:
-        projeto_id = doc.get("projeto_id")
-        projeto_info = get_projeto_info_by_id(projeto_id, _projetos_dados)
-        sigla_obra = projeto_info["sigla"] or projeto_info["nome"]
-        siglas_obras_eap.add(sigla_obra)
-        data_ref_dict[sigla_obra] = doc.get("dataBase", "")
+    montar = indice_busca_obras if versao_filtros else indice_busca_obras.__wrapped__
+    indice, siglas, nomes = montar(versao_filtros, df_eaps)
+    resultados = indice.buscar(consulta, BUSCA_RESULTADOS_MAX)
+    if not resultados:
+        st.caption("Nenhuma obra encontrada.")
+        return consulta
     
-    # Processa áreas do Monday
-    if _monday_df is not None and not _monday_df.empty:
-        for idx, row in _monday_df.iterrows():
-            nome_obra = str(row['Obras']).strip()
-            area_obra = str(row['Area']).strip() if 'Area' in row else ''
-            if nome_obra:
-                area_m2_dict_monday[nome_obra] = area_obra
+    st.caption("Obras encontradas (clique para adicionar ao filtro OBRAS)")
+    colunas = st.columns(min(4, len(resultados)))
+    for i, (posicao, _) in enumerate(resultados):
+        colunas[i % len(colunas)].button(
+            nomes[posicao], key=f"busca_obra_{posicao}",
+            on_click=_adicionar_obra_filtro, args=(siglas[posicao],)
+        )
+    return consulta
+
+def _render_busca_itens(matriz, consulta):
+    """Itens da EAP que casam com a busca global, com atalho para exibir só eles na matriz"""
+    if not consulta or not consulta.strip() or matriz["valores"].empty:
+        return
+    codigos = matriz["valores"].index
+    indice = indice_busca_itens(tuple(codigos), tuple(matriz["descricoes"].fillna("")))
+    resultados = indice.buscar(consulta, BUSCA_RESULTADOS_MAX)
+    if not resultados:
+        st.caption("Nenhum item da EAP encontrado.")
+        return
     
-    matriz_final = []
+    posicoes = [posicao for posicao, _ in resultados]
+    st.caption("Itens da EAP encontrados")
+    st.dataframe(pd.DataFrame({
+        "Código": codigos[posicoes],
+        "Descrição": matriz["descricoes"].iloc[posicoes].to_numpy(),
+        "Relevância": [f"{nota:.0%}" for _, nota in resultados],
+    }), hide_index=True, use_container_width=True)
     
-    # Linha de área
-    area_row = {"CÓDIGO": "", "DESCRIÇÃO": "ÁREA M²"}
-    if selected_obras:
-        for obra in selected_obras:
-            area_val = area_m2_dict_monday.get(obra)
-            if not area_val or str(area_val).strip().lower() in ["", "nan", "none"]:
-                for nome_monday, area_monday in area_m2_dict_monday.items():
-                    if obra.lower() in nome_monday.lower():
-                        area_val = area_monday
-                        break
-            area_row[obra] = clean_and_format(area_val, tipo="area") if area_val else ""
-        area_row["Média"] = ""
-    matriz_final.append(area_row)
+    def exibir_somente_encontrados():
+        # As duas primeiras linhas da matriz exibida são ÁREA M² e DATA BASE
+        selecao = [True, True] + [False] * len(codigos)
+        for posicao in posicoes:
+            selecao[posicao + 2] = True
+        st.session_state['selecao_linhas'] = selecao
+    st.button("Exibir só estes itens", key="busca_exibir_itens", on_click=exibir_somente_encontrados)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def indices_filtro_monday(versao_monday, _monday_df):
+    """Índices de trigramas dos filtros de texto (nucleo.filtros.indices_filtro), uma vez por versão do board"""
+    return indices_filtro(_monday_df)
+
+@st.cache_resource
+def _cache_filtros():
+    """
+    Resultados de apply_filters (posições das linhas) por (versão dos dados,
+    filtros normalizados), compartilhados entre sessões; as combinações
+    menos usadas saem primeiro.
+    """
+    return CacheLRU(FILTROS_CACHE_MAX)
+
+def apply_filters(df_eaps, filters, siglas_eaps, indices=None, versao_filtros=None):
+    """
+    Aplica os filtros no DataFrame (nucleo.filtros).
     
-    # Linha de data base
-    dataref_row = {"CÓDIGO": "", "DESCRIÇÃO": "DATA BASE"}
-    if selected_obras:
-        for sigla in selected_obras:
-            data_original = data_ref_dict.get(sigla, "")
-            # Formatar data para exibir apenas MM/YYYY (apenas visual)
-            if data_original:
-                try:
-                    from datetime import datetime
-                    import pandas as pd
-                    # Tenta converter usando pandas para maior flexibilidade
-                    data_parsed = pd.to_datetime(data_original)
-                    data_formatada = data_parsed.strftime("%m/%Y")
-                except:
-                    try:
-                        # Fallback: tenta converter manualmente
-                        if isinstance(data_original, str) and len(data_original) >= 10:
-                            # Pega apenas a parte da data (YYYY-MM-DD)
-                            date_part = data_original[:10]
-                            data_parsed = datetime.strptime(date_part, "%Y-%m-%d")
-                            data_formatada = data_parsed.strftime("%m/%Y")
-                        else:
-                            data_formatada = str(data_original)
-                    except:
-                        # Se tudo falhar, mantém original
-                        data_formatada = str(data_original)
-            else:
-                data_formatada = ""
-            dataref_row[sigla] = data_formatada
-        dataref_row["Média"] = ""
-    matriz_final.append(dataref_row)
+    Com ``versao_filtros`` (ver versao_dados_filtros) o resultado fica em
+    _cache_filtros: voltar a uma combinação já vista não recalcula máscaras.
+    """
+    if versao_filtros is None:
+        return aplicar_filtros(df_eaps, filters, indices), True
     
-    # Processa itens EAP
-    codigos = set()
-    descricoes = {}
-    grupo_dict = {}
+    cache = _cache_filtros()
+    chave = (versao_filtros, chave_filtros(filters))
+    posicoes = cache.obter(chave)
+    if posicoes is None:
+        posicoes = np.flatnonzero(mascara_filtros(df_eaps, filters, indices))
+        cache.guardar(chave, posicoes)
+    return df_eaps.iloc[posicoes].copy(), True
+
+
+@st.cache_data(ttl=86400, show_spinner=True)
+def process_eap_matrix(_eaps_dados, _projetos_dados, selected_obras, _monday_df, _incc_df_eap, versoes_fontes=None):
+    """
+    Matriz EAP (nucleo.matriz.process_eap_matrix) em cache na sessão.
     
-    for doc in _eaps_dados:
-        projeto_id = doc.get("projeto_id")
-        projeto_info = get_projeto_info_by_id(projeto_id, _projetos_dados)
-        sigla_obra = projeto_info["sigla"] or projeto_info["nome"]
-        
-        itens = doc.get("itens", [])
-        itens_nivel_1 = [item for item in itens if item.get("nivel") == 1]
-        
-        for item in itens_nivel_1:
-            codigo = item.get("codEAP", "")
-            descricao = item.get("descricao", "")
-            preco_m2 = item.get("preco_m2", "") if "preco_m2" in item else item.get("preco", "")
-            
-            codigos.add(codigo)
-            descricoes[codigo] = descricao
+    Os dados de entrada ficam fora da chave do cache (prefixo ``_``); a chave
+    usa ``versoes_fontes``, os tokens de versão publicados pelos carregadores
+    (EAPs, Monday e INCC). Dados novos geram tokens novos e invalidam o
+    cache na hora, por isso o TTL pode ser longo.
+    """
+    return motor.process_eap_matrix(_eaps_dados, selected_obras, _monday_df, _incc_df_eap, versoes_fontes)
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def process_eap_subniveis(codigo, _eaps_subitens, selected_obras, _monday_df, _incc_df_eap, versoes_fontes=None):
+    """
+    Matriz dos subitens de ``codigo`` (nucleo.matriz.process_eap_subniveis),
+    em cache por (código, seleção, versões).
+    """
+    return motor.process_eap_subniveis(_eaps_subitens, selected_obras, _monday_df, _incc_df_eap)
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def process_matriz_grupos(_matriz, campo, _monday_df, selected_obras, versoes_fontes=None):
+    """
+    Matriz por grupo de obras (nucleo.matriz.process_matriz_grupos), em
+    cache por (campo, seleção, versões das fontes).
+    """
+    return motor.process_matriz_grupos(_matriz, campo, _monday_df)
+
+@st.cache_data(ttl=86400, max_entries=32, show_spinner=False)
+def excel_matrizes(versao, _abas, renomear):
+    """
+    Workbook .xlsx com uma aba por matriz de ``_abas`` ([(nome, matriz)]).
+    
+    Gerado pelo xlsxwriter em modo constant_memory (cada linha vai para o
+    disco assim que escrita), com valores numéricos e formato de número. A
+    chave é ``versao`` (ver _botao_excel): a mesma matriz não é gerada duas vezes.
+    """
+    buffer = io.BytesIO()
+    escrever_workbook(buffer, [(nome, matriz_para_excel(matriz).rename(columns=renomear)) for nome, matriz in _abas])
+    return buffer.getvalue()
+
+def _botao_excel(label, abas, renomear, file_name, key=None):
+    """
+    Botão de download cujo workbook só é gerado quando o usuário clica.
+    
+    A cada rerun resta só o token de versão das matrizes; o Streamlit chama a
+    função de ``data`` no clique, e excel_matrizes reaproveita o arquivo de
+    uma matriz já exportada.
+    """
+    versao = versao_conteudo([nome for nome, _ in abas], [versao_matriz(m) for _, m in abas], renomear)
+    st.download_button(
+        label=label,
+        data=lambda: excel_matrizes(versao, abas, renomear),
+        file_name=file_name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=key
+    )
+
+@st.cache_resource
+def _gerador_relatorios():
+    """Fila de relatórios completos em segundo plano, compartilhada entre sessões"""
+    return GeradorRelatorios()
+
+
+def _ler_arquivo(caminho):
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+@st.fragment(run_every=1)
+def _acompanhar_relatorio(chave):
+    """Barra de progresso atualizada a cada segundo; ao terminar, recarrega a página com o download"""
+    trabalho = _gerador_relatorios().trabalho(chave)
+    if trabalho is None or trabalho.concluido or trabalho.erro:
+        st.rerun()
+    st.progress(trabalho.progresso, text=f"Relatório completo: {trabalho.etapa}")
+
+def _render_relatorio_completo(matriz, eaps_dados, monday_df, incc_df_eap, versoes_fontes, renomear):
+    """
+    Relatório completo em várias abas, gerado em segundo plano por
+    _gerador_relatorios. A chave é o hash do conteúdo: o mesmo relatório já
+    gravado em disco é oferecido para download na hora.
+    """
+    if not matriz["obras"]:
+        return
+    chave = versao_conteudo("relatorio-eap", versoes_fontes, versao_matriz(matriz), renomear)
+    gerador = _gerador_relatorios()
+    trabalho = gerador.trabalho(chave)
+    
+    if trabalho is not None and trabalho.concluido:
+        st.download_button(
+            label="Baixar relatório completo",
+            data=lambda: _ler_arquivo(trabalho.caminho),
+            file_name="relatorio_completo_eap.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="baixar-relatorio-eap"
+        )
+    elif trabalho is not None and trabalho.erro is None:
+        _acompanhar_relatorio(chave)
+    else:
+        if trabalho is not None:
+            st.error(f"Falha ao gerar o relatório completo: {trabalho.erro}")
+        if st.button("Gerar relatório completo (matriz, detalhe por obra, INCC e Monday)", key="gerar-relatorio-eap"):
+            base = base_eaps(eaps_dados, versoes_fontes[0])
+            gerador.solicitar(chave, lambda: abas_relatorio(matriz, base, monday_df, incc_df_eap, renomear))
+            st.rerun()
+
+def _rotulo_area(area):
+    """Rótulo curto da área simulada, ex.: '1.200 m²'"""
+    texto = format_area_total(area) if float(area).is_integer() else f"{area:.2f}".replace(".", ",")
+    return f"{texto} m²"
+
+def _render_cenarios_area(matriz, areas_simuladas, selecao_linhas, renomear, colunas_estat=("Média",), metodo_outlier=None):
+    """Tabelas empilhadas, uma por área simulada, e Excel com uma aba por área"""
+    cenarios = simular_areas(matriz, areas_simuladas)
+    if not cenarios:
+        st.info("A simulação de várias áreas precisa da série INCC e de ao menos uma obra.")
+        return
+    
+    st.markdown("#### Simulação por área")
+    abas = []
+    for cenario in cenarios:
+        cenario = com_estatisticas(cenario, colunas_estat, metodo_outlier)
+        rotulo = _rotulo_area(cenario["area_simulada"])
+        df_cenario = formatar_matriz_exibicao(cenario).rename(columns=renomear)
+        # Mesmas linhas marcadas na matriz principal
+        if len(selecao_linhas) == len(df_cenario):
+            df_cenario = df_cenario[np.array(selecao_linhas, dtype=bool)]
+        st.markdown(f"**{rotulo}**")
+        st.dataframe(df_cenario, use_container_width=True, hide_index=True)
+        abas.append((rotulo, cenario))
+    
+    _botao_excel("Baixar Excel (uma aba por área)", abas, renomear, "simulacao_areas.xlsx", key="baixar-simulacao-areas")
+
+def _render_subniveis(matriz, monday_df, incc_df_eap, versoes_fontes, area_simulada_val,
+                      colunas_estat, metodo_outlier, renomear):
+    """Expande códigos da matriz em seus subníveis, buscados e calculados só ao expandir"""
+    codigos = list(matriz["valores"].index)
+    if not codigos:
+        return
+    descricoes = dict(zip(codigos, matriz["descricoes"]))
+    rotulo = lambda codigo: f"{codigo} — {descricoes.get(codigo, '')}"
+    
+    expandir = st.multiselect(
+        "Detalhar subníveis dos códigos", codigos, format_func=rotulo,
+        placeholder="Escolha códigos para expandir", key="expandir_codigos_eap"
+    )
+    for codigo in expandir:
+        with st.expander(rotulo(codigo), expanded=True):
+            eaps_sub, versao_sub = get_eap_subitens(codigo, matriz["obras"], filter_version=EAPFilterConfig.versao())
+            sub = process_eap_subniveis(
+                codigo, eaps_sub, matriz["obras"], monday_df, incc_df_eap,
+                versoes_fontes=(versao_sub,) + tuple(versoes_fontes[1:])
+            )
+            if sub["valores"].empty:
+                st.info("Nenhum subitem com valor para as obras selecionadas.")
+                continue
+            sub = com_estatisticas(simular_area(sub, area_simulada_val), colunas_estat, metodo_outlier)
             
-            chave = (codigo, descricao)
-            if chave not in grupo_dict:
-                grupo_dict[chave] = {}
-            grupo_dict[chave][sigla_obra] = preco_m2
+            df_sub = formatar_matriz_exibicao(sub)
+            # Recuo da descrição conforme a profundidade do código abaixo do expandido
+            profundidade = (df_sub["CÓDIGO"].str.count(r"\.") - codigo.count(".") - 1).clip(lower=0)
+            df_sub["DESCRIÇÃO"] = ["\u2003" * p + d for p, d in zip(profundidade, df_sub["DESCRIÇÃO"])]
+            st.dataframe(df_sub.rename(columns=renomear), use_container_width=True, hide_index=True)
+
+def _render_grupos(matriz_unitaria, monday_df, versoes_fontes, area_simulada_val, renomear):
+    """Tabela de comparação entre grupos de obras e seu Excel"""
+    opcoes = ["Nenhum"] + list(CAMPOS_AGRUPAMENTO)
+    campo = st.selectbox("Comparar grupos por", opcoes, key="agrupar_eap")
+    if campo == "Nenhum" or not matriz_unitaria["obras"]:
+        return
     
-    # Gera linhas da matriz
-    for codigo in sorted(codigos):
-        desc_original = descricoes.get(codigo, "")
-        desc_limpa = re.sub(r"^Item\s*", "", desc_original, flags=re.IGNORECASE)
-        desc_limpa = re.sub(r"\s+", " ", desc_limpa).strip()
-        
-        linha = {"CÓDIGO": codigo, "DESCRIÇÃO": desc_limpa}
-        valores_obras = []
-        valores_formatados = []
+    grupos = process_matriz_grupos(
+        matriz_unitaria, campo, monday_df, matriz_unitaria["obras"], versoes_fontes=versoes_fontes
+    )
+    grupos = simular_area(grupos, area_simulada_val)
+    st.markdown(f"#### Média por {campo.lower()}")
+    st.dataframe(formatar_matriz_exibicao(grupos).rename(columns=renomear), use_container_width=True, hide_index=True)
+    
+    _botao_excel(
+        f"Baixar Excel por {campo.lower()}", [(campo, grupos)], renomear,
+        f"comparacao_{campo.lower()}.xlsx", key="baixar-grupos-eap"
+    )
+
+@st.cache_resource(max_entries=2, show_spinner="Calculando semelhanças entre obras...")
+def indice_obras_semelhantes(versoes, _df_eaps, _eaps_dados, _projetos_dados, _monday_df, _incc_df_eap):
+    """
+    IndiceSimilaridade de todas as obras com EAP, construído uma vez por
+    ``versoes`` (versões das fontes da matriz + versão dos filtros).
+    
+    O perfil de custos é a matriz EAP unitária dessas obras; o cálculo passa
+    por process_eap_matrix sem o cache da matriz inteira, mas aproveita as
+    colunas já calculadas em _cache_colunas_eap.
+    """
+    board = _df_eaps.assign(Sigla=coluna_sigla(_df_eaps).astype(str)).drop_duplicates('Sigla')
+    board = board[board['Sigla'] != '']
+    siglas = board['Sigla'].tolist()
+    matriz = process_eap_matrix.__wrapped__(
+        _eaps_dados, _projetos_dados, siglas, _monday_df, _incc_df_eap, versoes_fontes=versoes[:-1]
+    )
+    perfis = matriz["valores"].reindex(columns=siglas).to_numpy().T
+    categorias = {
+        campo: (board[f'{campo}_Norm'] if f'{campo}_Norm' in board.columns
+                else board[campo].fillna('').astype(str).map(normalizar_texto_busca)).astype(object).to_numpy()
+        for campo in COLUNAS_FILTRO_TEXTO if campo in board.columns
+    }
+    areas = board['Area_Numeric'].to_numpy(dtype=float) if 'Area_Numeric' in board.columns else np.full(len(board), np.nan)
+    return IndiceSimilaridade(siglas, areas, categorias, perfis)
+
+def _usar_obras_filtro(siglas):
+    st.session_state["obras"] = list(siglas)
+
+def render_obras_semelhantes(df_eaps, versao_filtros):
+    """Ação "encontrar semelhantes": as k obras mais parecidas com uma obra escolhida"""
+    if 'Obras' not in df_eaps.columns or df_eaps.empty:
+        return
+    todas_siglas = sorted(s for s in coluna_sigla(df_eaps).astype(str).unique() if s)
+    with st.expander("Encontrar obras semelhantes"):
+        col_ref, col_k = st.columns([3, 1])
+        with col_ref:
+            referencia = st.selectbox(
+                "Obra de referência", todas_siglas,
+                index=None, placeholder="Escolha uma obra", key="semelhantes_referencia"
+            )
+        with col_k:
+            k = st.number_input("Quantidade", min_value=1, max_value=50, value=5, key="semelhantes_k")
+        if not referencia:
+            return
         
-        if selected_obras:
-            for sigla in selected_obras:
-                valor = grupo_dict.get((codigo, descricoes.get(codigo, "")), {}).get(sigla, "")
-                valor_final = valor
-                
-                # Aplica INCC se disponível
-                if _incc_df_eap is not None and valor and str(valor).strip() not in ['', 'nan', 'none']:
-                    try:
-                        val_str = re.sub(r"[^0-9.,]", "", str(valor))
-                        if val_str:
-                            if "," in val_str:
-                                val_str = val_str.replace(".", "").replace(",", ".")
-                            custo_raw = float(val_str)
-                            
-                            data_base_obra = data_ref_dict.get(sigla, "")
-                            area_obra_str = area_m2_dict_monday.get(sigla, "")
-                            
-                            if not area_obra_str:
-                                for nome_monday, area_monday in area_m2_dict_monday.items():
-                                    if sigla.lower() in nome_monday.lower():
-                                        area_obra_str = area_monday
-                                        break
-                            
-                            try:
-                                area_real = float(str(area_obra_str).replace('.', '').replace(',', '.')) if area_obra_str and str(area_obra_str).strip() else 1.0
-                            except:
-                                area_real = 1.0
-                            
-                            valor_unitario_real = calcular_valor_m2(custo_raw, area_real, data_base_obra, _incc_df_eap)
-                            
-                            if area_simulada_val and area_simulada_val > 0:
-                                valor_final = valor_unitario_real * area_simulada_val 
-                            else:
-                                valor_final = valor_unitario_real
-                    except:
-                        valor_final = valor
-                        
-                linha[sigla] = f"{valor_final:.2f}".replace(".", ",") if valor_final not in [None, ""] else ""
-                valores_formatados.append(valor_final)
-                
-                try:
-                    if isinstance(valor_final, (int, float)):
-                        valores_obras.append(float(valor_final))
-                    else:
-                        val_str = re.sub(r"[^0-9.,]", "", str(valor_final))
-                        if val_str:
-                            if "," in val_str:
-                                val_str = val_str.replace(".", "").replace(",", ".")
-                            valores_obras.append(float(val_str))
-                except:
-                    pass
+        eaps_dados, projetos_dados, monday_df, incc_df_eap, versoes_fontes, tem_eaps = \
+            _carregar_fontes_eap(todas_siglas)
+        if not tem_eaps:
+            st.info("Nenhum dado encontrado na coleção EAPS.")
+            return
+        indice = indice_obras_semelhantes(
+            versoes_fontes + (versao_filtros,), df_eaps, eaps_dados, projetos_dados, monday_df, incc_df_eap
+        )
+        vizinhos = indice.vizinhos(referencia, int(k))
+        if not vizinhos:
+            st.info("Nenhuma outra obra para comparar.")
+            return
         
-        tem_valor = any(v not in [None, "", 0] for v in valores_formatados)
-        if tem_valor:
-            if valores_obras:
-                media = sum(valores_obras) / len(valores_obras)
-                linha["Média"] = f"{media:.2f}".replace(".", ",")
-            else:
-                linha["Média"] = ""
-            matriz_final.append(linha)
+        board = df_eaps.assign(Sigla=coluna_sigla(df_eaps).astype(str)).drop_duplicates('Sigla').set_index('Sigla')
+        siglas = [sigla for sigla, _ in vizinhos]
+        colunas = [c for c in ('Obras', 'Area_Display', 'Local', 'Arquitetura', 'Construtora') if c in board.columns]
+        tabela = board.loc[siglas, colunas].reset_index(drop=True)
+        tabela.insert(0, "Distância", [f"{d:.2f}".replace(".", ",") for _, d in vizinhos])
+        st.dataframe(tabela.rename(columns={'Area_Display': 'Área'}), use_container_width=True, hide_index=True)
+        st.button(
+            "Comparar estas obras na matriz", key="semelhantes_usar",
+            on_click=_usar_obras_filtro, args=([referencia] + siglas,)
+        )
+
+def _carregar_fontes_eap(siglas, revisoes=None):
+    """
+    EAPs das obras ``siglas``, Monday e INCC, com as versões de cada fonte.
+    
+    Retorna (eaps, projetos, monday_df, incc_df, versoes_fontes, tem_eaps). A
+    matriz materializada é preferida (só as linhas dessas obras); sem ela, as
+    EAPs brutas. A data de hoje entra em ``versoes_fontes``: define o fator
+    INCC de data base igual a hoje.
     
-    return matriz_final
+    A matriz materializada contém sempre a revisão mais recente de cada obra.
+    A interface não oferece escolha de revisão; ``revisoes`` ({projeto_id:
+    eap_id}) existe para quem fixa uma revisão e faz a leitura ir às EAPs
+    brutas.
+    """
+    matriz_materializada = None if revisoes else get_eap_matriz_data(siglas or [])
+    if matriz_materializada is None:
+        # Coleção materializada ainda não construída: usa as EAPs brutas
+        eaps_dados, projetos_dados, versao_eaps = get_eap_data(filter_version=EAPFilterConfig.versao(), revisoes=revisoes)
+        tem_eaps = bool(eaps_dados)
+    else:
+        eaps_dados, versao_eaps = matriz_materializada
+        projetos_dados = {}
+        tem_eaps = True
+    incc_df_eap, versao_incc = load_incc_data()
+    monday_df, versao_monday = None, None
+    if tem_eaps:
+        board_name, monday_df, versao_monday = get_monday_data()
+    versoes_fontes = (versao_eaps, versao_monday, versao_incc, datetime.now().date().isoformat())
+    return eaps_dados, projetos_dados, monday_df, incc_df_eap, versoes_fontes, tem_eaps
 
-def render_eap_section(selected_obras, area_simulada_val=None):
+def render_eap_section(selected_obras, area_simulada_val=None, areas_simuladas=None, consulta_busca=None):
     """Renderiza a seção principal EAP"""
     try:
-        eaps_dados, projetos_dados = get_eap_data(filter_version=9)
-        incc_df_eap = load_incc_data()
+        eaps_dados, projetos_dados, monday_df, incc_df_eap, versoes_fontes, tem_eaps = \
+            _carregar_fontes_eap(selected_obras)
         
-        if eaps_dados:
-            board_name, monday_df = get_monday_data()
-            matriz_final = process_eap_matrix(
-                eaps_dados, projetos_dados, selected_obras, monday_df, incc_df_eap, area_simulada_val
+        if tem_eaps:
+            matriz = process_eap_matrix(
+                eaps_dados, projetos_dados, selected_obras, monday_df, incc_df_eap, versoes_fontes=versoes_fontes
             )
+            matriz_unitaria = matriz
+            # A simulação de área é só um reescalonamento da matriz em cache
+            matriz = simular_area(matriz, area_simulada_val)
+            
+            # Estatísticas por código exibidas após as obras e destaque de outliers
+            col_estat, col_outlier = st.columns([3, 1])
+            with col_estat:
+                colunas_estat = st.multiselect(
+                    "Estatísticas", list(ESTATISTICAS_EAP), default=["Média"], key="estatisticas_eap"
+                )
+            with col_outlier:
+                opcoes_outlier = {"Nenhum": None, "IQR (1,5 × IQR)": "iqr", "Z-score (> 2)": "zscore"}
+                metodo_outlier = opcoes_outlier[st.selectbox("Destacar outliers", list(opcoes_outlier), key="outliers_eap")]
+            matriz = com_estatisticas(matriz, colunas_estat, metodo_outlier)
             
             nome_codigo, nome_descricao = "Código", "Descrição"
+            renomear = {"CÓDIGO": nome_codigo, "DESCRIÇÃO": nome_descricao}
             
-            if 'selecao_linhas' not in st.session_state or len(st.session_state['selecao_linhas']) != len(matriz_final):
-                st.session_state['selecao_linhas'] = [True] * len(matriz_final)
+            # Formatação única (strings pt-BR) para exibição e cópia
+            df_matriz = formatar_matriz_exibicao(matriz).rename(columns=renomear)
             
-            # Configura DataFrame
-            if selected_obras:
-                colunas = ["CÓDIGO", "DESCRIÇÃO"] + selected_obras + ["Média"]
-                df_matriz = pd.DataFrame(matriz_final)[colunas]
-                df_matriz = df_matriz.rename(columns={"CÓDIGO": nome_codigo, "DESCRIÇÃO": nome_descricao})
-                colunas_novas = [nome_codigo, nome_descricao] + selected_obras + ["Média"]
-                df_matriz = df_matriz[colunas_novas]
-            else:
-                colunas = ["CÓDIGO", "DESCRIÇÃO"]
-                df_matriz = pd.DataFrame(matriz_final)[colunas]
-                df_matriz = df_matriz.rename(columns={"CÓDIGO": nome_codigo, "DESCRIÇÃO": nome_descricao})
-                
-            # Converte para string
-            for obra in (selected_obras if selected_obras else []):
-                df_matriz[obra] = df_matriz[obra].astype(str)
-                
-            if "Média" in df_matriz.columns:
-                df_matriz["Média"] = df_matriz["Média"].astype(str)
+            if 'selecao_linhas' not in st.session_state or len(st.session_state['selecao_linhas']) != len(df_matriz):
+                st.session_state['selecao_linhas'] = [True] * len(df_matriz)
+            
+            _render_busca_itens(matriz, consulta_busca)
             
             # Configuração das colunas
             column_config = {
@@ -420,8 +585,9 @@ def render_eap_section(selected_obras, area_simulada_val=None):
                 for obra in selected_obras:
                     column_config[obra] = st.column_config.TextColumn(label=obra, width="small")
                     
-            if "Média" in df_matriz.columns:
-                column_config["Média"] = st.column_config.TextColumn(label="Média", width="small")
+            for nome in colunas_estat:
+                if nome in df_matriz.columns:
+                    column_config[nome] = st.column_config.TextColumn(label=nome, width="small")
             
             # Preparação para exibição
             df_matriz_exibir = df_matriz.copy()
@@ -469,16 +635,9 @@ def render_eap_section(selected_obras, area_simulada_val=None):
                 if mudou:
                     st.rerun()
             
-            # Download Excel
-            buffer = io.BytesIO()
-            df_matriz.to_excel(buffer, index=False, engine='openpyxl')
-            dados_bytes = buffer.getvalue()
-            st.download_button(
-                label="Baixar Excel",
-                data=dados_bytes,
-                file_name="relatorio_obras.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            # Download Excel (valores numéricos reais, não texto formatado), gerado só no clique
+            _botao_excel("Baixar Excel", [("Sheet1", matriz)], renomear, "relatorio_obras.xlsx")
+            _render_relatorio_completo(matriz, eaps_dados, monday_df, incc_df_eap, versoes_fontes, renomear)
             
             # Botão de cópia
             from st_copy import copy_button
@@ -501,6 +660,24 @@ def render_eap_section(selected_obras, area_simulada_val=None):
                     copied_label='Valores copiados!',
                     key='copiar-coluna-media-eap',
                 )
+            
+            # Subníveis sob demanda: só os códigos expandidos consultam o MongoDB
+            _render_subniveis(
+                matriz, monday_df, incc_df_eap, versoes_fontes, area_simulada_val,
+                colunas_estat, metodo_outlier, renomear
+            )
+            
+            # Comparação entre grupos de obras (Construtora, Arquitetura ou Local)
+            _render_grupos(
+                matriz_unitaria, monday_df, versoes_fontes, area_simulada_val, renomear
+            )
+            
+            # Várias áreas: um cenário por área a partir da mesma matriz unitária
+            if areas_simuladas:
+                _render_cenarios_area(
+                    matriz, areas_simuladas, st.session_state['selecao_linhas'], renomear,
+                    colunas_estat, metodo_outlier
+                )
                 
         else:
             st.info("Nenhum dado encontrado na coleção EAPS.")
@@ -518,7 +695,7 @@ def main():
     siglas_eaps = []
     
     try:
-        board_name, df = get_monday_data()
+        board_name, df, versao_monday = get_monday_data()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         df = None
@@ -526,9 +703,11 @@ def main():
     if df is not None and not df.empty:
         siglas_eaps = get_siglas_eaps()
         
-        df_eaps = df[df['Obras'].apply(lambda x: clean_and_format(x, tipo="sigla") in siglas_eaps)].copy() if 'Obras' in df.columns else df.copy()
+        df_eaps = df[coluna_sigla(df).isin(list(siglas_eaps)).to_numpy()].copy() if 'Obras' in df.columns else df.copy()
             
-        filters = render_filters(df_eaps, siglas_eaps)
+        versao_filtros = versao_dados_filtros(versao_monday, siglas_eaps)
+        consulta_busca = render_busca_global(df_eaps, versao_filtros)
+        filters = render_filters(df_eaps, siglas_eaps, versao_filtros)
     else:
         st.error("🚨 Nenhum dado encontrado. Verifique a conexão com o Monday.com.")
         st.info("💡 Verifique se suas credenciais estão corretas em .streamlit/secrets.toml")
@@ -536,9 +715,10 @@ def main():
         # Retornar early para evitar processamento adicional quando não há dados
         return
     
-    filtered_df, _ = apply_filters(df_eaps, filters, siglas_eaps)
+    indices = indices_filtro_monday(versao_monday, df) if versao_monday else None
+    filtered_df, _ = apply_filters(df_eaps, filters, siglas_eaps, indices, versao_filtros)
     if 'Obras' in filtered_df.columns:
-        todas_obras_filtradas = filtered_df['Obras'].apply(lambda x: clean_and_format(x, tipo="sigla")).unique().tolist()
+        todas_obras_filtradas = coluna_sigla(filtered_df).unique().tolist()
         if filters.get('obras') and len(filters['obras']) > 0:
             obras_filtradas = [obra for obra in todas_obras_filtradas if obra in filters['obras']]
         else:
@@ -546,7 +726,10 @@ def main():
     else:
         obras_filtradas = []
     
-    render_eap_section(obras_filtradas, filters.get('area_simulada_val'))
+    render_eap_section(
+        obras_filtradas, filters.get('area_simulada_val'), filters.get('areas_simuladas'), consulta_busca
+    )
+    render_obras_semelhantes(df_eaps, versao_filtros)
 
 if __name__ == "__main__":
     main()
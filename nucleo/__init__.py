@@ -0,0 +1,15 @@
+"""
+Núcleo de cálculo do TOOLS Calculator, sem Streamlit
+
+- config: Configuracao explícita (credenciais, caminhos) e coleções do MongoDB
+- cache: memoizar, cache em memória no estilo do st.cache_data, e CacheLRU
+- calculos: conversões numéricas, INCC, R$/m² e estatísticas
+- fontes: carregadores do Monday.com, das EAPs (MongoDB) e do INCC
+- matriz: motor da matriz EAP (colunas, agrupamentos, simulação de área)
+- busca: índices de trigramas, busca global aproximada e obras semelhantes
+- filtros: máscaras dos filtros do board (obras, textos, faixa de área)
+
+Importar o pacote não lê credenciais, não abre conexões e não importa
+streamlit, pymongo nem requests; a interface (main_interface,
+data_services, config_utils) é um adaptador sobre estes módulos.
+"""
@@ -0,0 +1,256 @@
+"""
+Índices de busca do núcleo, sem Streamlit: substring por trigramas nos
+campos de texto do Monday, busca global aproximada (tolerante a erros de
+digitação) e vizinhos mais próximos entre obras
+
+Os índices são construídos uma vez sobre os dados já carregados; a
+interface guarda cada um em st.cache_resource por versão dos dados.
+"""
+
+import bisect
+import heapq
+import re
+import numpy as np
+import pandas as pd
+from nucleo.fontes import normalizar_texto_busca
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas para busca por substring em textos já
+    normalizados (normalizar_texto_busca).
+    
+    Cada trigrama aponta para as posições dos textos que o contêm. Uma consulta
+    intersecta as listas dos seus trigramas para obter poucos candidatos e só
+    então confere a substring neles; consultas com menos de 3 caracteres
+    conferem todos os textos.
+    """
+
+    def __init__(self, textos):
+        self.textos = [str(t) for t in textos]
+        postagens = {}
+        for posicao, texto in enumerate(self.textos):
+            for trigrama in {texto[i:i + 3] for i in range(len(texto) - 2)}:
+                postagens.setdefault(trigrama, []).append(posicao)
+        self._postagens = {t: np.array(p, dtype=np.int64) for t, p in postagens.items()}
+
+    def __len__(self):
+        return len(self.textos)
+
+    def candidatos(self, consulta):
+        """Posições que contêm todos os trigramas da consulta (superconjunto do resultado)"""
+        if len(consulta) < 3:
+            return np.arange(len(self.textos))
+        listas = []
+        for trigrama in {consulta[i:i + 3] for i in range(len(consulta) - 2)}:
+            lista = self._postagens.get(trigrama)
+            if lista is None:
+                return np.empty(0, dtype=np.int64)
+            listas.append(lista)
+        listas.sort(key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            if not resultado.size:
+                break
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    def buscar(self, consultas):
+        """Máscara booleana dos textos que contêm alguma das consultas"""
+        encontrados = np.zeros(len(self.textos), dtype=bool)
+        for consulta in consultas:
+            consulta = normalizar_texto_busca(consulta)
+            for posicao in self.candidatos(consulta):
+                if not encontrados[posicao] and consulta in self.textos[posicao]:
+                    encontrados[posicao] = True
+        return encontrados
+
+# Edições toleradas por termo da busca global (termos com mais de 6 letras)
+BUSCA_DISTANCIA_MAX = 2
+
+_RE_TERMO_BUSCA = re.compile(r'[a-z0-9]+')
+
+def _distancia_limitada(a, b, limite):
+    """Distância de Levenshtein entre a e b, ou limite + 1 assim que ela passar de limite"""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if min(atual) > limite:
+            return limite + 1
+        anterior = atual
+    return anterior[-1]
+
+class IndiceBusca:
+    """
+    Busca aproximada (tolerante a erros de digitação) em textos curtos, como
+    nomes de obras e descrições da EAP.
+    
+    Os textos são quebrados em termos normalizados (normalizar_texto_busca).
+    Cada termo aponta para os textos que o contêm, e os trigramas de cada
+    termo do vocabulário apontam para o termo. Um termo da consulta casa com
+    termos do vocabulário iguais, com termos que começam por ele (só o último
+    termo, ainda em digitação) ou, via trigramas, com termos (ou, no último
+    termo, com o início deles) a até BUSCA_DISTANCIA_MAX edições. Todos os
+    termos da consulta precisam casar.
+    """
+
+    # Prefixos muito curtos casam com quase todo o vocabulário
+    PREFIXO_MAX_TERMOS = 200
+
+    def __init__(self, textos):
+        self.textos = [str(t) for t in textos]
+        self._documentos = {}
+        for posicao, texto in enumerate(self.textos):
+            for termo in set(_RE_TERMO_BUSCA.findall(normalizar_texto_busca(texto))):
+                self._documentos.setdefault(termo, []).append(posicao)
+        self._vocabulario = sorted(self._documentos)
+        self._trigramas = {}
+        for termo in self._vocabulario:
+            for trigrama in self._trigramas_termo(termo):
+                self._trigramas.setdefault(trigrama, []).append(termo)
+
+    def __len__(self):
+        return len(self.textos)
+
+    @staticmethod
+    def _trigramas_termo(termo):
+        marcado = f" {termo} "
+        return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+    @staticmethod
+    def _distancia_max(termo):
+        return 0 if len(termo) <= 3 else 1 if len(termo) <= 6 else BUSCA_DISTANCIA_MAX
+
+    def _termos_parecidos(self, termo, prefixo):
+        """Termos do vocabulário que casam com ``termo`` e a nota de cada um (1 = igual)"""
+        notas = {}
+        if termo in self._documentos:
+            notas[termo] = 1.0
+        if prefixo:
+            inicio = bisect.bisect_left(self._vocabulario, termo)
+            for candidato in self._vocabulario[inicio:inicio + self.PREFIXO_MAX_TERMOS]:
+                if not candidato.startswith(termo):
+                    break
+                notas.setdefault(candidato, 0.9)
+        limite = self._distancia_max(termo)
+        if limite:
+            trigramas = self._trigramas_termo(termo)
+            compartilhados = {}
+            for trigrama in trigramas:
+                for candidato in self._trigramas.get(trigrama, ()):
+                    compartilhados[candidato] = compartilhados.get(candidato, 0) + 1
+            # Cada edição destrói no máximo 3 trigramas
+            minimo = max(1, len(trigramas) - 3 * limite)
+            for candidato, n in compartilhados.items():
+                if n >= minimo and candidato not in notas:
+                    distancia = _distancia_limitada(termo, candidato, limite)
+                    if prefixo and distancia > limite:
+                        distancia = _distancia_limitada(termo, candidato[:len(termo)], limite)
+                    if distancia <= limite:
+                        notas[candidato] = 0.8 - 0.2 * distancia / limite
+        return notas
+
+    def buscar(self, consulta, limite=10):
+        """
+        Até ``limite`` pares (posição do texto, relevância entre 0 e 1), do
+        mais relevante para o menos; empates favorecem os textos mais curtos.
+        """
+        termos = _RE_TERMO_BUSCA.findall(normalizar_texto_busca(consulta))
+        if not termos:
+            return []
+        pontuacao = None
+        for i, termo in enumerate(termos):
+            notas_termo = {}
+            for parecido, nota in self._termos_parecidos(termo, prefixo=i == len(termos) - 1).items():
+                for posicao in self._documentos[parecido]:
+                    if nota > notas_termo.get(posicao, 0):
+                        notas_termo[posicao] = nota
+            if pontuacao is None:
+                pontuacao = notas_termo
+            else:
+                pontuacao = {p: pontuacao[p] + nota for p, nota in notas_termo.items() if p in pontuacao}
+            if not pontuacao:
+                return []
+        melhores = heapq.nsmallest(
+            limite, pontuacao.items(), key=lambda item: (-item[1], len(self.textos[item[0]]), item[0])
+        )
+        return [(posicao, nota / len(termos)) for posicao, nota in melhores]
+
+# Peso de cada característica na distância entre obras (IndiceSimilaridade)
+PESOS_SIMILARIDADE = {"Area": 1.0, "Local": 0.5, "Arquitetura": 0.5, "Construtora": 0.25, "EAP": 1.0}
+
+class IndiceSimilaridade:
+    """
+    Vizinhos mais próximos entre obras: área, local, arquitetura, construtora
+    e perfil de custos da EAP.
+    
+    As características são normalizadas uma única vez na construção:
+    
+    - área: log da área padronizado (média 0, desvio 1); sem área, a média
+    - perfil da EAP: log1p do valor de cada código, padronizado por código;
+      códigos sem valor recebem a mediana do código. A parte da EAP é
+      dividida por sqrt(nº de códigos) para pesar como uma única característica
+    - campos de texto: distância 0 quando iguais e 1 quando diferentes ou vazios
+    
+    A distância ao quadrado é a soma ponderada (PESOS_SIMILARIDADE) dessas
+    partes, calculada de uma vez contra todas as obras.
+    """
+
+    def __init__(self, siglas, areas, categorias, perfis, pesos=None):
+        pesos = {**PESOS_SIMILARIDADE, **(pesos or {})}
+        self.siglas = list(siglas)
+        self._posicao = {sigla: i for i, sigla in enumerate(self.siglas)}
+        
+        area = np.log(np.where(np.asarray(areas, dtype=float) > 0, areas, np.nan))
+        area_z = np.nan_to_num(self._padronizar(area[:, None]))
+        
+        perfis = np.asarray(perfis, dtype=float).reshape(len(self.siglas), -1)
+        perfis = np.log1p(np.where(perfis > 0, perfis, np.nan))
+        if perfis.shape[1]:
+            with np.errstate(all="ignore"):
+                medianas = np.nanmedian(perfis, axis=0)
+            perfis = np.where(np.isnan(perfis), np.nan_to_num(medianas), perfis)
+            perfis_z = np.nan_to_num(self._padronizar(perfis)) / np.sqrt(perfis.shape[1])
+        else:
+            perfis_z = perfis
+        
+        self._numericas = np.hstack([np.sqrt(pesos["Area"]) * area_z, np.sqrt(pesos["EAP"]) * perfis_z])
+        # Vazio vira -1 e nunca casa, nem com outro vazio
+        self._categoricas = []
+        for campo, valores in categorias.items():
+            codigos, rotulos = pd.factorize(pd.Series(valores, dtype=object).fillna(""))
+            vazio = np.flatnonzero(rotulos == "")
+            if vazio.size:
+                codigos = np.where(codigos == vazio[0], -1, codigos)
+            self._categoricas.append((pesos.get(campo, 0.0), codigos))
+
+    @staticmethod
+    def _padronizar(matriz):
+        with np.errstate(all="ignore"):
+            desvio = np.nanstd(matriz, axis=0)
+            return (matriz - np.nanmean(matriz, axis=0)) / np.where(desvio > 0, desvio, 1.0)
+
+    def __len__(self):
+        return len(self.siglas)
+
+    def distancias(self, sigla):
+        """Distância da obra ``sigla`` a todas as obras, na ordem de ``siglas``"""
+        i = self._posicao[sigla]
+        quadrado = np.square(self._numericas - self._numericas[i]).sum(axis=1)
+        for peso, codigos in self._categoricas:
+            quadrado += peso * ((codigos != codigos[i]) | (codigos < 0))
+        return np.sqrt(quadrado)
+
+    def vizinhos(self, sigla, k=5):
+        """Até k pares (sigla, distância) das obras mais próximas, sem a própria obra"""
+        distancias = self.distancias(sigla)
+        distancias[self._posicao[sigla]] = np.inf
+        k = min(k, len(self.siglas) - 1)
+        if k <= 0:
+            return []
+        mais_proximas = np.argpartition(distancias, k - 1)[:k]
+        mais_proximas = mais_proximas[np.argsort(distancias[mais_proximas], kind="stable")]
+        return [(self.siglas[i], float(distancias[i])) for i in mais_proximas]
@@ -0,0 +1,115 @@
+"""
+Cache em memória do núcleo, sem Streamlit
+
+``memoizar`` guarda o resultado por argumentos como o st.cache_data:
+parâmetros com prefixo ``_`` ficam fora da chave (DataFrames e listas
+grandes, identificados por um token de versão passado em outro parâmetro) e
+``__wrapped__`` chama a função sem cache. Diferente do st.cache_data, o valor
+não é copiado a cada acesso: quem recebe não deve alterá-lo.
+
+``CacheLRU`` é o dicionário limitado e protegido por lock para caches
+mantidos à mão (colunas da matriz, resultados de filtros), que são
+consultados e descartados por várias sessões ao mesmo tempo.
+"""
+
+import functools
+import inspect
+import threading
+import time
+
+def _chave(valor):
+    """Forma imutável (e hashable) de um argumento; listas e tuplas com o mesmo conteúdo coincidem"""
+    if isinstance(valor, (list, tuple)):
+        return tuple(_chave(v) for v in valor)
+    if isinstance(valor, dict):
+        return ("dict",) + tuple(sorted(((repr(k), _chave(v)) for k, v in valor.items()), key=lambda kv: kv[0]))
+    if isinstance(valor, (set, frozenset)):
+        return ("set",) + tuple(sorted(repr(v) for v in valor))
+    hash(valor)
+    return valor
+
+class CacheLRU:
+    """
+    Dicionário compartilhado entre threads com no máximo ``max_entradas``
+    (None = sem limite); as entradas usadas há mais tempo saem primeiro.
+    O valor é calculado fora do lock: duas threads podem calcular a mesma
+    chave, e a última gravação prevalece.
+    """
+
+    def __init__(self, max_entradas=None):
+        self.max_entradas = max_entradas
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        """Valor de ``chave`` (marcada como usada agora) ou ``padrao``"""
+        with self._lock:
+            # Retirar e reinserir mantém o dicionário em ordem de uso
+            valor = self._entradas.pop(chave, self)
+            if valor is self:
+                return padrao
+            self._entradas[chave] = valor
+            return valor
+
+    def guardar(self, chave, valor):
+        """Grava ``chave`` e descarta as menos usadas acima do limite"""
+        with self._lock:
+            self._entradas.pop(chave, None)
+            self._entradas[chave] = valor
+            while self.max_entradas and len(self._entradas) > self.max_entradas:
+                self._entradas.pop(next(iter(self._entradas)))
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+def memoizar(ttl=None, max_entradas=None):
+    """
+    Decorator de cache por argumentos, compartilhado entre threads.
+
+    ``ttl`` em segundos (None = sem expiração); com ``max_entradas`` as
+    entradas usadas há mais tempo saem primeiro. A função decorada ganha
+    ``limpar()``.
+    """
+    def decorador(funcao):
+        assinatura = inspect.signature(funcao)
+        fora_da_chave = {nome for nome in assinatura.parameters if nome.startswith("_")}
+        entradas = {}
+        lock = threading.Lock()
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            try:
+                chave = _chave([(nome, valor) for nome, valor in argumentos.arguments.items()
+                                if nome not in fora_da_chave])
+            except TypeError:
+                raise TypeError(
+                    f"{funcao.__name__}: argumento sem hash na chave do cache; "
+                    "use o prefixo _ no parâmetro e passe um token de versão"
+                ) from None
+            agora = time.monotonic()
+            with lock:
+                # Retirar e reinserir mantém o dicionário em ordem de uso
+                entrada = entradas.pop(chave, None)
+                if entrada is not None and (ttl is None or agora - entrada[0] < ttl):
+                    entradas[chave] = entrada
+                    return entrada[1]
+            valor = funcao(*args, **kwargs)
+            with lock:
+                entradas[chave] = (agora, valor)
+                while max_entradas and len(entradas) > max_entradas:
+                    entradas.pop(next(iter(entradas)), None)
+            return valor
+
+        def limpar():
+            with lock:
+                entradas.clear()
+
+        envoltorio.limpar = limpar
+        return envoltorio
+    return decorador
@@ -0,0 +1,305 @@
+"""
+Cálculos do núcleo: conversão de preços e áreas, correção pelo INCC e
+estatísticas por código da matriz EAP
+"""
+
+import json
+import re
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+def parse_valor_numerico(val):
+    """Converte preço em texto (pt-BR ou en) para float; None se vazio ou inválido"""
+    if val is None or isinstance(val, bool):
+        return None
+    if isinstance(val, (int, float)):
+        return None if pd.isna(val) else float(val)
+    
+    s = str(val).strip()
+    if s.lower() in ["", "nan", "none"]:
+        return None
+        
+    val_str = re.sub(r"[^0-9.,]", "", s)
+    if not val_str:
+        return None
+    if "," in val_str:
+        val_str = val_str.replace(".", "").replace(",", ".")
+    try:
+        return float(val_str)
+    except ValueError:
+        return None
+
+def parse_valores_numericos(valores):
+    """
+    Versão vetorizada da conversão de preços para uma sequência de valores.
+    
+    Números (o preço já convertido da matriz materializada) são mantidos como
+    estão. Os demais valores são tratados como texto: mantém só dígitos,
+    ponto e vírgula e, havendo vírgula, interpreta no formato pt-BR. Vazios e
+    inválidos viram NaN.
+    """
+    serie = pd.Series(valores)
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype(float)
+    serie = serie.astype(object)
+    # Passar um float por str() estragaria a notação científica ("1e-05" viraria 105)
+    if pd.api.types.infer_dtype(serie, skipna=True) in ("string", "empty"):
+        numeros = pd.Series(False, index=serie.index)
+    else:
+        numeros = serie.map(type).isin((int, float, np.float64, np.int64))
+    limpo = serie.astype(str).str.replace(r"[^0-9.,]", "", regex=True)
+    com_virgula = limpo.str.contains(",", regex=False)
+    limpo = limpo.where(~com_virgula, limpo.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    resultado = pd.to_numeric(limpo, errors="coerce")
+    if numeros.any():
+        resultado[numeros] = serie[numeros].astype(float)
+    return resultado
+
+AREAS_SIMULADAS_MAX = 50
+
+def parse_areas_simuladas(texto):
+    """
+    Lê as áreas de simulação digitadas: um valor ("500"), uma lista separada
+    por ponto e vírgula ("300; 500; 800; 1.200") ou uma faixa com passo
+    ("300-1.200/300"). Números no formato pt-BR.
+    
+    Retorna a lista ordenada de áreas positivas, sem repetições; levanta
+    ValueError se algum trecho for inválido.
+    """
+    def _numero(parte):
+        valor = float(parte.strip().replace('.', '').replace(',', '.'))
+        if not valor > 0:
+            raise ValueError(f"Área inválida: {parte}")
+        return valor
+    
+    areas = set()
+    for trecho in str(texto or "").split(";"):
+        trecho = trecho.strip()
+        if not trecho:
+            continue
+        if "-" in trecho:
+            faixa, _, passo = trecho.partition("/")
+            inicio, fim = (_numero(p) for p in faixa.split("-", 1))
+            passo = _numero(passo) if passo.strip() else (fim - inicio) or 1.0
+            if fim < inicio or (fim - inicio) / passo + 1 > AREAS_SIMULADAS_MAX:
+                raise ValueError(f"Faixa de áreas inválida: {trecho}")
+            areas.update(np.arange(inicio, fim + passo * 1e-6, passo).round(6).tolist())
+        else:
+            areas.add(_numero(trecho))
+    if len(areas) > AREAS_SIMULADAS_MAX:
+        raise ValueError(f"Máximo de {AREAS_SIMULADAS_MAX} áreas por simulação")
+    return sorted(areas)
+
+def clean_and_format(val, tipo="str"):
+    """Função utilitária para limpeza e formatação de dados"""
+    if pd.isna(val) or val is None or str(val).strip().lower() in ["nan", "none", ""]:
+        return ""
+    
+    s = str(val).strip()
+    
+    if tipo == "sigla":
+        for sep in ["-", " "]:
+            if sep in s:
+                return s.split(sep)[0].strip()
+        return s
+    
+    if tipo == "reais":
+        try:
+            s = s.replace(" ", "")
+            if s.count(",") == 1 and s.count(".") >= 1:
+                s = s.replace(".", "").replace(",", ".")
+            elif s.count(",") == 1:
+                s = s.replace(",", ".")
+            val_float = float(s)
+            return f"R$ {val_float:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        except:
+            return s
+    
+    if tipo == "area":
+        try:
+            s = s.replace(" ", "")
+            if "," in s and "." in s:
+                s = s.replace(".", "").replace(",", ".")
+            elif "," in s:
+                s = s.replace(",", ".")
+            return str(int(round(float(s))))
+        except:
+            return s
+    
+    if tipo == "json" and s.startswith("{") and s.endswith("}"):
+        try:
+            return json.dumps(eval(s), ensure_ascii=False)
+        except:
+            return s
+    
+    return s
+
+def format_indice_incc(val, val_str=None):
+    """Formata índice INCC"""
+    if val is None:
+        return '—'
+    try:
+        val_num = float(val.replace('.', '').replace(',', '.')) if isinstance(val, str) else float(val)
+        return f"{round(val_num, 2):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    except:
+        return str(val)
+
+def format_area_total(val):
+    """Formata área total"""
+    if val is None or not isinstance(val, (int, float)):
+        return '—'
+    return f"{int(round(val)):,}".replace(",", ".")
+
+def calcular_valor_m2(custo, area, data_base, incc_df):
+    """Calcula valor por m² ajustado pelo INCC"""
+    if not area or area == 0:
+        return None
+    
+    hoje = pd.to_datetime(datetime.now().date())
+    data_base_dt = pd.to_datetime(data_base).date() if data_base else None
+    
+    if not data_base_dt or data_base_dt == hoje.date():
+        return custo / area if data_base_dt else None
+    
+    data_retro = data_base_dt - relativedelta(months=2)
+    incc_sorted = incc_df.sort_values('data')
+    incc_retro = incc_sorted[incc_sorted['data'] <= pd.to_datetime(data_retro)]
+    
+    inccb = float(incc_retro.iloc[-1]['indice']) if not incc_retro.empty else float(incc_sorted.iloc[0]['indice'])
+    incca = float(incc_sorted.iloc[-1]['indice'])
+    
+    return (custo * incca) / (inccb * area)
+
+def parse_data_base(valor):
+    """
+    Converte a data base de uma EAP em datetime (None se vazia ou inválida).
+    
+    Datas ISO (o formato gravado no MongoDB) usam datetime.fromisoformat; os
+    demais formatos seguem para pd.to_datetime.
+    """
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, str):
+        try:
+            return datetime.fromisoformat(valor.strip())
+        except ValueError:
+            pass
+    try:
+        data = pd.to_datetime(valor)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return None if pd.isna(data) else data.to_pydatetime()
+
+def fatores_incc(datas_base, incc_df):
+    """
+    Índices INCC usados por calcular_valor_m2, calculados para várias datas base.
+    
+    Retorna os arrays (incc_atual, incc_base): o valor corrigido de cada obra é
+    (custo * incc_atual) / (incc_base * area). Data base igual a hoje resulta
+    em fator 1; datas vazias ou inválidas resultam em NaN.
+    """
+    n = len(datas_base)
+    incc_atual = np.full(n, np.nan)
+    incc_base = np.full(n, np.nan)
+    hoje = datetime.now().date()
+    
+    posicoes, datas_retro = [], []
+    for i, data_base in enumerate(datas_base):
+        data_base_dt = parse_data_base(data_base)
+        if data_base_dt is None:
+            continue
+        data_base_dt = data_base_dt.date()
+        if data_base_dt == hoje:
+            incc_atual[i] = incc_base[i] = 1.0
+            continue
+        posicoes.append(i)
+        datas_retro.append(data_base_dt - relativedelta(months=2))
+    
+    if posicoes and incc_df is not None and not incc_df.empty:
+        incc_sorted = incc_df.sort_values('data')
+        datas_incc = pd.DatetimeIndex(incc_sorted['data'])
+        indices = incc_sorted['indice'].astype(float).to_numpy()
+        # Último índice com data <= data retroativa; sem nenhum, o primeiro da série
+        pos_retro = datas_incc.searchsorted(pd.DatetimeIndex(datas_retro), side='right') - 1
+        incc_base[posicoes] = indices[np.maximum(pos_retro, 0)]
+        incc_atual[posicoes] = indices[-1]
+        
+    return incc_atual, incc_base
+
+ESTATISTICAS_EAP = ("Média", "Mediana", "P25", "P75", "Desvio padrão", "Mínimo", "Máximo", "Nº obras")
+
+def estatisticas_linhas(valores):
+    """
+    Estatísticas por linha de uma matriz (código x obra) ignorando NaN:
+    média, mediana, P25/P75 (interpolação linear), desvio padrão amostral,
+    mínimo, máximo e número de valores válidos.
+    
+    Uma única ordenação por linha (NaN vão para o fim) serve para os quantis,
+    mínimo e máximo; nada é feito linha a linha em Python. Retorna um
+    DataFrame com as colunas de ESTATISTICAS_EAP.
+    """
+    v = np.asarray(valores, dtype=float)
+    n_linhas = v.shape[0]
+    validos = ~np.isnan(v)
+    n = validos.sum(axis=1)
+    tem = n > 0
+    
+    estat = {nome: np.full(n_linhas, np.nan) for nome in ESTATISTICAS_EAP}
+    estat["Nº obras"] = n.astype(float)
+    if v.size == 0 or not tem.any():
+        return pd.DataFrame(estat, columns=list(ESTATISTICAS_EAP))
+    
+    zerados = np.where(validos, v, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = zerados.sum(axis=1) / n
+        desvios = np.where(validos, v - media[:, np.newaxis], 0.0)
+        estat["Desvio padrão"] = np.sqrt((desvios ** 2).sum(axis=1) / (n - 1))
+    estat["Desvio padrão"][n < 2] = np.nan
+    estat["Média"] = media
+    
+    ordenado = np.sort(v, axis=1)
+    linhas = np.arange(n_linhas)
+    ultimo = np.maximum(n - 1, 0)
+    
+    def _quantil(q):
+        pos = ultimo * q
+        baixo = np.floor(pos).astype(int)
+        alto = np.minimum(baixo + 1, ultimo)
+        v_baixo, v_alto = ordenado[linhas, baixo], ordenado[linhas, alto]
+        return np.where(tem, v_baixo + (v_alto - v_baixo) * (pos - baixo), np.nan)
+    
+    estat["Mediana"] = _quantil(0.5)
+    estat["P25"] = _quantil(0.25)
+    estat["P75"] = _quantil(0.75)
+    estat["Mínimo"] = np.where(tem, ordenado[:, 0], np.nan)
+    estat["Máximo"] = np.where(tem, ordenado[linhas, ultimo], np.nan)
+    return pd.DataFrame(estat, columns=list(ESTATISTICAS_EAP))
+
+def outliers_linhas(valores, estatisticas, metodo="iqr", limite=None):
+    """
+    Marca as células fora do padrão da sua linha (máscara booleana do mesmo
+    formato de ``valores``), a partir de estatisticas_linhas:
+    
+    - ``iqr``: fora de [P25 - k*IQR, P75 + k*IQR], k = ``limite`` (padrão 1,5)
+    - ``zscore``: |valor - média| / desvio padrão acima de ``limite`` (padrão 2)
+    """
+    v = np.asarray(valores, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metodo == "iqr":
+            k = 1.5 if limite is None else limite
+            p25 = estatisticas["P25"].to_numpy()[:, np.newaxis]
+            p75 = estatisticas["P75"].to_numpy()[:, np.newaxis]
+            iqr = p75 - p25
+            fora = (v < p25 - k * iqr) | (v > p75 + k * iqr)
+        elif metodo == "zscore":
+            k = 2.0 if limite is None else limite
+            media = estatisticas["Média"].to_numpy()[:, np.newaxis]
+            desvio = estatisticas["Desvio padrão"].to_numpy()[:, np.newaxis]
+            fora = np.abs(v - media) / desvio > k
+        else:
+            raise ValueError(f"Método de outlier desconhecido: {metodo}")
+    return fora & ~np.isnan(v)
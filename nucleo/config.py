@@ -0,0 +1,97 @@
+"""
+Configuração explícita do núcleo de cálculo
+
+Nada é lido na importação: quem usa o núcleo monta uma Configuracao (ou
+Configuracao.do_ambiente()) e a passa aos carregadores. A interface Streamlit
+monta a sua a partir de st.secrets em config_utils.configuracao().
+"""
+
+import hashlib
+import json
+import os
+from nucleo.cache import memoizar
+
+MONDAY_API_URL = 'https://api.monday.com/v2'
+MONDAY_BOARD_ID_PADRAO = 926240878
+
+# Banco do MongoDB com as coleções de projetos, EAPs e matriz materializada
+MONGO_BANCO = 'ToolsConnect'
+
+INCC_CSV_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dados_dia01_indice.csv')
+
+class ErroConfiguracao(Exception):
+    """Configuração ausente ou inválida para a operação pedida"""
+
+class Configuracao:
+    """
+    Credenciais e caminhos usados pelos carregadores do núcleo.
+    
+    Só o que a operação usa precisa estar preenchido: as coleções exigem
+    ``mongo_uri`` e o board do Monday exige ``monday_api_key``; cálculos
+    sobre fontes já carregadas não exigem nada.
+    """
+    
+    def __init__(self, mongo_uri=None, monday_api_key=None, monday_board_id=MONDAY_BOARD_ID_PADRAO,
+                 incc_csv=INCC_CSV_PADRAO):
+        self.mongo_uri = mongo_uri
+        self.monday_api_key = monday_api_key
+        self.monday_board_id = int(monday_board_id)
+        self.incc_csv = incc_csv
+    
+    @classmethod
+    def do_ambiente(cls, ambiente=None):
+        """Configuração a partir de MONGO_URI, MONDAY_API_KEY, MONDAY_BOARD_ID e INCC_CSV"""
+        ambiente = os.environ if ambiente is None else ambiente
+        try:
+            return cls(
+                mongo_uri=ambiente.get("MONGO_URI") or None,
+                monday_api_key=ambiente.get("MONDAY_API_KEY") or None,
+                monday_board_id=ambiente.get("MONDAY_BOARD_ID") or MONDAY_BOARD_ID_PADRAO,
+                incc_csv=ambiente.get("INCC_CSV") or INCC_CSV_PADRAO,
+            )
+        except ValueError:
+            raise ErroConfiguracao(f"MONDAY_BOARD_ID inválido: {ambiente.get('MONDAY_BOARD_ID')}") from None
+    
+    def exigir(self, *campos):
+        """Levanta ErroConfiguracao se algum dos campos estiver vazio; retorna a própria configuração"""
+        faltando = [campo for campo in campos if not getattr(self, campo)]
+        if faltando:
+            raise ErroConfiguracao(f"Configuração ausente: {', '.join(faltando)}")
+        return self
+    
+    def __repr__(self):
+        # Sem as credenciais: a configuração pode aparecer em logs e mensagens de erro
+        return f"Configuracao(monday_board_id={self.monday_board_id}, incc_csv={self.incc_csv!r})"
+
+@memoizar()
+def _cliente_mongo(uri):
+    """Um cliente por URI no processo (o MongoClient mantém o próprio pool de conexões)"""
+    # pymongo só é importado por quem acessa o banco
+    from pymongo import MongoClient
+    return MongoClient(uri)
+
+def colecao_mongo(config, nome):
+    """Coleção ``nome`` do banco MONGO_BANCO (projetos, eaps, eap_matriz, eap_matriz_estado)"""
+    return _cliente_mongo(config.exigir("mongo_uri").mongo_uri)[MONGO_BANCO][nome]
+
+class EAPFilterConfig:
+    """
+    Regras declarativas do filtro de itens da EAP.
+    
+    Cada regra tem ``acao`` ("incluir" ou "excluir") e critérios opcionais:
+    ``prefixo`` (primeiro segmento do código), ``digitos`` (tamanho exato do
+    segundo segmento), ``faixas`` (intervalos inclusivos do segundo segmento)
+    e ``niveis`` (níveis aceitos). Um item passa se atender alguma regra de
+    inclusão e nenhuma de exclusão. Itens sem código seguem MANTER_SEM_CODIGO.
+    """
+    REGRAS = (
+        # Apenas códigos 00.001 até 00.042 (e seus subníveis)
+        {"acao": "incluir", "prefixo": "00", "digitos": 3, "faixas": ((1, 42),)},
+    )
+    MANTER_SEM_CODIGO = True
+    
+    @classmethod
+    def versao(cls):
+        """Hash das regras, usado na chave de cache dos carregadores de EAP"""
+        conteudo = json.dumps([cls.REGRAS, cls.MANTER_SEM_CODIGO], sort_keys=True)
+        return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:12]
@@ -0,0 +1,108 @@
+"""
+Filtros do board do Monday (obras, construtora, arquitetura, local e faixa
+de área), sem Streamlit: máscaras vetorizadas sobre o DataFrame de
+nucleo.fontes.carregar_monday
+
+A interface guarda os índices de indices_filtro e as posições de cada
+combinação (por chave_filtros) em st.cache_resource.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from nucleo.busca import IndiceTrigramas
+from nucleo.fontes import COLUNAS_FILTRO_TEXTO, normalizar_texto_busca
+from nucleo.matriz import coluna_sigla
+
+# Valor de filters['modo'] que une os critérios de texto em vez de intersectá-los
+MODO_QUALQUER = "Qualquer critério (OU/União)"
+
+def indices_filtro(monday_df):
+    """
+    Um IndiceTrigramas por campo de COLUNAS_FILTRO_TEXTO, construído sobre as
+    categorias de ``<campo>_Norm``.
+    """
+    return {
+        campo: IndiceTrigramas(monday_df[f'{campo}_Norm'].cat.categories)
+        for campo in COLUNAS_FILTRO_TEXTO
+        if f'{campo}_Norm' in monday_df.columns
+        and isinstance(monday_df[f'{campo}_Norm'].dtype, pd.CategoricalDtype)
+    }
+
+def mascara_substring(df, campo, opcoes, indice=None):
+    """
+    Linhas cujo ``campo`` contém (sem diferenciar maiúsculas nem acentos)
+    alguma das opções.
+    
+    Com o índice do board, a busca roda só sobre os valores distintos e volta
+    às linhas pelos códigos da categoria; sem ele, uma única regex percorre a
+    coluna normalizada ``<campo>_Norm``.
+    """
+    normalizada = df[f'{campo}_Norm'] if f'{campo}_Norm' in df.columns else \
+        df[campo].fillna('').astype(str).map(normalizar_texto_busca)
+    if indice is not None and isinstance(normalizada.dtype, pd.CategoricalDtype) \
+            and len(indice) == len(normalizada.cat.categories):
+        return indice.buscar(opcoes)[normalizada.cat.codes.to_numpy()]
+    padrao = "|".join(re.escape(normalizar_texto_busca(f)) for f in opcoes)
+    return normalizada.str.contains(padrao, regex=True).to_numpy()
+
+def chave_filtros(filters):
+    """Filtros em forma canônica: seleções sem ordem nem repetição, textos normalizados"""
+    def termos(valores):
+        return tuple(sorted({normalizar_texto_busca(v) for v in valores or []}))
+    return (
+        filters.get('modo'),
+        tuple(filters['area_range']) if filters.get('area_range') else None,
+        normalizar_texto_busca(filters['local']) if filters.get('local') else None,
+        frozenset(filters.get('obras') or ()),
+        termos(filters.get('construtora')),
+        termos(filters.get('arquitetura')),
+    )
+
+def mascara_filtros(df_eaps, filters, indices=None):
+    """
+    Máscara das linhas que passam nos filtros.
+    
+    Cada critério vira uma máscara booleana vetorizada (isin para obras,
+    busca por substring nos campos de texto, pelo índice de trigramas quando
+    ``indices`` vem de indices_filtro); o modo E/OU é só & ou | entre
+    as máscaras. As linhas mantêm a ordem do board.
+    """
+    indices = indices or {}
+    mascara = np.ones(len(df_eaps), dtype=bool)
+
+    # Aplicar filtros básicos que sempre se aplicam (independente do modo)
+    if 'Area_Numeric' in df_eaps.columns and filters.get('area_range'):
+        mascara &= df_eaps['Area_Numeric'].between(*filters['area_range']).to_numpy()
+
+    if filters.get('local'):
+        mascara &= mascara_substring(df_eaps, 'Local', [filters['local']], indices.get('Local'))
+
+    obras = filters.get('obras')
+    mascara_obras = coluna_sigla(df_eaps).isin(obras).to_numpy() if obras and 'Obras' in df_eaps.columns else None
+    
+    # Critérios de texto preenchidos cuja coluna existe no board
+    mascaras_texto = [
+        mascara_substring(df_eaps, campo, filters[chave], indices.get(campo))
+        for chave, campo in (('construtora', 'Construtora'), ('arquitetura', 'Arquitetura'))
+        if filters.get(chave) and campo in df_eaps.columns
+    ]
+
+    if filters.get('modo') == MODO_QUALQUER:
+        # No modo OR, o filtro de obras restringe antes da união dos demais
+        if mascara_obras is not None:
+            mascara &= mascara_obras
+        if filters.get('construtora') or filters.get('arquitetura'):
+            mascara &= np.logical_or.reduce(mascaras_texto) if mascaras_texto else False
+    else:
+        # Modo AND - INTERSEÇÃO REAL: só mostra registros que atendem TODOS os campos preenchidos
+        if mascara_obras is not None:
+            mascara &= mascara_obras
+        for mascara_texto in mascaras_texto:
+            mascara &= mascara_texto
+
+    return mascara
+
+def aplicar_filtros(df_eaps, filters, indices=None):
+    """Linhas de ``df_eaps`` que passam nos filtros (cópia, na ordem do board)"""
+    return df_eaps[mascara_filtros(df_eaps, filters, indices)].copy()
@@ -0,0 +1,850 @@
+"""
+Carregadores do núcleo: board do Monday.com, EAPs do MongoDB e série INCC
+
+Sem Streamlit: as coleções e a Configuracao chegam como argumentos, falhas
+do Monday levantam ErroFonte e cada carregador retorna também um token de
+versão do conteúdo (versao_conteudo). pymongo/bson e requests só são
+importados quando uma consulta é feita, e a coleta do INCC no site
+(requests, bs4) só quando o CSV está ausente ou desatualizado.
+"""
+
+import datetime
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Tuple
+import pandas as pd
+from nucleo.cache import memoizar
+from nucleo.config import EAPFilterConfig, INCC_CSV_PADRAO, MONDAY_API_URL
+
+_log = logging.getLogger(__name__)
+
+class ErroFonte(Exception):
+    """Falha ao ler uma fonte externa; ``dica`` complementa a mensagem exibida ao usuário"""
+    
+    def __init__(self, mensagem, dica=None):
+        super().__init__(mensagem)
+        self.dica = dica
+
+def versao_conteudo(*partes) -> str:
+    """
+    Token de versão (hash do conteúdo) publicado pelos carregadores.
+    
+    DataFrames são hasheados com pd.util.hash_pandas_object; os demais
+    objetos pela sua serialização JSON. Conteúdo igual gera o mesmo token.
+    """
+    h = hashlib.sha1()
+    for parte in partes:
+        if isinstance(parte, pd.DataFrame):
+            h.update(",".join(map(str, parte.columns)).encode("utf-8"))
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        else:
+            h.update(json.dumps(parte, default=str, ensure_ascii=False).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+def carregar_monday(config) -> Tuple[str, pd.DataFrame, str]:
+    """
+    Busca o board do Monday.com e retorna (nome do board, DataFrame processado, versão).
+    
+    Falhas de comunicação ou da API levantam ErroFonte com a mensagem para o usuário.
+    """
+    config.exigir("monday_api_key")
+    # requests só é importado por quem lê o board
+    import requests
+    query = f'''
+    query {{
+      boards(ids: [{config.monday_board_id}]) {{
+        name
+        columns {{ id title type }}
+        items_page(limit: 500) {{
+          items {{
+            id name
+            column_values {{ id text column {{ title }} }}
+          }}
+        }}
+      }}
+    }}
+    '''
+    
+    try:
+        response = requests.post(
+            MONDAY_API_URL, 
+            json={'query': query}, 
+            headers={'Authorization': config.monday_api_key, 'Content-Type': 'application/json'}
+        )
+        
+        if response.status_code == 401:
+            raise ErroFonte(
+                "🚨 Erro HTTP 401: API Key inválido! Verifique suas credenciais no arquivo .streamlit/secrets.toml",
+                dica="💡 Dica: Acesse https://monday.com/developers/apps para obter um API Key válido"
+            )
+        elif response.status_code != 200:
+            raise ErroFonte(f"Erro HTTP {response.status_code}: Falha na comunicação com Monday.com")
+            
+        data = response.json()
+        if 'errors' in data:
+            raise ErroFonte(f"Erro na API: {data['errors']}")
+            
+        board_info = data['data']['boards'][0]
+        board_name = board_info['name']
+        items = board_info['items_page']['items']
+        columns = {col['id']: col['title'] for col in board_info['columns']}
+        
+        rows = []
+        for item in items:
+            row = {'id': item['id'], 'name': item['name']}
+            for col_val in item['column_values']:
+                col_title = columns.get(col_val['id'], col_val['id'])
+                row[col_title] = col_val['text'] or ''
+            rows.append(row)
+            
+        df = pd.DataFrame(rows)
+        mapped_df = _process_monday_dataframe(df)
+        
+        return board_name, mapped_df, versao_conteudo(mapped_df)
+        
+    except ErroFonte:
+        raise
+    except Exception as e:
+        raise ErroFonte(f"Erro ao conectar com Monday.com: {e}") from e
+
+def _process_monday_dataframe(df):
+    """Processa e mapeia o DataFrame do Monday.com"""
+    mapped_df = pd.DataFrame()
+    mapped_df['Obras'] = df['name'] if 'name' in df.columns else df.get('Name', '')
+    
+    column_patterns = {
+        'Construtora': ['CONSTRUTORA', 'EMPRESA', 'BUILDER', 'CONTRACTOR'],
+        'Area': ['AREA', 'ÁREA', 'SIZE', 'TAMANHO'],
+        'Local': ['LOCAL', 'LOCATION', 'ENDERECO', 'ENDEREÇO', 'ADDRESS'],
+        'Arquitetura': ['ARQUITETURA', 'ARCHITECTURE', 'TIPO', 'TYPE', 'STYLE']
+    }
+    
+    for field, patterns in column_patterns.items():
+        mapped_df[field] = ''
+        for col in df.columns:
+            if any(pattern in col.upper() for pattern in patterns):
+                mapped_df[field] = df[col]
+                break
+    
+    mapped_df['Data'] = _extract_timeline_data(df)
+    
+    if 'Area' in mapped_df.columns:
+        mapped_df['Area_Numeric'] = mapped_df['Area'].apply(_convert_area)
+        mapped_df['Area_Display'] = mapped_df['Area']
+    
+    return _normalizar_colunas_filtro(mapped_df)
+
+# Colunas do Monday usadas nos filtros de texto (busca sem diferenciar maiúsculas nem acentos)
+COLUNAS_FILTRO_TEXTO = ('Construtora', 'Arquitetura', 'Local')
+
+def _normalizar_colunas_filtro(mapped_df):
+    """
+    Acrescenta as colunas derivadas usadas pelos filtros, calculadas uma única
+    vez por carga do board: ``Sigla`` (sigla da obra, categórica: poucas
+    siglas distintas e comparações por código) e ``<campo>_Norm`` (texto de
+    normalizar_texto_busca, também categórico) para cada campo de
+    COLUNAS_FILTRO_TEXTO.
+    """
+    # Mesmo resultado de clean_and_format(x, tipo="sigla"): corta no primeiro
+    # hífen ou, sem hífen, no primeiro espaço
+    obras = mapped_df['Obras'].fillna('').astype(str).str.strip()
+    obras = obras.where(~obras.str.lower().isin(['nan', 'none']), '')
+    antes_hifen = obras.str.split('-', n=1, regex=False).str[0]
+    antes_espaco = obras.str.split(' ', n=1, regex=False).str[0]
+    sigla = antes_hifen.where(obras.str.contains('-', regex=False), antes_espaco)
+    mapped_df['Sigla'] = sigla.str.strip().astype('category')
+    for campo in COLUNAS_FILTRO_TEXTO:
+        if campo in mapped_df.columns:
+            # Normaliza só os valores distintos; as categorias servem de base ao IndiceTrigramas
+            codigos, valores = pd.factorize(mapped_df[campo].fillna('').astype(str))
+            normalizados = pd.Series([normalizar_texto_busca(v) for v in valores], dtype=object)
+            mapped_df[f'{campo}_Norm'] = pd.Categorical(normalizados.to_numpy()[codigos])
+    return mapped_df
+
+def normalizar_texto_busca(texto):
+    """Texto sem espaços nas pontas, em minúsculas e sem acentos ("SÃO" e "sao" viram "sao")"""
+    texto = unicodedata.normalize('NFKD', str(texto).strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+def _extract_timeline_data(df):
+    """Extrai dados de timeline do DataFrame"""
+    for col in df.columns:
+        if 'TIMELINE' in col.upper():
+            def extrair_data_inicio(val):
+                if not val or pd.isna(val):
+                    return ''
+                partes = str(val).split('-')
+                if len(partes) >= 1:
+                    data_str = partes[0].strip()
+                    try:
+                        dt = pd.to_datetime(data_str, errors='coerce')
+                        return dt.strftime('%d/%m/%Y') if pd.notna(dt) else data_str
+                    except:
+                        return data_str
+                return val
+            return df[col].apply(extrair_data_inicio)
+    return ''
+
+def _convert_area(area_str):
+    """Converte string de área para float"""
+    if not area_str or pd.isna(area_str):
+        return 0.0
+    try:
+        return float(str(area_str).replace('.', '').replace(',', '.'))
+    except:
+        return 0.0
+
+# Tamanho do lote pedido ao servidor a cada round-trip do cursor de EAPs
+EAP_BATCH_SIZE = 200
+
+# Apenas os campos usados pela matriz são transferidos do MongoDB
+EAP_PROJECTION = {
+    "projeto_id": 1,
+    "dataBase": 1,
+    "itens.codEAP": 1,
+    "itens.descricao": 1,
+    "itens.nivel": 1,
+    "itens.preco_m2": 1,
+    "itens.preco": 1,
+}
+
+def _regex_faixa_fixa(inicio, fim):
+    """Regex para inteiros com a mesma largura (zeros à esquerda) entre inicio e fim"""
+    if not inicio:
+        return ""
+    if inicio == fim:
+        return inicio
+    if inicio[0] == fim[0]:
+        return inicio[0] + _regex_faixa_fixa(inicio[1:], fim[1:])
+    
+    resto = len(inicio) - 1
+    partes = []
+    primeiro, ultimo = int(inicio[0]), int(fim[0])
+    if inicio[1:] != "0" * resto:
+        partes.append(inicio[0] + _regex_faixa_fixa(inicio[1:], "9" * resto))
+        primeiro += 1
+    parte_final = None
+    if fim[1:] != "9" * resto:
+        parte_final = fim[0] + _regex_faixa_fixa("0" * resto, fim[1:])
+        ultimo -= 1
+    if primeiro <= ultimo:
+        digito = str(primeiro) if primeiro == ultimo else f"[{primeiro}-{ultimo}]"
+        partes.append(digito + ("[0-9]" * min(resto, 1)) + (f"{{{resto}}}" if resto > 1 else ""))
+    if parte_final:
+        partes.append(parte_final)
+    return partes[0] if len(partes) == 1 else "(?:" + "|".join(partes) + ")"
+
+def _regex_faixas(faixas, digitos=None):
+    """Regex do segundo segmento do código para uma lista de faixas numéricas"""
+    partes = []
+    for inicio, fim in sorted(faixas):
+        if digitos:
+            fim = min(fim, 10 ** digitos - 1)
+            if inicio <= fim:
+                partes.append(_regex_faixa_fixa(str(inicio).zfill(digitos), str(fim).zfill(digitos)))
+            continue
+        # Sem largura fixa: zeros à esquerda opcionais, uma alternativa por largura
+        for largura in range(len(str(inicio)), len(str(fim)) + 1):
+            ini_largura = max(inicio, 0 if largura == 1 else 10 ** (largura - 1))
+            fim_largura = min(fim, 10 ** largura - 1)
+            partes.append("0*" + _regex_faixa_fixa(str(ini_largura), str(fim_largura)))
+    return "(?:" + "|".join(partes) + ")" if partes else "(?!)"
+
+def _regex_regra_eap(regra):
+    """
+    Regex única de uma regra de EAPFilterConfig aplicada ao código bruto.
+    
+    Tolera espaços nas pontas (como str.strip) e usa apenas sintaxe aceita
+    tanto pelo módulo re quanto pelo $regexMatch do MongoDB.
+    """
+    prefixo = re.escape(regra["prefixo"]) if regra.get("prefixo") is not None else "[^.]*"
+    if regra.get("faixas"):
+        segmento = r"\." + _regex_faixas(regra["faixas"], regra.get("digitos"))
+    elif regra.get("digitos"):
+        segmento = r"\.[0-9]{%d}" % regra["digitos"]
+    else:
+        segmento = ""
+    return r"^\s*" + prefixo + segmento + r"(?:\.|\s*$)"
+
+def compilar_filtro_eap(regras, manter_sem_codigo=True):
+    """
+    Compila as regras do filtro de itens em um verificador rápido.
+    
+    As regras sem restrição de nível de cada ação são unidas em uma única
+    regex pré-compilada; o resultado por (código, nível) é memorizado, já que
+    os mesmos códigos se repetem em todas as EAPs.
+    Retorna uma função ``permitido(codEAP, nivel) -> bool``.
+    """
+    def _compilar_acao(incluir):
+        regras_acao = [r for r in regras if (r.get("acao", "incluir") == "incluir") == incluir]
+        sem_nivel = [_regex_regra_eap(r) for r in regras_acao if not r.get("niveis")]
+        combinada = re.compile("|".join(f"(?:{p})" for p in sem_nivel)).match if sem_nivel else None
+        por_nivel = [
+            (re.compile(_regex_regra_eap(r)).match, frozenset(r["niveis"]))
+            for r in regras_acao if r.get("niveis")
+        ]
+        return combinada, por_nivel
+    
+    inclusao, inclusao_por_nivel = _compilar_acao(True)
+    exclusao, exclusao_por_nivel = _compilar_acao(False)
+    
+    def _atende(combinada, por_nivel, codigo, nivel):
+        if combinada is not None and combinada(codigo):
+            return True
+        return any(nivel in niveis and match(codigo) for match, niveis in por_nivel)
+    
+    @functools.lru_cache(maxsize=65536)
+    def permitido(codEAP, nivel=None):
+        if not codEAP:
+            return manter_sem_codigo
+        codigo = codEAP if isinstance(codEAP, str) else str(codEAP)
+        return (_atende(inclusao, inclusao_por_nivel, codigo, nivel)
+                and not _atende(exclusao, exclusao_por_nivel, codigo, nivel))
+    
+    return permitido
+
+def mongo_filtro_itens_eap(regras, manter_sem_codigo=True, entrada="$itens"):
+    """
+    Traduz as mesmas regras para uma expressão ``$filter`` de agregação,
+    permitindo filtrar os itens no servidor antes da transferência.
+    """
+    codigo = {"$toString": {"$ifNull": ["$$item.codEAP", ""]}}
+    
+    def _cond_regra(regra):
+        conds = [{"$regexMatch": {"input": codigo, "regex": _regex_regra_eap(regra)}}]
+        if regra.get("niveis"):
+            conds.insert(0, {"$in": ["$$item.nivel", list(regra["niveis"])]})
+        return conds[0] if len(conds) == 1 else {"$and": conds}
+    
+    inclusoes = [_cond_regra(r) for r in regras if r.get("acao", "incluir") == "incluir"]
+    exclusoes = [_cond_regra(r) for r in regras if r.get("acao", "incluir") != "incluir"]
+    
+    cond = {"$or": inclusoes} if inclusoes else False
+    if exclusoes:
+        cond = {"$and": [cond, {"$not": [{"$or": exclusoes}]}]}
+    if manter_sem_codigo:
+        sem_codigo = {"$in": [{"$ifNull": ["$$item.codEAP", ""]}, ["", 0, False]]}
+        cond = {"$or": [sem_codigo, cond]}
+    
+    return {"$filter": {"input": {"$ifNull": [entrada, []]}, "as": "item", "cond": cond}}
+
+# Filtro de itens compilado uma única vez a partir de EAPFilterConfig
+item_eap_permitido = compilar_filtro_eap(EAPFilterConfig.REGRAS, EAPFilterConfig.MANTER_SEM_CODIGO)
+
+def _eap_pipeline(match=None, prefixo=None):
+    """
+    Pipeline de agregação das EAPs: filtra os itens no servidor com as regras
+    de EAPFilterConfig e transfere apenas os campos de EAP_PROJECTION.
+    
+    Com ``prefixo`` (ex.: "00.001"), só os itens abaixo desse código são
+    transferidos.
+    """
+    campos_itens = [k.split(".", 1)[1] for k in EAP_PROJECTION if k.startswith("itens.")]
+    projecao = {k: 1 for k in EAP_PROJECTION if "." not in k}
+    itens = mongo_filtro_itens_eap(EAPFilterConfig.REGRAS, EAPFilterConfig.MANTER_SEM_CODIGO)
+    if prefixo:
+        codigo = {"$toString": {"$ifNull": ["$$item.codEAP", ""]}}
+        regex = r"^\s*" + re.escape(prefixo.strip()) + r"\."
+        itens = {"$filter": {"input": itens, "as": "item", "cond": {"$regexMatch": {"input": codigo, "regex": regex}}}}
+    projecao["itens"] = {"$map": {
+        "input": itens,
+        "as": "item",
+        "in": {campo: f"$$item.{campo}" for campo in campos_itens},
+    }}
+    return [{"$match": match or {}}, {"$project": projecao}]
+
+# Índice composto que atende o $sort + $group/$first da EAP vigente por projeto
+EAP_INDICE_VIGENTE = [("projeto_id", 1), ("dataBase", -1), ("_id", -1)]
+
+def garantir_indices_eaps(eaps_collection):
+    """Cria (se necessário) o índice usado na seleção da EAP vigente"""
+    try:
+        eaps_collection.create_index(EAP_INDICE_VIGENTE, name="projeto_dataBase_vigente")
+    except Exception:
+        # Usuário sem permissão de escrita: a consulta funciona, só sem o índice
+        pass
+
+# Posição de cada tipo na ordem de comparação do BSON (null < números < texto < ... < data)
+_ORDEM_TIPOS_BSON = ((type(None), 0), (bool, 8), ((int, float), 1), (str, 2), (dict, 3), (datetime.datetime, 9))
+
+def _chave_bson(valor):
+    """Chave de ordenação de ``valor`` que segue a ordem do MongoDB entre tipos diferentes"""
+    for tipo, posicao in _ORDEM_TIPOS_BSON:
+        if isinstance(valor, tipo):
+            return (posicao, valor)
+    # ObjectId (e outros tipos BSON) entre objetos e booleanos
+    return (7, str(valor))
+
+def _ids_eaps_vigentes(eaps_collection, revisoes=None, projeto_ids=None):
+    """
+    Retorna o _id da EAP vigente de cada projeto: a de dataBase mais recente,
+    com empate resolvido pelo _id mais novo.
+    
+    projeto_id pode estar gravado como ObjectId em umas revisões e como texto
+    em outras: o servidor agrupa pelo valor bruto (usando o índice) e os
+    grupos do mesmo projeto são unidos aqui, vencendo o maior (dataBase, _id).
+    
+    ``revisoes`` ({projeto_id: eap_id}) fixa uma revisão específica para os
+    projetos informados no lugar da mais recente; ``projeto_ids`` restringe a
+    busca a esses projetos.
+    """
+    pipeline = [
+        {"$sort": {"projeto_id": 1, "dataBase": -1, "_id": -1}},
+        {"$group": {"_id": "$projeto_id", "eap_id": {"$first": "$_id"}, "dataBase": {"$first": "$dataBase"}}},
+    ]
+    if projeto_ids is not None:
+        pipeline.insert(0, {"$match": {"projeto_id": {"$in": list(projeto_ids)}}})
+    from bson import ObjectId
+    mais_recentes = {}
+    for grupo in eaps_collection.aggregate(pipeline):
+        chave = (_chave_bson(grupo.get("dataBase")), _chave_bson(grupo["eap_id"]))
+        atual = mais_recentes.get(str(grupo["_id"]))
+        if atual is None or chave > atual[0]:
+            mais_recentes[str(grupo["_id"])] = (chave, grupo["eap_id"])
+    vigentes = {projeto_id: eap_id for projeto_id, (_, eap_id) in mais_recentes.items()}
+    
+    for projeto_id, eap_id in (revisoes or {}).items():
+        if projeto_ids is not None and projeto_id not in projeto_ids:
+            continue
+        vigentes[str(projeto_id)] = ObjectId(eap_id) if ObjectId.is_valid(eap_id) else eap_id
+        
+    return list(vigentes.values())
+
+def _eap_cursor_vigentes(eaps_collection, revisoes=None):
+    """Cursor das EAPs vigentes (uma por projeto); revisões superadas não são transferidas"""
+    ids = _ids_eaps_vigentes(eaps_collection, revisoes)
+    return eaps_collection.aggregate(_eap_pipeline({"_id": {"$in": ids}}), batchSize=EAP_BATCH_SIZE)
+
+def _intern_str(val):
+    """Compartilha strings repetidas (códigos, descrições) entre documentos"""
+    return sys.intern(val) if isinstance(val, str) else val
+
+def _compactar_eap(eap, projetos_dados):
+    """
+    Converte um documento bruto de EAP na forma compacta usada pela matriz.
+    
+    Retorna um dicionário com ``projeto_id``, ``sigla``, ``dataBase`` e
+    ``itens``, onde cada item é a tupla ``(codigo, descricao, nivel, preco)``
+    e só contém os itens aprovados pelo filtro de códigos.
+    """
+    projeto_id = eap.get("projeto_id")
+    projeto_info = get_projeto_info_by_id(projeto_id, projetos_dados)
+    
+    itens = []
+    for item in eap.get('itens') or []:
+        # Já filtrados no servidor quando vindos de _eap_pipeline; a verificação
+        # local (memorizada) garante o mesmo resultado para outras fontes
+        if not item_eap_permitido(item.get('codEAP', ''), item.get('nivel')):
+            continue
+        preco = item.get("preco_m2", "") if "preco_m2" in item else item.get("preco", "")
+        itens.append((
+            _intern_str(item.get("codEAP", "")),
+            _intern_str(item.get("descricao", "")),
+            item.get("nivel"),
+            preco,
+        ))
+    
+    return {
+        "projeto_id": projeto_id,
+        "sigla": _intern_str(projeto_info["sigla"] or projeto_info["nome"]),
+        "dataBase": eap.get("dataBase", ""),
+        "itens": itens,
+    }
+
+def carregar_projetos(projetos_collection, filtro=None):
+    """Carrega o dicionário de projetos indexado por _id (ObjectId e str)"""
+    def clean_mongo_field(val):
+        if val is None or pd.isna(val) or str(val).strip().lower() in ['none', 'nan', '']:
+            return ''
+        return str(val).strip()
+    
+    projetos_dados = {}
+    for p in projetos_collection.find(filtro or {}, {"sigla": 1, "nome": 1}):
+        projeto_tratado = {k: clean_mongo_field(v) for k, v in p.items()}
+        sigla = projeto_tratado.get("sigla", "")
+        nome = projeto_tratado.get("nome", "Projeto sem nome")
+        
+        projeto_info = {"sigla": sigla, "nome": nome}
+        projetos_dados[str(p["_id"])] = projeto_info
+        projetos_dados[p["_id"]] = projeto_info
+        
+    return projetos_dados
+
+def iterar_eaps_vigentes(eaps_collection, projetos_dados, ids=None):
+    """
+    Percorre as EAPs vigentes já na forma compacta, uma por vez, como pares
+    (_id da EAP, EAP compacta).
+    
+    ``projetos_dados`` vem de carregar_projetos. Com ``ids``, só essas EAPs
+    são transferidas (ex.: as que mudaram desde a última execução de um job).
+    """
+    if ids is None:
+        ids = _ids_eaps_vigentes(eaps_collection)
+    cursor = eaps_collection.aggregate(_eap_pipeline({"_id": {"$in": list(ids)}}), batchSize=EAP_BATCH_SIZE)
+    for eap in cursor:
+        yield eap["_id"], _compactar_eap(eap, projetos_dados)
+
+def resumo_eaps_vigentes(eaps_collection, projetos_dados):
+    """
+    Metadados das EAPs vigentes sem transferir os itens, na mesma ordem de
+    iterar_eaps_vigentes.
+    
+    Cada resumo traz ``_id``, ``projeto_id``, ``sigla`` (resolvida como na
+    forma compacta), ``dataBase``, ``updatedAt`` (None se a EAP não tiver o
+    campo) e ``total_itens``, o tamanho bruto da lista de itens.
+    """
+    ids = _ids_eaps_vigentes(eaps_collection)
+    pipeline = [
+        {"$match": {"_id": {"$in": ids}}},
+        {"$project": {
+            "projeto_id": 1, "dataBase": 1, "updatedAt": 1,
+            "total_itens": {"$size": {"$ifNull": ["$itens", []]}},
+        }},
+    ]
+    for eap in eaps_collection.aggregate(pipeline):
+        projeto_info = get_projeto_info_by_id(eap.get("projeto_id"), projetos_dados)
+        yield {
+            "_id": eap["_id"],
+            "projeto_id": eap.get("projeto_id"),
+            "sigla": projeto_info["sigla"] or projeto_info["nome"],
+            "dataBase": eap.get("dataBase", ""),
+            "updatedAt": eap.get("updatedAt"),
+            "total_itens": eap.get("total_itens", 0),
+        }
+
+def _stream_eaps_compactas(eaps_cursor, projetos_dados):
+    """
+    Percorre o cursor de EAPs convertendo cada documento para a forma compacta.
+    
+    Nenhuma lista de documentos brutos é mantida: cada documento é descartado
+    logo após a conversão, então o pico de memória fica limitado ao lote
+    corrente do cursor mais o resultado compacto.
+    """
+    eaps_dados = []
+    total_itens_original = 0
+    total_itens_filtrados = 0
+    
+    for eap in eaps_cursor:
+        total_itens_original += len(eap.get('itens') or [])
+        eap_compacta = _compactar_eap(eap, projetos_dados)
+        total_itens_filtrados += len(eap_compacta["itens"])
+        eaps_dados.append(eap_compacta)
+    
+    itens_removidos = total_itens_original - total_itens_filtrados
+    if itens_removidos > 0:
+        _log.info("Filtro aplicado: %d itens indesejados removidos", itens_removidos)
+        
+    return eaps_dados
+
+def carregar_eaps(eaps_collection, projetos_collection, revisoes=None):
+    """
+    Busca dados de EAP (forma compacta) e projetos do MongoDB.
+    
+    Apenas a EAP mais recente de cada projeto é carregada; ``revisoes``
+    ({projeto_id: eap_id}) permite escolher outra revisão por projeto.
+    Retorna (eaps_dados, projetos_dados, versão do conteúdo).
+    """
+    # Projetos primeiro: a sigla é resolvida durante o streaming das EAPs
+    projetos_dados = carregar_projetos(projetos_collection)
+    
+    garantir_indices_eaps(eaps_collection)
+    eaps_cursor = _eap_cursor_vigentes(eaps_collection, revisoes)
+    eaps_dados = _stream_eaps_compactas(eaps_cursor, projetos_dados)
+    # Ordem fixa (o $group não garante nenhuma): a descrição de cada código é
+    # a última vista na matriz, e o token de versão não muda à toa
+    eaps_dados.sort(key=lambda doc: doc["sigla"])
+        
+    return eaps_dados, projetos_dados, versao_conteudo(eaps_dados)
+
+def carregar_eap_matriz(matriz_collection, estado_collection, siglas):
+    """
+    Lê da coleção materializada (ver eap_matriz_job.py) apenas as linhas das
+    siglas informadas, usando o índice por (sigla, código), nessa ordem.
+    
+    Linhas cuja descrição difere da descrição vencedora do código no conjunto
+    completo (``descricao_codigo``, gravada pelo job) ficam de fora, como na
+    matriz sobre todas as EAPs: o valor de uma obra não depende das demais
+    obras selecionadas.
+    
+    A versão vem do estado do job (número de EAPs e última atualização), não
+    das linhas lidas: é a mesma para qualquer seleção, então as colunas já
+    calculadas de outras obras continuam valendo quando a seleção muda.
+    
+    Retorna (EAPs na mesma forma compacta de carregar_eaps, uma por sigla,
+    versão da coleção) ou None se a coleção ainda não foi construída pelo job.
+    """
+    estado = list(estado_collection.aggregate([
+        {"$group": {"_id": None, "eaps": {"$sum": 1}, "atualizado_em": {"$max": "$atualizado_em"}}}
+    ]))
+    if not estado:
+        return None
+    
+    cursor = matriz_collection.find(
+        {"sigla": {"$in": list(siglas)}},
+        {"_id": 0, "sigla": 1, "codigo": 1, "descricao": 1, "descricao_codigo": 1, "preco": 1,
+         "dataBase": 1, "projeto_id": 1}
+    ).sort([("sigla", 1), ("codigo", 1)]).batch_size(EAP_BATCH_SIZE)
+    
+    eaps_por_sigla = {}
+    for linha in cursor:
+        sigla = linha["sigla"]
+        if sigla not in eaps_por_sigla:
+            eaps_por_sigla[sigla] = {
+                "projeto_id": linha.get("projeto_id"),
+                "sigla": sigla,
+                "dataBase": linha.get("dataBase", ""),
+                "itens": [],
+            }
+        if linha.get("descricao_codigo", linha.get("descricao")) != linha.get("descricao"):
+            continue
+        preco = linha.get("preco")
+        eaps_por_sigla[sigla]["itens"].append(
+            (linha["codigo"], linha.get("descricao", ""), 1, "" if preco is None else preco)
+        )
+        
+    eaps_dados = list(eaps_por_sigla.values())
+    return eaps_dados, versao_conteudo(estado[0])
+
+def carregar_eap_subitens(eaps_collection, projetos_collection, codigo, siglas):
+    """
+    Subitens (níveis abaixo de ``codigo``) das EAPs vigentes das siglas
+    informadas, buscados sob demanda quando a linha é expandida.
+    
+    A consulta fica limitada aos projetos das siglas e, no servidor, aos itens
+    com o prefixo do código. Retorna (EAPs compactas, versão do conteúdo)
+    como carregar_eap_matriz.
+    """
+    siglas = list(siglas)
+    projetos_dados = carregar_projetos(
+        projetos_collection, {"$or": [{"sigla": {"$in": siglas}}, {"nome": {"$in": siglas}}]}
+    )
+    # projeto_id pode estar gravado na EAP como ObjectId ou como texto
+    projeto_ids = list(projetos_dados)
+    
+    ids = _ids_eaps_vigentes(eaps_collection, projeto_ids=projeto_ids)
+    cursor = eaps_collection.aggregate(
+        _eap_pipeline({"_id": {"$in": ids}}, prefixo=codigo), batchSize=EAP_BATCH_SIZE
+    )
+    eaps_dados = _stream_eaps_compactas(cursor, projetos_dados)
+    return eaps_dados, versao_conteudo(eaps_dados)
+
+def carregar_incc(incc_path=INCC_CSV_PADRAO):
+    """
+    Carrega dados do INCC do arquivo CSV, coletando do site quando ele não
+    existe ou está desatualizado; retorna (DataFrame, versão) ou (None, None)
+    """
+    script_dir = os.path.dirname(os.path.abspath(incc_path))
+
+    def _collect_incc_csv(final_path):
+        """Coleta dados do site e escreve CSV no mesmo formato, usando arquivo temporário e replace atômico."""
+        url = "https://indiceseconomicos.secovi.com.br/indicadormensal.php?idindicador=59"
+        meses = {
+            'JAN': '01', 'FEV': '02', 'MAR': '03', 'ABR': '04', 
+            'MAI': '05', 'JUN': '06', 'JUL': '07', 'AGO': '08', 
+            'SET': '09', 'OUT': '10', 'NOV': '11', 'DEZ': '12'
+        }
+
+        try:
+            import csv
+            import tempfile
+            import requests
+            from bs4 import BeautifulSoup
+        except Exception:
+            raise
+
+        try:
+            resp = requests.get(url, timeout=15)
+            resp.raise_for_status()
+            soup = BeautifulSoup(resp.text, 'html.parser')
+
+            dados = []
+            tables = soup.find_all('table')
+            ano_atual = None
+            for table in tables:
+                # tenta extrair ano
+                txt = table.get_text(separator=' ')
+                m = re.search(r'Ano:\s*(\d{4})', txt)
+                if m:
+                    ano_atual = m.group(1)
+                    continue
+
+                linhas = table.find_all('tr')
+                for linha in linhas:
+                    cols = linha.find_all('td')
+                    if len(cols) >= 2 and ano_atual:
+                        mes = cols[0].get_text(strip=True).upper()
+                        indice = cols[1].get_text(strip=True).replace('.', '').replace(',', '.')
+                        if mes in meses:
+                            data = f"01/{meses[mes]}/{ano_atual}"
+                            try:
+                                valor = float(indice)
+                                dados.append([data, valor])
+                            except:
+                                continue
+
+            if not dados:
+                raise RuntimeError('Nenhum dado coletado do site INCC')
+
+            # escrever em arquivo temporário e mover atômico
+            tmp_fd, tmp_path = tempfile.mkstemp(prefix='incc_', suffix='.csv', dir=script_dir)
+            os.close(tmp_fd)
+            try:
+                with open(tmp_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['data', 'indice'])
+                    writer.writerows(dados)
+                os.replace(tmp_path, final_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    try:
+                        os.remove(tmp_path)
+                    except:
+                        pass
+
+        except Exception:
+            # propaga exceção para o chamador tratar (fallback)
+            raise
+
+    def _is_csv_outdated(path):
+        try:
+            df_check = pd.read_csv(path, usecols=['data'], parse_dates=['data'], dayfirst=True, encoding='utf-8-sig')
+            if df_check.empty:
+                return True
+            max_date = df_check['data'].max()
+            if pd.isna(max_date):
+                return True
+            today = datetime.date.today()
+            first_of_month = datetime.date(today.year, today.month, 1)
+            return max_date.date() < first_of_month
+        except Exception:
+            return True
+
+    # Lock handling to avoid múltiplos processos baixando simultaneamente
+    lock_path = incc_path + '.lock'
+    try:
+        # se arquivo não existe ou está desatualizado, coletar
+        need_collect = False
+        if not os.path.exists(incc_path):
+            need_collect = True
+        else:
+            if _is_csv_outdated(incc_path):
+                need_collect = True
+
+        if need_collect:
+            # tentar criar lock atômico
+            got_lock = False
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                got_lock = True
+            except FileExistsError:
+                got_lock = False
+
+            if got_lock:
+                try:
+                    _collect_incc_csv(incc_path)
+                except Exception:
+                    # falha na coleta: se existir CSV antigo, seguimos com ele; caso contrário, repropaga
+                    if not os.path.exists(incc_path):
+                        raise
+                finally:
+                    try:
+                        os.remove(lock_path)
+                    except:
+                        pass
+            else:
+                # outro processo está coletando: aguardar até 10s pelo arquivo ou timeout
+                waited = 0.0
+                while waited < 10.0:
+                    if os.path.exists(incc_path):
+                        break
+                    time.sleep(0.25)
+                    waited += 0.25
+
+        # se chegamos aqui e arquivo existe, carregar via função cacheada por mtime
+        if os.path.exists(incc_path):
+            mtime = os.path.getmtime(incc_path)
+            incc_df = _load_incc_data_cached(mtime, incc_path)
+            if incc_df is not None:
+                return incc_df, versao_conteudo(incc_df)
+
+        return None, None
+    except Exception:
+        # em caso de erro final, não quebrar app
+        return None, None
+
+@memoizar(ttl=86400, max_entradas=4)
+def _load_incc_data_cached(mtime, path):
+    """Leitura cacheada do CSV; a chave do cache inclui o mtime para invalidar quando o arquivo mudar."""
+    try:
+        incc_df = pd.read_csv(
+            path,
+            sep=',',
+            decimal='.',
+            encoding='utf-8-sig',
+            parse_dates=['data'],
+            dayfirst=True
+        )
+        incc_df = incc_df.sort_values('data')
+        incc_df = incc_df[pd.to_numeric(incc_df['indice'], errors='coerce').notnull()]
+        return incc_df
+    except Exception:
+        return None
+
+def get_projeto_info_by_id(projeto_id, projetos_dados):
+    """Busca informações do projeto por ID com múltiplas estratégias"""
+    projeto_info = projetos_dados.get(projeto_id)
+    
+    if not projeto_info:
+        projeto_info = projetos_dados.get(str(projeto_id)) if projeto_id else None
+        
+    if not projeto_info and projeto_id:
+        from bson import ObjectId
+        try:
+            if isinstance(projeto_id, str):
+                projeto_info = projetos_dados.get(ObjectId(projeto_id))
+            elif isinstance(projeto_id, ObjectId):
+                projeto_info = projetos_dados.get(str(projeto_id))
+        except:
+            pass
+    
+    if not projeto_info:
+        projeto_info = {"sigla": "", "nome": "Obra não encontrada"}
+        
+    return projeto_info
+
+def carregar_siglas_eaps(eaps_collection, projetos_collection):
+    """
+    Obtém todas as siglas de EAPs do banco: os projeto_id distintos das EAPs
+    (calculados no servidor) e uma única consulta aos projetos, só com a sigla.
+    projeto_id gravado como texto também é procurado como ObjectId, e vice-versa.
+    """
+    from bson import ObjectId
+    
+    ids = set()
+    for projeto_id in eaps_collection.distinct("projeto_id"):
+        if not projeto_id:
+            continue
+        ids.add(projeto_id)
+        if isinstance(projeto_id, str) and ObjectId.is_valid(projeto_id):
+            ids.add(ObjectId(projeto_id))
+        elif isinstance(projeto_id, ObjectId):
+            ids.add(str(projeto_id))
+    if not ids:
+        return set()
+    
+    siglas_eaps = set()
+    for projeto in projetos_collection.find({"_id": {"$in": list(ids)}}, {"sigla": 1}):
+        sigla = projeto.get("sigla", "")
+        if sigla and str(sigla).strip():
+            siglas_eaps.add(str(sigla).strip())
+    return siglas_eaps
@@ -0,0 +1,575 @@
+"""
+Motor da matriz EAP: custos por código e obra corrigidos pelo INCC e
+divididos pela área, estatísticas, agrupamentos e simulação de área
+
+Sem Streamlit: recebe as fontes já carregadas (nucleo.fontes ou uma
+fixture) e guarda em nucleo.cache só o que é identificado por um token de
+versão. A interface envolve process_eap_matrix, process_eap_subniveis e
+process_matriz_grupos com st.cache_data em main_interface.
+"""
+
+import bisect
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from nucleo.cache import CacheLRU, memoizar
+from nucleo.calculos import (
+    clean_and_format, parse_valores_numericos, fatores_incc, parse_data_base,
+    estatisticas_linhas, outliers_linhas
+)
+from nucleo.fontes import versao_conteudo
+
+# Limite de colunas da matriz EAP mantidas em _cache_colunas_eap
+EAP_COLUNAS_CACHE_MAX = 20000
+
+def coluna_sigla(df):
+    """Sigla de cada obra: a coluna pré-calculada do Monday ou, sem ela, derivada de Obras"""
+    if 'Sigla' in df.columns:
+        return df['Sigla']
+    return df['Obras'].apply(lambda x: clean_and_format(x, tipo="sigla"))
+
+def _eap_long_frame(eaps_dados, apenas_nivel_1=True):
+    """
+    Achata os itens de nível 1 (ou todos, para os subníveis) das EAPs
+    compactas em um DataFrame longo (sigla, codigo, descricao, preco), na
+    ordem em que os documentos chegam.
+    """
+    registros = [
+        (doc["sigla"], codigo, descricao, preco)
+        for doc in eaps_dados
+        for codigo, descricao, nivel, preco in doc.get("itens", [])
+        if nivel == 1 or not apenas_nivel_1
+    ]
+    df_long = pd.DataFrame(registros, columns=["sigla", "codigo", "descricao", "preco"])
+    df_long["preco"] = df_long["preco"].astype(object)
+    return df_long
+
+def _areas_monday(monday_df):
+    """Área informada no Monday por nome de obra"""
+    area_m2_dict_monday = {}
+    if monday_df is not None and not monday_df.empty:
+        areas = monday_df['Area'] if 'Area' in monday_df.columns else pd.Series('', index=monday_df.index)
+        for nome_obra, area_obra in zip(monday_df['Obras'].astype(str).str.strip(), areas.astype(str).str.strip()):
+            if nome_obra:
+                area_m2_dict_monday[nome_obra] = area_obra
+    return area_m2_dict_monday
+
+def _buscador_area_monday(area_m2_dict_monday):
+    """
+    Retorna a função ``area_de(obra, ignorar_vazias)``: área pelo nome exato
+    da obra no Monday ou, em seguida, pelo primeiro nome que contém a sigla.
+    
+    Os nomes ficam concatenados em um único texto em minúsculas, então cada
+    busca por substring é um str.find em vez de um laço sobre o board.
+    """
+    nomes = list(area_m2_dict_monday)
+    nomes_lower = [nome.lower() for nome in nomes]
+    texto = "\n".join(nomes_lower)
+    inicios = np.cumsum([0] + [len(nome) + 1 for nome in nomes_lower[:-1]])
+    
+    def area_de(obra, ignorar_vazias=False):
+        area_val = area_m2_dict_monday.get(obra)
+        vazia = not area_val or (ignorar_vazias and str(area_val).strip().lower() in ["", "nan", "none"])
+        if vazia and nomes:
+            pos = texto.find(obra.lower())
+            if pos >= 0:
+                return area_m2_dict_monday[nomes[bisect.bisect_right(inicios, pos) - 1]]
+        return area_val
+    
+    return area_de
+
+def _area_real(area_obra_str):
+    """Área numérica usada na correção; sem área informada (ou inválida) usa 1"""
+    try:
+        if area_obra_str and str(area_obra_str).strip():
+            return float(str(area_obra_str).replace('.', '').replace(',', '.'))
+        return 1.0
+    except:
+        return 1.0
+
+def _formatar_data_base(data_original):
+    """Formata a data base para exibir apenas MM/YYYY (apenas visual)"""
+    if not data_original:
+        return ""
+    data_parsed = parse_data_base(data_original)
+    if data_parsed is not None:
+        return data_parsed.strftime("%m/%Y")
+    try:
+        # Fallback: tenta converter manualmente
+        if isinstance(data_original, str) and len(data_original) >= 10:
+            # Pega apenas a parte da data (YYYY-MM-DD)
+            return datetime.strptime(data_original[:10], "%Y-%m-%d").strftime("%m/%Y")
+        return str(data_original)
+    except:
+        # Se tudo falhar, mantém original
+        return str(data_original)
+
+def _formatar_valores_br(valores):
+    """Formata um array de floats como '1234,56'; NaN vira string vazia"""
+    valores = np.asarray(valores, dtype=float)
+    if valores.size == 0:
+        return np.empty(valores.shape, dtype=str)
+    texto = np.char.replace(np.char.mod("%.2f", np.nan_to_num(valores)), ".", ",")
+    return np.where(np.isnan(valores), "", texto)
+
+def _matriz_vazia(obras):
+    """
+    Estrutura numérica da matriz EAP:
+    
+    - ``obras``: colunas, na ordem selecionada
+    - ``valores``: DataFrame float64 (índice = código, colunas = obras), NaN sem valor
+    - ``descricoes``: Series com a descrição limpa de cada código
+    - ``media``: Series float64 com a média por código
+    - ``area`` / ``data_base``: valores brutos por obra para as linhas de metadados
+    - ``por_m2``: True quando os valores são R$/m² corrigidos pelo INCC (só
+      então a simulação de área se aplica, ver simular_area)
+    """
+    codigos = pd.Index([], dtype=object, name="codigo")
+    return {
+        "obras": list(obras),
+        "valores": pd.DataFrame(index=codigos, columns=list(obras), dtype=float),
+        "descricoes": pd.Series(index=codigos, dtype=object),
+        "media": pd.Series(index=codigos, dtype=float),
+        "area": {},
+        "data_base": {},
+        "por_m2": False,
+    }
+
+@memoizar(ttl=86400, max_entradas=8)
+def _base_matriz_eap(_eaps_dados, versao_eaps, apenas_nivel_1=True):
+    """
+    Parte da matriz que depende apenas das EAPs: códigos, descrições limpas,
+    custos por (código, sigla) e data base de cada sigla.
+    
+    A descrição exibida é a última vista para o código, e só os preços
+    registrados com essa descrição entram na matriz (última ocorrência).
+    """
+    data_base = {doc["sigla"]: doc.get("dataBase", "") for doc in _eaps_dados}
+    codigos = pd.Index([], dtype=object, name="codigo")
+    base = {
+        "codigos": codigos,
+        "descricoes": pd.Series(index=codigos, dtype=object),
+        "custos": pd.DataFrame(index=codigos, dtype=float),
+        "data_base": data_base,
+    }
+    
+    df_long = _eap_long_frame(_eaps_dados, apenas_nivel_1)
+    if df_long.empty:
+        return base
+    
+    descricoes = df_long.groupby("codigo", sort=False)["descricao"].last()
+    df_long = df_long[df_long["descricao"].values == descricoes.reindex(df_long["codigo"]).values]
+    df_long = df_long.drop_duplicates(["codigo", "sigla"], keep="last")
+    
+    codigos = pd.Index(sorted(descricoes.index), dtype=object, name="codigo")
+    df_long = df_long.assign(custo=parse_valores_numericos(df_long["preco"]).values)
+    if df_long["custo"].notna().any():
+        custos = df_long.pivot_table(index="codigo", columns="sigla", values="custo", aggfunc="first")
+    else:
+        custos = pd.DataFrame(dtype=float)
+    
+    desc_limpa = descricoes.reindex(codigos).astype(str)
+    desc_limpa = desc_limpa.str.replace(r"^Item\s*", "", case=False, regex=True)
+    desc_limpa = desc_limpa.str.replace(r"\s+", " ", regex=True).str.strip()
+    
+    base["codigos"] = codigos
+    base["descricoes"] = desc_limpa
+    base["custos"] = custos.reindex(index=codigos).astype(float)
+    return base
+
+def base_eaps(eaps_dados, versao_eaps=None, apenas_nivel_1=True):
+    """
+    Base da matriz (_base_matriz_eap) das EAPs recebidas, em cache quando há
+    ``versao_eaps``. A chave inclui as siglas recebidas: a versão da matriz
+    materializada é a da coleção inteira, não a das obras lidas.
+    """
+    if versao_eaps is None:
+        return _base_matriz_eap.__wrapped__(eaps_dados, None, apenas_nivel_1)
+    siglas = tuple(doc["sigla"] for doc in eaps_dados)
+    return _base_matriz_eap(eaps_dados, (versao_eaps, siglas), apenas_nivel_1)
+
+# Colunas já calculadas da matriz EAP, por (versões das fontes, sigla),
+# compartilhadas no processo (entre sessões, na interface). Um CacheLRU
+# simples em vez de memoizar por coluna: com centenas de obras, o custo fixo
+# de cada chamada cacheada superaria o do próprio cálculo.
+_cache_colunas_eap = CacheLRU(EAP_COLUNAS_CACHE_MAX)
+
+def _componentes_obras(siglas, base, area_de, incc_df_eap):
+    """
+    Entradas da correção das siglas informadas: datas base, custos brutos
+    (código x obra, alinhados à base) e, com a série INCC, os índices atual e
+    de base e a área usada de cada obra (NaN quando zero, como em
+    calcular_valor_m2). Sem INCC, os três últimos são None.
+    """
+    datas_base = [base["data_base"].get(s, "") for s in siglas]
+    custos = base["custos"].reindex(columns=siglas).to_numpy(dtype=float)
+    if incc_df_eap is None:
+        return datas_base, custos, None, None, None
+    incc_atual, incc_base = fatores_incc(datas_base, incc_df_eap)
+    area_real = np.array([_area_real(area_de(s)) for s in siglas])
+    area_real[area_real == 0] = np.nan
+    return datas_base, custos, incc_atual, incc_base, area_real
+
+def _calcular_colunas_eap(siglas, base, area_de, incc_df_eap):
+    """
+    Calcula de uma vez as colunas (R$/m² corrigido pelo INCC) das siglas
+    informadas, alinhadas aos códigos da base. Cada coluna é a tupla
+    (valores, área bruta, data base bruta) usada na matriz e nos metadados.
+    """
+    datas_base, custos, incc_atual, incc_base, area_real = _componentes_obras(siglas, base, area_de, incc_df_eap)
+    
+    # Fatores INCC e áreas por obra, aplicados por broadcasting nas colunas
+    if incc_atual is not None:
+        valores = (custos * incc_atual) / (incc_base * area_real)
+    else:
+        valores = custos
+    
+    return {
+        sigla: (valores[:, k], area_de(sigla, ignorar_vazias=True), datas_base[k])
+        for k, sigla in enumerate(siglas)
+    }
+
+def detalhe_obras(siglas, base, monday_df, incc_df_eap):
+    """
+    Abas de detalhe do relatório completo: uma linha por (obra, código) com
+    custo bruto e R$/m² corrigido, e uma linha por obra com a área e os
+    índices INCC usados. Mesmas contas de _calcular_colunas_eap.
+    """
+    area_de = _buscador_area_monday(_areas_monday(monday_df))
+    datas_base, custos, incc_atual, incc_base, area_real = _componentes_obras(siglas, base, area_de, incc_df_eap)
+    n_codigos, n_obras = custos.shape
+    if incc_atual is None:
+        incc_atual = incc_base = area_real = np.full(n_obras, np.nan)
+    
+    fatores = pd.DataFrame({
+        "Obra": siglas,
+        "Data base": [_formatar_data_base(d) for d in datas_base],
+        "Área (m²)": area_real,
+        "INCC base": incc_base,
+        "INCC atual": incc_atual,
+        "Fator INCC": incc_atual / incc_base,
+    })
+    
+    # Matriz código x obra achatada por obra, só as células com custo
+    tem_custo = ~np.isnan(custos.T.ravel())
+    obra_idx = np.repeat(np.arange(n_obras), n_codigos)[tem_custo]
+    codigo_idx = np.tile(np.arange(n_codigos), n_obras)[tem_custo]
+    custo = custos.T.ravel()[tem_custo]
+    detalhe = pd.DataFrame({
+        "Obra": np.asarray(siglas, dtype=object)[obra_idx],
+        "Código": base["codigos"].to_numpy(dtype=object)[codigo_idx],
+        "Descrição": base["descricoes"].to_numpy(dtype=object)[codigo_idx],
+        "Custo (R$)": custo,
+        "Fator INCC": fatores["Fator INCC"].to_numpy()[obra_idx],
+        "Área (m²)": area_real[obra_idx],
+        "R$/m² corrigido": custo * incc_atual[obra_idx] / (incc_base[obra_idx] * area_real[obra_idx]),
+    })
+    return detalhe, fatores
+
+def process_eap_matrix(eaps_dados, selected_obras, monday_df, incc_df_eap, versoes_fontes=None):
+    """
+    Processa a matriz EAP com cálculos INCC.
+    
+    ``versoes_fontes`` são os tokens de versão publicados pelos carregadores
+    (EAPs, Monday e INCC, mais a data de hoje): identificam as fontes nas
+    chaves dos caches, então dados novos invalidam o que foi calculado.
+    
+    A matriz é montada coluna a coluna sobre a base comum das EAPs
+    (_base_matriz_eap); as colunas ficam em cache por (versões, sigla) em
+    _cache_colunas_eap. Adicionar ou remover uma obra calcula só a coluna nova
+    e recalcula a Média. Sem ``versoes_fontes`` não há chave confiável e nada
+    é reaproveitado.
+    
+    Com a matriz materializada, ``eaps_dados`` traz só as obras selecionadas
+    e a versão das EAPs é a da coleção inteira: a base entra no cache também
+    pelas siglas recebidas, e uma coluna calculada sobre outra base é
+    realinhada aos códigos da base atual.
+    
+    O resultado é numérico (ver _matriz_vazia); a formatação pt-BR acontece
+    uma única vez em formatar_matriz_exibicao.
+    """
+    selected_obras = list(selected_obras or [])
+    matriz = _matriz_vazia(selected_obras)
+    if not selected_obras:
+        return matriz
+    
+    preparada = preparar_matriz(eaps_dados, monday_df, versoes_fontes[0] if versoes_fontes else None)
+    base, area_de = preparada["base"], preparada["area_de"]
+    # Sem versões, um cache descartável: nada entra no compartilhado
+    cache_colunas = CacheLRU() if versoes_fontes is None else _cache_colunas_eap
+    
+    # Só as obras sem coluna em cache são calculadas (todas juntas); cada
+    # entrada guarda também os códigos da base em que a coluna foi calculada
+    encontradas = {s: cache_colunas.obter((versoes_fontes, s)) for s in selected_obras}
+    faltantes = [s for s, entrada in encontradas.items() if entrada is None]
+    if faltantes:
+        novas = {
+            sigla: (coluna, base["codigos"])
+            for sigla, coluna in _calcular_colunas_eap(faltantes, base, area_de, incc_df_eap).items()
+        }
+        encontradas.update(novas)
+        for sigla, entrada in novas.items():
+            cache_colunas.guardar((versoes_fontes, sigla), entrada)
+    colunas = _alinhar_colunas([encontradas[s] for s in selected_obras], base["codigos"])
+    return _montar_matriz(matriz, colunas, base, incc_df_eap is not None)
+
+def _alinhar_colunas(entradas, codigos):
+    """
+    Colunas (valores, área, data base) alinhadas a ``codigos``, a partir de
+    entradas (coluna, códigos em que foi calculada); as posições são
+    calculadas uma vez por conjunto de códigos de origem.
+    """
+    posicoes = {}
+    colunas = []
+    for (valores, area, data_base), origem in entradas:
+        if origem is not codigos:
+            if id(origem) not in posicoes:
+                posicoes[id(origem)] = origem.get_indexer(codigos)
+            pos = posicoes[id(origem)]
+            valores = np.where(pos >= 0, valores[pos], np.nan) if len(valores) else np.full(len(codigos), np.nan)
+        colunas.append((valores, area, data_base))
+    return colunas
+
+def _montar_matriz(matriz, colunas, base, por_m2):
+    """Junta as colunas das obras na matriz numérica e calcula a Média"""
+    selected_obras = matriz["obras"]
+    
+    # Metadados por obra (linhas de área e de data base), ainda brutos
+    matriz["area"] = {obra: coluna[1] for obra, coluna in zip(selected_obras, colunas)}
+    matriz["data_base"] = {obra: coluna[2] for obra, coluna in zip(selected_obras, colunas)}
+    if base["codigos"].empty:
+        return matriz
+    
+    matriz["por_m2"] = por_m2
+    
+    valores = np.column_stack([coluna[0] for coluna in colunas])
+    valores = pd.DataFrame(valores, index=base["codigos"], columns=selected_obras)
+    tem_valor = (valores.notna() & (valores != 0)).any(axis=1)
+    valores = valores[tem_valor]
+    
+    matriz["valores"] = valores
+    matriz["descricoes"] = base["descricoes"].reindex(valores.index)
+    matriz["media"] = valores.mean(axis=1, skipna=True)
+    return matriz
+
+def preparar_matriz(eaps_dados, monday_df, versao_eaps=None, apenas_nivel_1=True):
+    """
+    O que as matrizes de qualquer conjunto de obras sobre as mesmas fontes
+    compartilham: a base das EAPs (base_eaps) e a busca de áreas do Monday.
+    Com matriz_siglas, calcula muitas matrizes montando isso uma vez só.
+    """
+    return {
+        "base": base_eaps(eaps_dados, versao_eaps, apenas_nivel_1),
+        "area_de": _buscador_area_monday(_areas_monday(monday_df)),
+    }
+
+def matriz_siglas(preparada, siglas, incc_df_eap):
+    """
+    Matriz numérica (ver _matriz_vazia) das ``siglas`` sobre o retorno de
+    preparar_matriz; mesmas contas de process_eap_matrix, sem cache de colunas.
+    """
+    siglas = list(siglas)
+    matriz = _matriz_vazia(siglas)
+    if not siglas:
+        return matriz
+    base = preparada["base"]
+    colunas = _calcular_colunas_eap(siglas, base, preparada["area_de"], incc_df_eap)
+    return _montar_matriz(matriz, [colunas[s] for s in siglas], base, incc_df_eap is not None)
+
+def process_eap_subniveis(eaps_subitens, selected_obras, monday_df, incc_df_eap):
+    """
+    Matriz dos subitens (níveis 2, 3, ...) de um código, calculada só quando
+    a linha é expandida.
+    
+    ``eaps_subitens`` vem de carregar_eap_subitens; a correção INCC/área é a
+    mesma da matriz principal. Os códigos ficam em ordem de árvore.
+    """
+    selected_obras = list(selected_obras or [])
+    if not selected_obras:
+        return _matriz_vazia(selected_obras)
+    preparada = preparar_matriz(eaps_subitens, monday_df, apenas_nivel_1=False)
+    return matriz_siglas(preparada, selected_obras, incc_df_eap)
+
+CAMPOS_AGRUPAMENTO = ("Construtora", "Arquitetura", "Local")
+
+def grupos_monday(monday_df, campo):
+    """Valor de ``campo`` no Monday por sigla da obra (vale a primeira ocorrência)"""
+    if monday_df is None or monday_df.empty or campo not in monday_df.columns:
+        return {}
+    siglas = coluna_sigla(monday_df)
+    valores = monday_df[campo].fillna("").astype(str).str.strip()
+    grupos = {}
+    for sigla, valor in zip(siglas, valores):
+        if sigla and valor:
+            grupos.setdefault(sigla, valor)
+    return grupos
+
+def process_matriz_grupos(matriz_unitaria, campo, monday_df):
+    """
+    Matriz por grupo de obras (Construtora, Arquitetura ou Local): média por
+    código das obras de cada grupo, em um único groupby sobre a matriz
+    numérica transposta (obra x código). Obras sem o campo preenchido formam
+    o grupo "Sem <campo>".
+    
+    ``matriz_unitaria`` é a matriz de process_eap_matrix (antes da simulação
+    de área). As colunas são "<grupo> (<nº de obras>)" e a Média é a média
+    entre os grupos.
+    """
+    grupos = grupos_monday(monday_df, campo)
+    obras = matriz_unitaria["obras"]
+    if not obras:
+        return _matriz_vazia([])
+    
+    rotulos = pd.Series([grupos.get(obra, f"Sem {campo.lower()}") for obra in obras])
+    agrupado = matriz_unitaria["valores"].T.groupby(rotulos.values).mean()
+    tamanhos = rotulos.value_counts()
+    nomes = [f"{grupo} ({tamanhos[grupo]})" for grupo in agrupado.index]
+    
+    matriz = _matriz_vazia(nomes)
+    matriz["por_m2"] = matriz_unitaria["por_m2"]
+    valores = pd.DataFrame(agrupado.T.to_numpy(), index=matriz_unitaria["valores"].index, columns=nomes)
+    matriz["valores"] = valores
+    matriz["descricoes"] = matriz_unitaria["descricoes"]
+    matriz["media"] = valores.mean(axis=1, skipna=True)
+    return matriz
+
+def simular_area(matriz, area_simulada_val):
+    """
+    Aplica "Simular valores para área" sobre a matriz unitária (R$/m²) em
+    cache: multiplica todas as células pela área e recalcula a Média.
+    
+    Fica fora do cache de process_eap_matrix, então digitar a área custa uma
+    multiplicação vetorizada, sem refazer as consultas INCC.
+    """
+    if not (matriz["por_m2"] and area_simulada_val and area_simulada_val > 0):
+        return matriz
+    valores = matriz["valores"] * area_simulada_val
+    return {**matriz, "valores": valores, "media": valores.mean(axis=1, skipna=True)}
+
+def simular_areas(matriz, areas):
+    """
+    Vários cenários de área lado a lado. Um único produto por broadcasting da
+    matriz unitária (código x obra) pelo vetor de áreas gera o cubo
+    (código x obra x área) e as Médias (código x área) de todos os cenários.
+    
+    Retorna uma matriz por área, no formato de process_eap_matrix, com a área
+    em ``area_simulada``; lista vazia se a matriz não estiver em R$/m².
+    """
+    areas = np.asarray(areas, dtype=float)
+    if not (matriz["por_m2"] and matriz["obras"]) or areas.size == 0:
+        return []
+    
+    unitaria = matriz["valores"]
+    cubo = unitaria.to_numpy()[:, :, np.newaxis] * areas
+    validos = ~np.isnan(cubo)
+    # Toda linha da matriz tem ao menos um valor, então a contagem nunca é zero
+    medias = np.where(validos, cubo, 0.0).sum(axis=1) / validos.sum(axis=1)
+    
+    return [
+        {
+            **matriz,
+            "area_simulada": float(area),
+            "valores": pd.DataFrame(cubo[:, :, k], index=unitaria.index, columns=unitaria.columns),
+            "media": pd.Series(medias[:, k], index=unitaria.index),
+        }
+        for k, area in enumerate(areas)
+    ]
+
+def com_estatisticas(matriz, colunas=("Média",), metodo_outlier=None):
+    """
+    Anexa à matriz as estatísticas por código escolhidas (exibidas após as
+    obras) e, com ``metodo_outlier`` ("iqr" ou "zscore"), a máscara das
+    células fora do padrão da linha. A Média continua sendo matriz["media"].
+    """
+    valores = matriz["valores"].to_numpy()
+    estatisticas = estatisticas_linhas(valores).set_index(matriz["valores"].index)
+    estatisticas["Média"] = matriz["media"]
+    outliers = outliers_linhas(valores, estatisticas, metodo_outlier) if metodo_outlier else None
+    return {**matriz, "estatisticas": estatisticas[list(colunas)], "outliers": outliers}
+
+def _estatisticas_matriz(matriz):
+    """Colunas de estatística da matriz: as escolhidas em com_estatisticas ou só a Média"""
+    if "estatisticas" in matriz:
+        return matriz["estatisticas"]
+    return pd.DataFrame({"Média": matriz["media"]})
+
+def _linhas_metadados(matriz):
+    """Linhas de ÁREA M² e DATA BASE já formatadas para exibição"""
+    obras = matriz["obras"]
+    area_row = {"CÓDIGO": "", "DESCRIÇÃO": "ÁREA M²"}
+    dataref_row = {"CÓDIGO": "", "DESCRIÇÃO": "DATA BASE"}
+    for obra in obras:
+        area_val = matriz["area"].get(obra)
+        area_row[obra] = clean_and_format(area_val, tipo="area") if area_val else ""
+        dataref_row[obra] = _formatar_data_base(matriz["data_base"].get(obra, ""))
+    if obras:
+        for nome in _estatisticas_matriz(matriz).columns:
+            area_row[nome] = ""
+            dataref_row[nome] = ""
+    return [area_row, dataref_row]
+
+def _colunas_matriz(matriz):
+    obras = matriz["obras"]
+    return ["CÓDIGO", "DESCRIÇÃO"] + (obras + list(_estatisticas_matriz(matriz).columns) if obras else [])
+
+def formatar_matriz_exibicao(matriz):
+    """
+    Única passada de formatação da matriz numérica (pt-BR, duas casas),
+    usada na exibição e na cópia da coluna Média. Células marcadas como
+    outlier (ver com_estatisticas) recebem o sufixo " ⚠".
+    """
+    colunas = _colunas_matriz(matriz)
+    metadados = pd.DataFrame(_linhas_metadados(matriz), columns=colunas).fillna("")
+    if not matriz["obras"]:
+        return metadados
+    
+    estatisticas = _estatisticas_matriz(matriz)
+    valores_fmt = _formatar_valores_br(matriz["valores"].to_numpy())
+    if matriz.get("outliers") is not None:
+        valores_fmt = np.where(matriz["outliers"], np.char.add(valores_fmt, " ⚠"), valores_fmt)
+    
+    itens = pd.DataFrame(valores_fmt, columns=matriz["obras"])
+    for nome in estatisticas.columns:
+        serie = estatisticas[nome].to_numpy()
+        # Contagem de obras sem casas decimais
+        itens[nome] = serie.astype(int).astype(str) if nome == "Nº obras" else _formatar_valores_br(serie)
+    itens.insert(0, "DESCRIÇÃO", matriz["descricoes"].to_numpy(dtype=object))
+    itens.insert(0, "CÓDIGO", matriz["valores"].index.to_numpy(dtype=object))
+    return pd.concat([metadados, itens], ignore_index=True)[colunas]
+
+def tabela_matriz(matriz):
+    """Linhas de código da matriz, só números (sem as linhas de metadados): CÓDIGO, DESCRIÇÃO, obras e estatísticas"""
+    itens = pd.concat([matriz["valores"], _estatisticas_matriz(matriz)], axis=1)
+    itens.insert(0, "DESCRIÇÃO", matriz["descricoes"].to_numpy(dtype=object))
+    itens.insert(0, "CÓDIGO", matriz["valores"].index.to_numpy(dtype=object))
+    return itens.reset_index(drop=True)
+
+def matriz_para_excel(matriz):
+    """Matriz para exportação: metadados como texto e valores como números reais"""
+    colunas = _colunas_matriz(matriz)
+    metadados = pd.DataFrame(_linhas_metadados(matriz), columns=colunas).fillna("")
+    if not matriz["obras"]:
+        return metadados
+    return pd.concat([metadados, tabela_matriz(matriz)], ignore_index=True)[colunas]
+
+def versao_matriz(matriz):
+    """Token do conteúdo exportado da matriz: valores, estatísticas escolhidas e metadados"""
+    return versao_conteudo(
+        matriz["valores"], _estatisticas_matriz(matriz), list(matriz["valores"].index),
+        matriz["descricoes"].tolist(), matriz["area"], matriz["data_base"]
+    )
+
+def abas_relatorio(matriz, base, monday_df, incc_df_eap, renomear):
+    """Abas do relatório completo: matriz comparativa, detalhe por obra, fatores INCC e dados do Monday"""
+    detalhe, fatores = detalhe_obras(matriz["obras"], base, monday_df, incc_df_eap)
+    if monday_df is not None and 'Obras' in monday_df.columns:
+        colunas = [c for c in ('Obras', 'Construtora', 'Area', 'Local', 'Arquitetura', 'Data') if c in monday_df.columns]
+        monday = monday_df.loc[coluna_sigla(monday_df).isin(matriz["obras"]).to_numpy(), colunas]
+    else:
+        monday = pd.DataFrame(columns=['Obras'])
+    return [
+        ("Matriz comparativa", matriz_para_excel(matriz).rename(columns=renomear)),
+        ("Detalhe por obra", detalhe),
+        ("Fatores INCC", fatores),
+        ("Monday", monday.astype(object).fillna("").astype(str)),
+    ]
@@ -0,0 +1,177 @@
+"""
+Relatórios Excel da matriz EAP gerados em segundo plano
+
+O relatório completo (matriz comparativa, detalhe por obra, fatores INCC e
+dados do Monday) é montado e gravado por uma thread de trabalho, então a
+página continua respondendo enquanto ele é gerado; a interface só consulta
+o progresso. Cada arquivo fica em disco com o hash do conteúdo no nome:
+pedir de novo o mesmo relatório devolve o arquivo pronto na hora.
+
+O diretório padrão pode ser trocado pela variável de ambiente
+RELATORIOS_EAP_DIR.
+"""
+
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+RELATORIOS_DIR = os.environ.get("RELATORIOS_EAP_DIR") or os.path.join(tempfile.gettempdir(), "relatorios_eap")
+
+# Relatórios mantidos em disco; os mais antigos (data de modificação) são apagados
+RELATORIOS_MAX_ARQUIVOS = 50
+
+# Linhas escritas entre duas atualizações de progresso
+LINHAS_POR_PROGRESSO = 500
+
+def formatos_excel(workbook):
+    """Formatos usados nas abas: cabeçalho em negrito, números com 2 casas e inteiros"""
+    return {
+        "cabecalho": workbook.add_format({'bold': True}),
+        "numero": workbook.add_format({'num_format': '#,##0.00'}),
+        "inteiro": workbook.add_format({'num_format': '0'}),
+    }
+
+def escrever_aba_excel(workbook, nome, df, formatos, progresso=None):
+    """
+    Escreve ``df`` linha a linha (exigência do modo constant_memory): textos
+    como texto e números como números. ``progresso(n)`` recebe o número de
+    linhas escritas desde a chamada anterior.
+    """
+    planilha = workbook.add_worksheet(nome[:31])
+    planilha.set_column(0, 0, 12)
+    planilha.set_column(1, 1, 45)
+    planilha.set_column(2, max(2, len(df.columns) - 1), 14)
+    planilha.write_row(0, 0, [str(c) for c in df.columns], formatos["cabecalho"])
+    formato_coluna = [formatos["inteiro"] if c == "Nº obras" else formatos["numero"] for c in df.columns]
+    for linha, valores in enumerate(df.itertuples(index=False, name=None), start=1):
+        for coluna, valor in enumerate(valores):
+            if isinstance(valor, str):
+                if valor:
+                    planilha.write_string(linha, coluna, valor)
+            elif valor is not None and not pd.isna(valor):
+                planilha.write_number(linha, coluna, float(valor), formato_coluna[coluna])
+        if progresso and linha % LINHAS_POR_PROGRESSO == 0:
+            progresso(LINHAS_POR_PROGRESSO)
+    if progresso:
+        progresso(len(df) % LINHAS_POR_PROGRESSO)
+
+def escrever_workbook(destino, abas, progresso=None):
+    """Grava ``abas`` ([(nome, DataFrame)]) em ``destino`` (caminho ou BytesIO) com xlsxwriter constant_memory"""
+    # Importado no primeiro download/relatório, fora da inicialização da página
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(destino, {'constant_memory': True})
+    formatos = formatos_excel(workbook)
+    for nome, df in abas:
+        escrever_aba_excel(workbook, nome, df, formatos, progresso)
+    workbook.close()
+
+class TrabalhoRelatorio:
+    """Estado de um relatório pedido: progresso (0 a 1), etapa, erro e caminho do arquivo"""
+
+    def __init__(self, chave, caminho):
+        self.chave = chave
+        self.caminho = caminho
+        self.progresso = 0.0
+        self.etapa = "Na fila"
+        self.erro = None
+        self.concluido = False
+
+    def atualizar(self, progresso, etapa=None):
+        self.progresso = min(1.0, max(self.progresso, progresso))
+        if etapa:
+            self.etapa = etapa
+
+class GeradorRelatorios:
+    """
+    Fila de relatórios atendida por threads de trabalho.
+
+    ``solicitar(chave, montar_abas)`` devolve na hora o TrabalhoRelatorio da
+    chave: já concluído quando o arquivo existe em disco, o mesmo trabalho
+    quando já está em andamento, ou um novo, executado em segundo plano.
+    ``montar_abas`` é chamada na thread de trabalho e retorna [(nome, DataFrame)].
+    """
+
+    def __init__(self, diretorio=RELATORIOS_DIR, max_workers=2):
+        self.diretorio = diretorio
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="relatorio_eap")
+        self._trabalhos = {}
+        self._lock = threading.Lock()
+
+    def caminho(self, chave):
+        return os.path.join(self.diretorio, f"relatorio_eap_{chave}.xlsx")
+
+    def trabalho(self, chave):
+        """Trabalho já pedido para a chave (ou concluído em disco), ou None"""
+        with self._lock:
+            trabalho = self._trabalhos.get(chave)
+        if trabalho is not None and trabalho.concluido and not os.path.exists(trabalho.caminho):
+            trabalho = None
+        if trabalho is None and os.path.exists(self.caminho(chave)):
+            trabalho = self._concluido(chave)
+        return trabalho
+
+    def _concluido(self, chave):
+        trabalho = TrabalhoRelatorio(chave, self.caminho(chave))
+        trabalho.atualizar(1.0, "Pronto")
+        trabalho.concluido = True
+        return trabalho
+
+    def solicitar(self, chave, montar_abas):
+        with self._lock:
+            trabalho = self._trabalhos.get(chave)
+            if trabalho is not None and trabalho.erro is None and (
+                    not trabalho.concluido or os.path.exists(trabalho.caminho)):
+                return trabalho
+            if os.path.exists(self.caminho(chave)):
+                trabalho = self._concluido(chave)
+            else:
+                trabalho = TrabalhoRelatorio(chave, self.caminho(chave))
+                self._executor.submit(self._executar, trabalho, montar_abas)
+            self._trabalhos[chave] = trabalho
+            return trabalho
+
+    def _executar(self, trabalho, montar_abas):
+        temporario = f"{trabalho.caminho}.{uuid.uuid4().hex}.tmp"
+        try:
+            trabalho.atualizar(0.02, "Calculando as abas")
+            abas = montar_abas()
+            total = sum(len(df) for _, df in abas) or 1
+            escritas = [0]
+
+            def progresso(linhas):
+                escritas[0] += linhas
+                trabalho.atualizar(0.1 + 0.85 * escritas[0] / total)
+
+            trabalho.atualizar(0.1, "Gravando o Excel")
+            os.makedirs(self.diretorio, exist_ok=True)
+            escrever_workbook(temporario, abas, progresso)
+            # Renomeação atômica: nenhum leitor vê um arquivo pela metade
+            os.replace(temporario, trabalho.caminho)
+            trabalho.atualizar(1.0, "Pronto")
+            trabalho.concluido = True
+        except Exception as e:
+            trabalho.erro = str(e)
+            trabalho.etapa = "Erro"
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        try:
+            self._limpar_antigos()
+        except OSError:
+            # Outra thread pode ter apagado um arquivo entre a listagem e a data
+            pass
+
+    def _limpar_antigos(self):
+        arquivos = [
+            os.path.join(self.diretorio, nome) for nome in os.listdir(self.diretorio)
+            if nome.startswith("relatorio_eap_") and nome.endswith(".xlsx")
+        ]
+        arquivos.sort(key=os.path.getmtime)
+        for caminho in arquivos[:-RELATORIOS_MAX_ARQUIVOS]:
+            os.remove(caminho)
+        with self._lock:
+            for chave in [c for c, t in self._trabalhos.items() if t.concluido and not os.path.exists(t.caminho)]:
+                del self._trabalhos[chave]
@@ -0,0 +1,222 @@
+"""
+Relatórios da matriz EAP em lote, pela linha de comando
+
+Gera, sem a interface Streamlit, uma matriz comparativa por grupo de obras do
+Monday (por padrão cada construtora e cada local), com as mesmas contas da
+interface (nucleo.matriz). As fontes (EAPs, Monday e INCC) são carregadas uma única vez;
+os relatórios são divididos entre processos, que recebem as fontes ao
+iniciar e montam a base da matriz uma vez cada.
+
+Arquivos por relatório em --saida (nome: <campo>_<grupo>):
+- xlsx: relatório completo (matriz, detalhe por obra, fatores INCC e Monday)
+- csv / parquet: matriz numérica (código x obra e estatísticas)
+e indice.csv com a lista dos relatórios gerados.
+
+As fontes ao vivo usam as credenciais do ambiente (MONGO_URI, MONDAY_API_KEY,
+MONDAY_BOARD_ID e INCC_CSV; ver nucleo.config.Configuracao.do_ambiente). Com
+--fixture elas vêm de um JSON gravado antes com --gravar-fixture (mesmo
+formato de benchmarks/fixtures/matriz_eap_golden.json), sem rede.
+
+Uso:
+    python relatorios_lote.py --saida relatorios                 # fontes ao vivo (MongoDB, Monday.com, INCC)
+    python relatorios_lote.py --gravar-fixture fontes.json       # grava as fontes para rodar offline
+    python relatorios_lote.py --fixture fontes.json --formatos xlsx csv parquet --processos 4
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from nucleo.config import Configuracao, ErroConfiguracao, colecao_mongo
+from nucleo.fontes import ErroFonte, carregar_eaps, carregar_monday, carregar_incc, normalizar_texto_busca
+from nucleo.matriz import (
+    coluna_sigla, grupos_monday, preparar_matriz, matriz_siglas, com_estatisticas, abas_relatorio, tabela_matriz
+)
+
+FORMATOS = ("xlsx", "csv", "parquet")
+
+# Agrupamentos aceitos em --agrupar (nome na linha de comando -> coluna do Monday)
+AGRUPAMENTOS = {"construtora": "Construtora", "local": "Local", "arquitetura": "Arquitetura"}
+
+ESTATISTICAS_PADRAO = ("Média", "Mediana", "Mínimo", "Máximo", "Nº obras")
+
+# Colunas do Monday gravadas na fixture (área, agrupamentos e aba Monday do relatório)
+COLUNAS_MONDAY_FIXTURE = ('Obras', 'Construtora', 'Area', 'Local', 'Arquitetura', 'Data')
+
+def carregar_fontes(config):
+    """EAPs vigentes de todas as obras, board do Monday e série INCC, lidos uma vez"""
+    try:
+        config.exigir("mongo_uri", "monday_api_key")
+        eaps_dados, _, _ = carregar_eaps(colecao_mongo(config, "eaps"), colecao_mongo(config, "projetos"))
+        _, monday_df, _ = carregar_monday(config)
+    except ErroConfiguracao as e:
+        raise SystemExit(f"{e} (defina as variáveis de ambiente ou use --fixture)")
+    except ErroFonte as e:
+        raise SystemExit(str(e))
+    incc_df, _ = carregar_incc(config.incc_csv)
+    return eaps_dados, monday_df, incc_df
+
+def gravar_fixture(caminho, eaps_dados, monday_df, incc_df):
+    """Grava as fontes em JSON para execuções offline (ver carregar_fixture)"""
+    colunas = [c for c in COLUNAS_MONDAY_FIXTURE if c in monday_df.columns]
+    fixture = {
+        "descricao": "Fontes dos relatórios em lote gravadas por relatorios_lote.py",
+        "eaps": eaps_dados,
+        "monday": {c: monday_df[c].astype(object).where(monday_df[c].notna(), "").tolist() for c in colunas},
+        "incc": {
+            "data": [] if incc_df is None else incc_df["data"].dt.strftime("%Y-%m-%d").tolist(),
+            "indice": [] if incc_df is None else incc_df["indice"].astype(float).tolist(),
+        },
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, default=str)
+
+def carregar_fixture(caminho):
+    """Fontes gravadas por gravar_fixture: (eaps_dados, monday_df, incc_df)"""
+    with open(caminho, encoding="utf-8") as f:
+        fixture = json.load(f)
+    eaps_dados = [{**doc, "itens": [tuple(item) for item in doc["itens"]]} for doc in fixture["eaps"]]
+    monday_df = pd.DataFrame(fixture["monday"])
+    incc = fixture.get("incc") or {}
+    incc_df = None
+    if incc.get("data"):
+        incc_df = pd.DataFrame({"data": pd.to_datetime(incc["data"]), "indice": incc["indice"]})
+    return eaps_dados, monday_df, incc_df
+
+def _nome_arquivo(campo, grupo, usados):
+    """Nome de arquivo sem acentos nem espaços; grupos que colidem recebem sufixo numérico"""
+    base = re.sub(r"[^a-z0-9]+", "_", normalizar_texto_busca(f"{campo} {grupo}")).strip("_")
+    nome, n = base, 1
+    while nome in usados:
+        n += 1
+        nome = f"{base}_{n}"
+    usados.add(nome)
+    return nome
+
+def planejar_relatorios(eaps_dados, monday_df, campos):
+    """
+    Um relatório por valor de cada campo do Monday, com as obras do board
+    que têm EAP (como na interface); obras sem o campo formam o grupo
+    "Sem <campo>". Retorna [(campo, grupo, arquivo, siglas)].
+    """
+    com_eap = {doc["sigla"] for doc in eaps_dados}
+    siglas = [s for s in dict.fromkeys(coluna_sigla(monday_df).astype(str)) if s in com_eap]
+    trabalhos, usados = [], set()
+    for campo in campos:
+        grupos = grupos_monday(monday_df, campo)
+        por_grupo = {}
+        for sigla in siglas:
+            por_grupo.setdefault(grupos.get(sigla, f"Sem {campo.lower()}"), []).append(sigla)
+        for grupo in sorted(por_grupo):
+            trabalhos.append((campo, grupo, _nome_arquivo(campo, grupo, usados), por_grupo[grupo]))
+    return trabalhos
+
+# Fontes e parâmetros de cada processo de trabalho (preenchido por _iniciar_processo)
+_PROCESSO = {}
+
+def _iniciar_processo(eaps_dados, monday_df, incc_df, saida, formatos, estatisticas):
+    """Recebe as fontes uma vez por processo e monta a base da matriz e a busca de áreas"""
+    # Sigla pré-calculada: a aba Monday de cada relatório filtra o board por ela
+    monday_df = monday_df.assign(Sigla=coluna_sigla(monday_df).astype(str))
+    _PROCESSO.update(
+        monday_df=monday_df, incc_df=incc_df, saida=saida, formatos=formatos, estatisticas=estatisticas,
+        preparada=preparar_matriz(eaps_dados, monday_df),
+    )
+
+def matriz_grupo(siglas):
+    """Matriz do grupo sobre a base do processo; mesmas contas de process_eap_matrix"""
+    matriz = matriz_siglas(_PROCESSO["preparada"], siglas, _PROCESSO["incc_df"])
+    return com_estatisticas(matriz, _PROCESSO["estatisticas"])
+
+def _gerar_relatorio(trabalho):
+    """Calcula e grava um relatório; retorna a linha do indice.csv"""
+    from relatorio_eap import escrever_workbook
+    campo, grupo, arquivo, siglas = trabalho
+    matriz = matriz_grupo(siglas)
+    caminho = os.path.join(_PROCESSO["saida"], arquivo)
+    formatos = _PROCESSO["formatos"]
+    if "xlsx" in formatos:
+        abas = abas_relatorio(matriz, _PROCESSO["preparada"]["base"], _PROCESSO["monday_df"], _PROCESSO["incc_df"], {})
+        escrever_workbook(f"{caminho}.xlsx", abas)
+    if "csv" in formatos or "parquet" in formatos:
+        tabela = tabela_matriz(matriz)
+        if "csv" in formatos:
+            tabela.to_csv(f"{caminho}.csv", index=False, sep=";", decimal=",", encoding="utf-8-sig")
+        if "parquet" in formatos:
+            tabela.to_parquet(f"{caminho}.parquet", index=False)
+    return {"campo": campo, "grupo": grupo, "arquivo": arquivo, "obras": len(siglas), "codigos": len(matriz["valores"])}
+
+def gerar_relatorios(eaps_dados, monday_df, incc_df, saida, campos=("Construtora", "Local"),
+                     formatos=("xlsx",), processos=None, estatisticas=ESTATISTICAS_PADRAO):
+    """
+    Gera todos os relatórios em ``saida`` e retorna o resumo da execução
+    (quantidade, tempo e relatórios por segundo). Com ``processos=1`` tudo
+    roda no processo atual.
+    """
+    processos = processos or os.cpu_count() or 1
+    os.makedirs(saida, exist_ok=True)
+    trabalhos = planejar_relatorios(eaps_dados, monday_df, campos)
+    argumentos = (eaps_dados, monday_df, incc_df, saida, tuple(formatos), tuple(estatisticas))
+
+    inicio = time.perf_counter()
+    if processos == 1:
+        _iniciar_processo(*argumentos)
+        linhas = [_gerar_relatorio(trabalho) for trabalho in trabalhos]
+    else:
+        # Lotes de relatórios por envio: grupos pequenos são rápidos e o custo é o da troca entre processos
+        lote = max(1, len(trabalhos) // (processos * 4))
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo, initargs=argumentos) as executor:
+            linhas = list(executor.map(_gerar_relatorio, trabalhos, chunksize=lote))
+    duracao = time.perf_counter() - inicio
+
+    pd.DataFrame(linhas, columns=["campo", "grupo", "arquivo", "obras", "codigos"]).to_csv(
+        os.path.join(saida, "indice.csv"), index=False, sep=";", encoding="utf-8-sig")
+    return {
+        "relatorios": len(linhas),
+        "processos": processos,
+        "formatos": list(formatos),
+        "segundos": round(duracao, 2),
+        "relatorios_por_s": round(len(linhas) / duracao, 2) if duracao > 0 else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera relatórios da matriz EAP por construtora, local ou arquitetura")
+    parser.add_argument("--saida", default="relatorios", help="Diretório dos arquivos gerados")
+    parser.add_argument("--fixture", help="JSON com as fontes gravadas (sem acesso à rede)")
+    parser.add_argument("--gravar-fixture", help="Lê as fontes ao vivo, grava neste JSON e termina")
+    parser.add_argument("--agrupar", nargs="+", choices=sorted(AGRUPAMENTOS), default=["construtora", "local"])
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["xlsx"])
+    parser.add_argument("--processos", type=int, default=0, help="Processos de trabalho (0 = nº de CPUs)")
+    args = parser.parse_args()
+
+    if "parquet" in args.formatos and importlib.util.find_spec("pyarrow") is None:
+        raise SystemExit("O formato parquet requer o pacote pyarrow (pip install pyarrow)")
+
+    inicio = time.perf_counter()
+    if args.fixture:
+        eaps_dados, monday_df, incc_df = carregar_fixture(args.fixture)
+    else:
+        try:
+            config = Configuracao.do_ambiente()
+        except ErroConfiguracao as e:
+            raise SystemExit(str(e))
+        eaps_dados, monday_df, incc_df = carregar_fontes(config)
+    t_fontes = time.perf_counter() - inicio
+    if args.gravar_fixture:
+        gravar_fixture(args.gravar_fixture, eaps_dados, monday_df, incc_df)
+        print(f"✅ Fontes gravadas em {args.gravar_fixture} ({len(eaps_dados)} EAPs, {len(monday_df)} obras no Monday)")
+        return
+
+    resumo = gerar_relatorios(
+        eaps_dados, monday_df, incc_df, args.saida,
+        campos=[AGRUPAMENTOS[a] for a in args.agrupar], formatos=args.formatos, processos=args.processos or None,
+    )
+    resumo["carregamento_fontes_s"] = round(t_fontes, 2)
+    print(f"✅ Relatórios gerados em {args.saida}: {resumo}")
+
+if __name__ == "__main__":
+    main()